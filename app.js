@@ -344,350 +344,77 @@ document.addEventListener('DOMContentLoaded', async () => {
         });
     }
 
-    // Build project guide prompt (Medium-style tutorial)
-    function buildProjectGuidePrompt(projectName, projectDescription) {
-        const desc = projectDescription && projectDescription.trim().length > 0 ? projectDescription.trim() : '(no detailed description provided)';
-        
-        return `You are a professional technical writer creating an in-depth, engaging tutorial guide in the style of popular Medium articles. Write in a conversational yet authoritative tone, using personal pronouns (you, we, I), storytelling elements, and practical examples. Make the content engaging, accessible, and comprehensive.
-
-Format your response EXACTLY like this structure:
-
-# ${projectName}: A Complete Guide
-
-## Introduction
-
-Hey there! Today we're going to dive deep into ${projectName}. Whether you're just getting started or looking to strengthen your understanding, this guide will walk you through everything you need to know.
-
-**What we'll cover in this guide:**
-- [Key topic 1]
-- [Key topic 2]
-- [Key topic 3]
-- [Continue with 5-8 main topics]
-
-**By the end of this tutorial, you'll be able to:**
-- [Specific outcome 1]
-- [Specific outcome 2]
-- [Continue with 5-7 outcomes]
-
-**Time to complete:** [Estimated time]
-**Difficulty level:** [Beginner/Intermediate/Advanced]
-
----
-
-## Why This Matters
-
-Before we jump into the technical details, let's talk about why you should care about this.
-
-[Write 3-4 engaging paragraphs explaining:
-- The real-world problem this solves
-- Why professionals use this technology
-- How it fits into modern development
-- The career/skill benefits of learning this]
-
-**Real-world use case:** [Describe a concrete scenario where this is used in production]
-
----
-
-## What You'll Need
-
-Here's what you should have ready before we begin:
-
-**Required:**
-- [Tool/software 1] - [Why you need it]
-- [Tool/software 2] - [Why you need it]
-- [Continue...]
-
-**Nice to have:**
-- [Optional tool 1]
-- [Optional tool 2]
-
-**Knowledge prerequisites:**
-You should be comfortable with [list basics]. Don't worry if you're not an expert—I'll explain everything as we go!
-
----
-
-## Understanding the Fundamentals
-
-Let's start by understanding what we're actually working with here.
-
-### What is [Technology/Concept]?
-
-[Write 2-3 conversational paragraphs explaining the concept in plain English, using everyday analogies]
-
-Think of it like this: [Simple analogy that makes it relatable]
-
-### How Does It Work?
-
-Here's the interesting part. [Explain the underlying mechanism in 3-4 paragraphs, breaking down complexity into digestible pieces]
-
-**The key components are:**
-1. **[Component 1]** - [What it does in simple terms]
-2. **[Component 2]** - [What it does in simple terms]
-3. **[Component 3]** - [What it does in simple terms]
-
-### Why We Build It This Way
-
-You might be wondering why we don't just [alternative approach]. Good question! [Explain the reasoning behind the design choices]
-
----
-
-## Let's Get Started: Part 1 - [Section Name]
-
-Alright, enough theory—let's build something!
-
-### Step 1: [First Action]
-
-First things first, we need to [action description]. Here's how:
-
-\\\`\\\`\\\`bash
-# [Command with descriptive comment]
-[actual command]
-\\\`\\\`\\\`
-
-**What's happening here?**
-When you run this command, [explain what happens step by step]. The \\\`[flag/option]\\\` tells it to [explanation], which is important because [reason].
-
-**You should see:**
-\\\`\\\`\\\`
-[Expected output]
-\\\`\\\`\\\`
-
-If you see something different, don't panic! [Common variation and what it means]
-
-### Step 2: [Next Action]
-
-Now that we've got [previous step result], let's [next action]. This is where things get interesting.
-
-\\\`\\\`\\\`python
-# [Descriptive comment explaining what this code does]
-[code example with inline comments]
-\\\`\\\`\\\`
-
-**Let's break this down line by line:**
-
-**Line 1:** \\\`[code snippet]\\\` - This [explanation]. We're using [approach] because [reason].
-
-**Line 2:** \\\`[code snippet]\\\` - Here we're [explanation]. Notice how [important detail]? That's crucial because [reason].
-
-**Line 3:** \\\`[code snippet]\\\` - [Continue detailed explanation]
-
-**Pro tip:** [Helpful insight or best practice]
-
-### Step 3: [Continue Pattern]
-
-[Continue with detailed, conversational explanations]
-
-[Include 8-12 major steps in Part 1]
-
----
-
-## Part 2 - [Next Major Section]
-
-Great! You've made it through the basics. Now let's level up.
-
-### [Next Topic]
-
-Here's where most tutorials gloss over important details, but we won't do that. Let me explain [concept] properly.
-
-[Write detailed explanation in conversational style]
-
-**Here's the code:**
-
-\\\`\\\`\\\`javascript
-// [Comment explaining overall purpose]
-[code with extensive inline comments explaining each important line]
-\\\`\\\`\\\`
-
-**Wait, what's going on here?**
-
-I know that might look confusing at first. Let me walk you through it:
-
-1. First, we [action] - this sets up [thing]
-2. Then we [action] - this is important because [reason]
-3. Finally, we [action] - which gives us [result]
-
-**Common mistake alert!** 
-Many developers try to [common mistake]. Don't do this! It causes [problem] because [explanation]. Instead, always [correct approach].
-
-[Continue with detailed sections]
-
----
-
-## Part 3 - [Advanced Topic]
-
-You're doing great! Now let's tackle something a bit more advanced.
-
-[Continue pattern with conversational tone and detailed explanations]
-
-[Include 15-20 major sections total across all parts]
-
----
-
-## Putting It All Together: A Complete Example
-
-Let's build a real, working example from scratch. I'll walk you through every single line.
-
-**What we're building:** [Description of complete example]
-
-**Here's the full code:**
-
-\\\`\\\`\\\`python
-# [Comprehensive example with extensive comments]
-[complete, working code example]
-\\\`\\\`\\\`
-
-**Now let's understand every piece:**
-
-[Provide detailed walkthrough of entire example, explaining how all parts work together]
-
-**Testing it out:**
-
-Run this with:
-\\\`\\\`\\\`bash
-[command to run]
-\\\`\\\`\\\`
-
-You should see:
-\\\`\\\`\\\`
-[expected output]
-\\\`\\\`\\\`
-
-Awesome! If you got this working, you've just successfully [achievement]. That's a big deal!
-
----
-
-## Common Issues and How to Fix Them
-
-Let me share some issues I've run into (and how I solved them).
-
-### Problem 1: [Common Error]
-
-**What you see:**
-\\\`\\\`\\\`
-[Error message]
-\\\`\\\`\\\`
-
-**What it means:**
-[Plain English explanation of what's wrong]
-
-**How to fix it:**
-[Step-by-step solution with explanation]
-
-**Why this happens:**
-[Root cause explanation]
-
-### Problem 2: [Another Common Issue]
-
-[Continue pattern for 6-8 common issues]
-
----
-
-## Best Practices and Pro Tips
-
-Now that you've got the basics down, here are some tips I wish someone had told me when I was learning this:
-
-**1. [Best Practice Title]**
-[Explanation of why this matters and how to implement it]
-
-**2. [Best Practice Title]**
-[Continue with explanations]
-
-**3. Do this, not that:**
-❌ **Don't:** [Bad practice]
-✅ **Do:** [Good practice]
-**Why:** [Explanation]
-
-[Include 8-10 best practices]
-
----
-
-## Taking It Further
-
-Congratulations! You've built [what they built]. But don't stop here—let's talk about what's next.
-
-### Ideas for Enhancement
-
-**Easy additions:**
-- [Enhancement 1] - [How it improves the project]
-- [Enhancement 2] - [How it improves the project]
-
-**Intermediate challenges:**
-- [Challenge 1] - [What you'll learn]
-- [Challenge 2] - [What you'll learn]
-
-**Advanced projects:**
-- [Advanced idea 1] - [Skills you'll practice]
-- [Advanced idea 2] - [Skills you'll practice]
-
-### Related Topics to Explore
-
-Now that you understand ${projectName}, you're ready to learn:
-- **[Related topic 1]** - [How it connects]
-- **[Related topic 2]** - [How it connects]
-- **[Related topic 3]** - [How it connects]
-
----
-
-## Frequently Asked Questions
-
-**Q: [Common question]**
-A: [Detailed, helpful answer]
-
-**Q: [Another question]**
-A: [Detailed, helpful answer]
-
-[Include 8-10 FAQs]
-
----
-
-## Resources and Further Reading
-
-Want to dive deeper? Here are my favorite resources:
-
-**Documentation:**
-- [Resource 1] - [What makes it useful]
-- [Resource 2] - [What makes it useful]
-
-**Tutorials and Courses:**
-- [Resource 1] - [Why I recommend it]
-- [Resource 2] - [Why I recommend it]
-
-**Community:**
-- [Forum/Community 1] - [What you'll find there]
-- [Forum/Community 2] - [What you'll find there]
-
----
-
-## Wrapping Up
-
-Let's recap what we've covered today:
-
-✅ [Key learning 1]
-✅ [Key learning 2]
-✅ [Key learning 3]
-✅ [Continue with all major learnings]
-
-You've come a long way! When I first started with ${projectName}, I struggled with [relatable struggle]. But with practice, it becomes second nature.
-
-**Your next steps:**
-1. [Immediate next action]
-2. [Follow-up practice]
-3. [Advanced exploration]
-
-Remember, the best way to learn is by doing. Take this code, break it, fix it, and make it your own.
-
-**Got questions?** Drop them in the comments below, and I'll help you out!
-
-**Found this helpful?** Share it with someone who's learning ${projectName}!
+    // Project guides take minutes to stream, so a dropped stream is retried
+    // with X-Generation-Resume: the proxy replays the text it checkpointed
+    // and Ollama continues from there instead of starting over. With resume
+    // set, the first attempt also picks up a checkpoint left by an earlier
+    // visit. Returns the full response text.
+    const MAX_STREAM_ATTEMPTS = 3;
+    async function streamGenerationWithResume(fetchUrl, headers, body, resume) {
+        let lastError = null;
+        for (let attempt = 0; attempt < MAX_STREAM_ATTEMPTS; attempt++) {
+            if (attempt > 0) {
+                await new Promise(resolve => setTimeout(resolve, 1000));
+            }
+            const attemptHeaders = { ...headers };
+            if (resume || attempt > 0) {
+                attemptHeaders['X-Generation-Resume'] = '1';
+            }
 
-Happy coding! 🚀
+            // Each attempt's stream starts from the beginning of the text
+            let text = '';
+            let complete = false;
+            let pending = '';
+            const readLines = (lines) => {
+                for (const line of lines) {
+                    if (!line.trim()) continue;
+                    try {
+                        const data = JSON.parse(line);
+                        if (data.response) {
+                            text += data.response;
+                        }
+                        if (data.done) {
+                            complete = true;
+                        }
+                    } catch (e) {
+                        // Ignore parse errors
+                    }
+                }
+            };
 
----
+            try {
+                const response = await fetch(fetchUrl, {
+                    method: 'POST',
+                    headers: attemptHeaders,
+                    body: JSON.stringify(body)
+                });
+                if (!response.ok) {
+                    lastError = new Error(`HTTP ${response.status}`);
+                    // Only server-side failures are worth another attempt
+                    if (response.status < 500) break;
+                    continue;
+                }
 
-*Project: ${projectName}*
-*Details: ${desc}*
+                const reader = response.body.getReader();
+                const decoder = new TextDecoder();
+                while (true) {
+                    const { done, value } = await reader.read();
+                    if (done) break;
+                    // Records can be split across chunks; keep the unfinished line
+                    const lines = (pending + decoder.decode(value, { stream: true })).split('\n');
+                    pending = lines.pop();
+                    readLines(lines);
+                }
+                readLines([pending]);
+            } catch (error) {
+                lastError = error;
+            }
 
-Write this as an engaging, comprehensive Medium-style tutorial with a conversational tone. Use personal pronouns, storytelling, practical examples, and detailed code explanations. Include 15-20 major sections with thorough walkthroughs, common pitfalls, best practices, and actionable next steps. Make it feel like a friendly expert is teaching the reader one-on-one.`;
+            if (complete) return text;
+            lastError = lastError || new Error('Stream ended before the guide was complete');
+            console.warn(`Guide stream attempt ${attempt + 1} failed:`, lastError);
+        }
+        throw lastError;
     }
 
     // Generate project guide
@@ -714,23 +441,17 @@ Write this as an engaging, comprehensive Medium-style tutorial with a conversati
 
         // Check cache first
         try {
-            const cacheResponse = await fetch('http://10.207.20.29:8001/api/cache/get', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({
-                    task_name: project.name,
-                    task_description: project.description,
-                    is_advanced: false,
-                    model_name: currentOllamaModel,
-                    is_project: true
-                })
+            const cacheData = await fetchCachedGuide({
+                task_name: project.name,
+                task_description: project.description,
+                is_advanced: false,
+                model_name: currentOllamaModel,
+                is_project: true
             });
 
-            if (cacheResponse.ok) {
-                const cacheData = await cacheResponse.json();
-                if (cacheData.found && cacheData.guide_content) {
-                    const html = converter.makeHtml(cacheData.guide_content);
-                    targetDiv.innerHTML = html;
+            if (cacheData) {
+                if (cacheData.found && cacheData.guide_html) {
+                    targetDiv.innerHTML = cacheData.guide_html;
                     if (loadingDiv) loadingDiv.style.display = 'none';
                     
                     // Show regenerate button
@@ -747,7 +468,6 @@ Write this as an engaging, comprehensive Medium-style tutorial with a conversati
         }
 
         // Generate new guide
-        const prompt = buildProjectGuidePrompt(project.name, project.description);
 
         let textBuffer = '';
         try {
@@ -760,65 +480,22 @@ Write this as an engaging, comprehensive Medium-style tutorial with a conversati
             if (currentOllamaUrl && currentOllamaUrl !== fetchUrl) {
                 headers['X-Ollama-Target'] = currentOllamaUrl;
             }
-
-            const response = await fetch(fetchUrl, {
-                method: 'POST',
-                headers: headers,
-                body: JSON.stringify({
-                    model: currentOllamaModel,
-                    prompt: prompt,
-                    stream: true
-                })
-            });
-
-            if (!response.ok) {
-                throw new Error(`HTTP ${response.status}`);
-            }
-
-            const reader = response.body.getReader();
-            const decoder = new TextDecoder();
-
-            while (true) {
-                const { done, value } = await reader.read();
-                if (done) break;
-
-                const chunk = decoder.decode(value, { stream: true });
-                const lines = chunk.split('\n');
-
-                for (const line of lines) {
-                    if (line.trim()) {
-                        try {
-                            const data = JSON.parse(line);
-                            if (data.response) {
-                                textBuffer += data.response;
-                            }
-                        } catch (e) {
-                            // Ignore parse errors
-                        }
-                    }
-                }
-            }
+            // Someone is looking at this guide: jump ahead of background fill
+            headers['X-Generation-Priority'] = 'interactive';
+
+            textBuffer = await streamGenerationWithResume(fetchUrl, headers, {
+                model: currentOllamaModel,
+                // The proxy renders the prompt and saves the finished guide under this project
+                prompt_template: 'project',
+                fields: {
+                    task_name: project.name,
+                    task_description: project.description
+                },
+                stream: true
+            }, true);
 
             // Remove thinking tags and render
             const cleanedText = textBuffer.replace(/<think>[\s\S]*?<\/think>/gi, '').trim();
-            
-            // Save to cache
-            try {
-                await fetch('http://10.207.20.29:8001/api/cache/save', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({
-                        task_name: project.name,
-                        task_description: project.description,
-                        is_advanced: false,
-                        model_name: currentOllamaModel,
-                        guide_content: cleanedText,
-                        is_project: true
-                    })
-                });
-            } catch (cacheErr) {
-                console.error('Failed to save to cache:', cacheErr);
-            }
 
             const html = converter.makeHtml(cleanedText);
             targetDiv.innerHTML = html;
@@ -858,7 +535,6 @@ Write this as an engaging, comprehensive Medium-style tutorial with a conversati
         const loadingDiv = targetDiv.previousElementSibling;
 
         // Generate new guide (skip cache lookup)
-        const prompt = buildProjectGuidePrompt(project.name, project.description);
 
         let textBuffer = '';
         try {
@@ -871,65 +547,22 @@ Write this as an engaging, comprehensive Medium-style tutorial with a conversati
             if (currentOllamaUrl && currentOllamaUrl !== fetchUrl) {
                 headers['X-Ollama-Target'] = currentOllamaUrl;
             }
-
-            const response = await fetch(fetchUrl, {
-                method: 'POST',
-                headers: headers,
-                body: JSON.stringify({
-                    model: currentOllamaModel,
-                    prompt: prompt,
-                    stream: true
-                })
-            });
-
-            if (!response.ok) {
-                throw new Error(`HTTP ${response.status}`);
-            }
-
-            const reader = response.body.getReader();
-            const decoder = new TextDecoder();
-
-            while (true) {
-                const { done, value } = await reader.read();
-                if (done) break;
-
-                const chunk = decoder.decode(value, { stream: true });
-                const lines = chunk.split('\n');
-
-                for (const line of lines) {
-                    if (line.trim()) {
-                        try {
-                            const data = JSON.parse(line);
-                            if (data.response) {
-                                textBuffer += data.response;
-                            }
-                        } catch (e) {
-                            // Ignore parse errors
-                        }
-                    }
-                }
-            }
+            // Someone is looking at this guide: jump ahead of background fill
+            headers['X-Generation-Priority'] = 'interactive';
+
+            textBuffer = await streamGenerationWithResume(fetchUrl, headers, {
+                model: currentOllamaModel,
+                // The proxy renders the prompt and saves the finished guide under this project
+                prompt_template: 'project',
+                fields: {
+                    task_name: project.name,
+                    task_description: project.description
+                },
+                stream: true
+            }, false); // start over; only retries resume
 
             // Remove thinking tags and render
             const cleanedText = textBuffer.replace(/<think>[\s\S]*?<\/think>/gi, '').trim();
-            
-            // Update cache with new content
-            try {
-                await fetch('http://10.207.20.29:8001/api/cache/save', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({
-                        task_name: project.name,
-                        task_description: project.description,
-                        is_advanced: false,
-                        model_name: currentOllamaModel,
-                        guide_content: cleanedText,
-                        is_project: true
-                    })
-                });
-            } catch (cacheErr) {
-                console.error('Failed to save to cache:', cacheErr);
-            }
 
             const html = converter.makeHtml(cleanedText);
             targetDiv.innerHTML = html;
@@ -992,6 +625,20 @@ Write this as an engaging, comprehensive Medium-style tutorial with a conversati
                         model_name: currentOllamaModel
                     })
                 }).then(() => {
+                    // Let other screens showing this task know a new guide is coming
+                    fetch('http://10.207.20.29:8001/notify', {
+                        method: 'POST',
+                        body: JSON.stringify({
+                            type: 'assignment-updated',
+                            data: {
+                                task_name: assignment.taskName,
+                                task_description: assignment.taskDescription,
+                                is_advanced: isAdvanced,
+                                model_name: currentOllamaModel,
+                                status: 'regenerating'
+                            }
+                        })
+                    }).catch(() => {});
                     // Reset the guide display
                     const target = document.getElementById(`guide-${assignmentId}`);
                     const loading = target?.previousElementSibling;
@@ -1136,7 +783,9 @@ Write this as an engaging, comprehensive Medium-style tutorial with a conversati
 
         // After rendering, fetch guides for each assignment with limited concurrency
         const tasksFetchers = lastAssignments.map((a) => () => fetchOllamaGuideForAssignment(a));
-        runWithConcurrency(tasksFetchers, 2).catch(err => console.error('Guide generation error:', err));
+        prefetchCachedGuides(lastAssignments)
+            .then(() => runWithConcurrency(tasksFetchers, 2))
+            .catch(err => console.error('Guide generation error:', err));
     });
 
     clearResultsButton?.addEventListener('click', () => {
@@ -1176,102 +825,6 @@ Write this as an engaging, comprehensive Medium-style tutorial with a conversati
 
     // ----- Ollama Guide Generation per Assignment -----
 
-    function buildGuidePrompt(taskName, taskDescription, groupMembers) {
-        const desc = taskDescription && taskDescription.trim().length > 0 ? taskDescription.trim() : '(no detailed description provided)';
-        const members = groupMembers.join(', ');
-        const isAdvanced = advancedModeCheckbox?.checked || false;
-        
-        if (isAdvanced) {
-            return `You are an expert-level technical documentation specialist and security professional. Create a comprehensive, ADVANCED KB (Knowledge Base) article to help complete the task below. This guide should be TWICE the length of a standard guide and include expert-level knowledge, security considerations, advanced techniques, and deep technical details.
-
-Format your response EXACTLY like this structure:
-## Overview
-[Comprehensive 3-4 sentence summary covering the technical context, security implications, and what will be accomplished]
-
-## Prerequisites
-- [Detailed list of required tools with specific versions]
-- [Required permissions and access levels]
-- [Advanced knowledge requirements and technical background needed]
-- [Security considerations before starting]
-
-## Technical Background
-[2-3 paragraphs explaining the underlying technology, protocols, or concepts involved at an expert level]
-
-## Steps
-### Step 1: [Detailed Action Title]
-[In-depth instruction with technical reasoning, security implications, and best practices]
-**Security Note:** [Security considerations for this step]
-**Advanced Tip:** [Expert-level optimization or alternative approach]
-
-### Step 2: [Detailed Action Title]
-[In-depth instruction with technical reasoning, security implications, and best practices]
-**Security Note:** [Security considerations for this step]
-**Advanced Tip:** [Expert-level optimization or alternative approach]
-
-[Continue with 20-30 detailed steps as needed for comprehensive coverage]
-
-## Verification and Validation
-### Verification Steps
-[Detailed steps to confirm successful completion]
-
-### Troubleshooting Common Issues
-[List potential problems and expert-level solutions]
-
-### Performance Optimization
-[How to optimize the implementation]
-
-## Security Hardening
-[Additional security measures and hardening techniques specific to this task]
-
-## Advanced Scenarios
-[Complex use cases and edge cases with solutions]
-
-## Additional Resources
-- [Links to advanced documentation, RFCs, or technical papers]
-- [Industry best practices and compliance standards]
-- [Advanced tutorials and expert-level resources]
-
-## Expert Notes
-[Additional insights, caveats, or advanced considerations that experts should know]
-
-Task: ${taskName}
-Assigned to: ${members}
-Task details: ${desc}
-
-Make this guide comprehensive and detailed (20-30+ steps). Include detailed command examples with explanations, configuration files, security best practices, and advanced techniques throughout.`;
-        } else {
-            return `You are a technical documentation expert. Create a step-by-step KB (Knowledge Base) article to help complete the task below.
-
-Format your response EXACTLY like this structure:
-## Overview
-[Brief 1-2 sentence summary of what will be accomplished]
-
-## Prerequisites
-- [List any required tools, access, or knowledge]
-
-## Steps
-### Step 1: [Action Title]
-[Clear instruction on what to do]
-
-### Step 2: [Action Title]
-[Clear instruction on what to do]
-
-[Continue with numbered steps as needed]
-
-## Verification
-[How to confirm the task was completed successfully]
-
-## Additional Resources
-- [Link to documentation or tutorial if applicable]
-
-Task: ${taskName}
-Assigned to: ${members}
-Task details: ${desc}
-
-Keep it concise (10-15 steps maximum). Include command examples in code blocks where relevant.`;
-        }
-    }
-
     async function fetchOllamaGuideForAssignment(assignment, forceRegenerate = false) {
         const targetId = `guide-${assignment.id}`;
         const target = document.getElementById(targetId);
@@ -1283,22 +836,24 @@ Keep it concise (10-15 steps maximum). Include command examples in code blocks w
         // Check cache first (unless force regenerate)
         if (!forceRegenerate) {
             try {
-                const cacheResponse = await fetch('http://10.207.20.29:8001/api/cache/get', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({
+                // The batched lookup already told us whether the guide exists
+                const prefetched = assignment.prefetchedCache;
+                assignment.prefetchedCache = undefined;
+
+                let cacheData = null;
+                if (!prefetched || prefetched.found) {
+                    cacheData = await fetchCachedGuide({
                         task_name: assignment.taskName,
                         task_description: assignment.taskDescription,
                         is_advanced: isAdvanced,
                         model_name: currentOllamaModel
-                    })
-                });
+                    });
+                }
 
-                if (cacheResponse.ok) {
-                    const cacheData = await cacheResponse.json();
+                if (cacheData) {
                     if (cacheData.found) {
-                        // Display cached content
-                        const html = formatWithCodeBlocks(cacheData.guide_content);
+                        // Display cached content (rendered by the proxy)
+                        const html = cacheData.guide_html;
                         if (loading && loading.classList.contains('guide-loading')) {
                             loading.textContent = `✓ Cached (${new Date(cacheData.created_at).toLocaleString()})`;
                             loading.style.color = '#10b981';
@@ -1319,10 +874,12 @@ Keep it concise (10-15 steps maximum). Include command examples in code blocks w
             }
         }
 
-        const prompt = buildGuidePrompt(assignment.taskName, assignment.taskDescription, assignment.group);
-
         // Accumulate streamed text, then render as Markdown when done
         let textBuffer = '';
+        // Our own guide-saved event must not re-render this card mid-stream
+        assignment.generating = true;
+        const generationId = `guide-${assignment.id}-${Date.now().toString(36)}${Math.random().toString(36).slice(2, 8)}`;
+        let stopQueueWatch = () => {};
         try {
             // Always use local proxy, send target URL in header
             const fetchUrl = 'http://10.207.20.29:8001/api/generate';
@@ -1335,16 +892,27 @@ Keep it concise (10-15 steps maximum). Include command examples in code blocks w
             if (currentOllamaUrl.startsWith('https://')) {
                 headers['X-Ollama-Target'] = currentOllamaUrl;
             }
+            // A regenerate click is interactive; the initial fan-out queues behind it
+            headers['X-Generation-Priority'] = forceRegenerate ? 'interactive' : 'assignment';
+            headers['X-Generation-Id'] = generationId;
+            stopQueueWatch = watchQueuePosition(generationId, loading);
             
             const response = await fetch(fetchUrl, {
                 method: 'POST',
                 headers: headers,
                 body: JSON.stringify({
                     model: currentOllamaModel,
-                    prompt: prompt
+                    // The proxy renders the prompt and saves the finished guide under this task
+                    prompt_template: isAdvanced ? 'task-advanced' : 'task-normal',
+                    fields: {
+                        task_name: assignment.taskName,
+                        task_description: assignment.taskDescription
+                    }
                 })
             });
 
+            // Headers arrive once the proxy admits the generation
+            stopQueueWatch();
             if (!response.ok || !response.body) {
                 throw new Error(`Request failed with status ${response.status}`);
             }
@@ -1374,23 +942,6 @@ Keep it concise (10-15 steps maximum). Include command examples in code blocks w
             // Remove thinking tags and their content before rendering
             const cleanedText = textBuffer.replace(/<think>[\s\S]*?<\/think>/gi, '').trim();
             
-            // Save to cache
-            try {
-                await fetch('http://10.207.20.29:8001/api/cache/save', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({
-                        task_name: assignment.taskName,
-                        task_description: assignment.taskDescription,
-                        is_advanced: isAdvanced,
-                        model_name: currentOllamaModel,
-                        guide_content: cleanedText
-                    })
-                });
-            } catch (e) {
-                console.log('Failed to cache guide:', e);
-            }
-            
             // Render with enhanced code block formatting
             const html = formatWithCodeBlocks(cleanedText);
             if (loading && loading.classList.contains('guide-loading')) loading.remove();
@@ -1406,6 +957,80 @@ Keep it concise (10-15 steps maximum). Include command examples in code blocks w
             console.error('Ollama guide error:', e);
             if (loading && loading.classList.contains('guide-loading')) loading.textContent = 'Failed to generate guide.';
             target.innerHTML = '';
+        } finally {
+            stopQueueWatch();
+            assignment.generating = false;
+        }
+    }
+
+    // While a generation waits for an Ollama slot, show its queue position
+    // in the loading text. Returns a function that stops polling.
+    function watchQueuePosition(generationId, loading) {
+        if (!loading || !loading.classList.contains('guide-loading')) return () => {};
+        const originalText = loading.textContent;
+        let stopped = false;
+        const poll = async () => {
+            try {
+                const response = await fetch(`http://10.207.20.29:8001/api/generate/queue?id=${encodeURIComponent(generationId)}`);
+                const status = response.ok ? await response.json() : null;
+                const position = status?.request?.position || 0;
+                if (!stopped && position > 0) {
+                    loading.textContent = `Waiting for Ollama (position ${position} in queue)…`;
+                }
+            } catch (_) { /* position is cosmetic */ }
+        };
+        const timer = setInterval(poll, 2000);
+        return () => {
+            if (stopped) return;
+            stopped = true;
+            clearInterval(timer);
+            loading.textContent = originalText;
+        };
+    }
+
+    // Read one cached guide through the HTTP cache. The browser revalidates
+    // its copy with If-None-Match, so an unchanged guide costs a 304.
+    // The proxy sends it already rendered to sanitized HTML.
+    async function fetchCachedGuide(key) {
+        const params = new URLSearchParams();
+        Object.entries(key).forEach(([name, value]) => params.set(name, String(value ?? '')));
+        params.set('format', 'html');
+        const response = await fetch(`http://10.207.20.29:8001/api/cache/guide?${params}`, { cache: 'no-cache' });
+        if (response.status === 404) return { found: false };
+        if (!response.ok) return null;
+        return {
+            found: true,
+            guide_html: await response.text(),
+            created_at: response.headers.get('X-Guide-Created-At')
+        };
+    }
+
+    // Find out which assignments have a cached guide in a single request
+    async function prefetchCachedGuides(assignments) {
+        if (!assignments.length) return;
+        const isAdvanced = advancedModeCheckbox?.checked || false;
+        try {
+            const response = await fetch('http://10.207.20.29:8001/api/cache/get_many', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({
+                    include_content: false,
+                    keys: assignments.map(a => ({
+                        task_name: a.taskName,
+                        task_description: a.taskDescription,
+                        is_advanced: isAdvanced,
+                        model_name: currentOllamaModel
+                    }))
+                })
+            });
+            if (!response.ok) return;
+            const data = await response.json();
+            (data.results || []).forEach((result, i) => {
+                if (assignments[i]) assignments[i].prefetchedCache = result;
+            });
+        } catch (e) {
+            // Fall back to per-assignment lookups
+            console.log('Batch cache check failed:', e);
         }
     }
 
@@ -1457,15 +1082,54 @@ Keep it concise (10-15 steps maximum). Include command examples in code blocks w
     const ollamaResponse = document.getElementById('ollama-response');
     const ollamaLoading = document.getElementById('ollama-loading');
 
-    // Listen for server-sent events to trigger page refreshes when other users connect
+    // Does a guide key from a server event belong to this assignment as shown here?
+    function guideKeyMatches(key, assignment) {
+        const isAdvanced = advancedModeCheckbox?.checked || false;
+        return key.task_name === assignment.taskName &&
+            (key.task_description || '') === assignment.taskDescription &&
+            !!key.is_advanced === isAdvanced &&
+            key.model_name === currentOllamaModel &&
+            (key.guide_kind || 'task') === 'task';
+    }
+
+    // Listen for server-sent events and update only the cards they concern
     try {
-        const evtSource = new EventSource('/events');
+        const evtSource = new EventSource('http://10.207.20.29:8001/events');
         evtSource.onmessage = (e) => {
+            // Plain messages only come from manual /notify calls
             if (e.data && e.data.trim() === 'reload') {
                 console.log('Received reload event, refreshing page');
                 window.location.reload(true);
             }
         };
+        evtSource.addEventListener('guide-saved', (e) => {
+            const key = JSON.parse(e.data);
+            lastAssignments
+                .filter(a => !a.generating && guideKeyMatches(key, a))
+                .forEach(a => fetchOllamaGuideForAssignment(a));
+        });
+        // Bulk saves (/api/cache/save_many) arrive as one event listing every key
+        evtSource.addEventListener('guides-saved', (e) => {
+            const keys = JSON.parse(e.data).guides || [];
+            lastAssignments
+                .filter(a => !a.generating && keys.some(key => guideKeyMatches(key, a)))
+                .forEach(a => fetchOllamaGuideForAssignment(a));
+        });
+        evtSource.addEventListener('assignment-updated', (e) => {
+            const update = JSON.parse(e.data);
+            if (update.status !== 'regenerating') return;
+            lastAssignments.filter(a => !a.generating && guideKeyMatches(update, a)).forEach(a => {
+                const loading = document.getElementById(`guide-${a.id}`)?.previousElementSibling;
+                if (loading && loading.classList.contains('guide-loading')) {
+                    loading.textContent = 'Guide is being regenerated by someone else…';
+                    loading.style.color = '';
+                }
+            });
+        });
+        evtSource.addEventListener('presence', (e) => {
+            const presence = document.getElementById('presence-count');
+            if (presence) presence.textContent = `${JSON.parse(e.data).subscribers} connected`;
+        });
         evtSource.onerror = (err) => {
             console.warn('EventSource error', err);
         };
@@ -1510,6 +1174,7 @@ Keep it concise (10-15 steps maximum). Include command examples in code blocks w
                 headers['X-Ollama-Target'] = config.url;
                 console.log('Ask Ollama - Added X-Ollama-Target header:', config.url);
             }
+            headers['X-Generation-Priority'] = 'interactive';
             
             const response = await fetch(fetchUrl, {
                 method: 'POST',
@@ -1798,7 +1463,9 @@ Keep it concise (10-15 steps maximum). Include command examples in code blocks w
         
         // Generate guides
         const tasksFetchers = lastAssignments.map((a) => () => fetchOllamaGuideForAssignment(a));
-        runWithConcurrency(tasksFetchers, 2).catch(err => console.error('Guide generation error:', err));
+        prefetchCachedGuides(lastAssignments)
+            .then(() => runWithConcurrency(tasksFetchers, 2))
+            .catch(err => console.error('Guide generation error:', err));
 
         manualAssignmentModal.style.display = 'none';
     });
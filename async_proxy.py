@@ -0,0 +1,438 @@
+"""
+Asyncio serving mode for the GroupApp proxy.
+
+Streams /api/generate and /events on an aiohttp event loop so a long
+generation or an idle SSE subscriber costs a coroutine instead of a thread.
+Upstream calls go through one keep-alive aiohttp.ClientSession per Ollama
+target. Every other route (/api/cache/*) is handed to the Flask app in
+proxy.py, so both modes serve the same API on the same port.
+
+Run with: python3 async_proxy.py
+"""
+import asyncio
+import io
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from aiohttp import web, ClientSession, ClientTimeout, TCPConnector, ClientError
+
+import metrics
+import proxy
+from generation_flights import generation_key
+from generation_scheduler import QueueFull
+from event_hub import format_frame, HEARTBEAT_FRAME
+from static_files import StaticFiles, INDEX_FILE, IMMUTABLE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL
+
+HOST = '0.0.0.0'
+PORT = 8001
+UPSTREAM_CONNECTIONS_PER_TARGET = 64
+WSGI_WORKERS = 8
+# Cache imports above this size are spooled to a temporary file
+IMPORT_SPOOL_BYTES = 8 * 1024 * 1024
+
+CORS_HEADERS = {'Access-Control-Allow-Origin': '*'}
+
+upstream_sessions_key = web.AppKey('upstream_sessions', dict)
+wsgi_executor_key = web.AppKey('wsgi_executor', ThreadPoolExecutor)
+pump_tasks_key = web.AppKey('pump_tasks', set)
+static_files_key = web.AppKey('static_files', StaticFiles)
+
+
+def get_upstream_session(app, url):
+    """Return the pooled ClientSession for the origin of url."""
+    parts = urlsplit(url)
+    origin = f'{parts.scheme}://{parts.netloc}'
+    sessions = app[upstream_sessions_key]
+    session = sessions.get(origin)
+    if session is None or session.closed:
+        connector = TCPConnector(limit=UPSTREAM_CONNECTIONS_PER_TARGET, keepalive_timeout=60)
+        session = ClientSession(connector=connector)
+        sessions[origin] = session
+    return session
+
+
+async def handle_generate(request):
+    if request.method == 'OPTIONS':
+        return web.Response(headers={
+            **CORS_HEADERS,
+            'Access-Control-Allow-Methods': 'POST, OPTIONS',
+            'Access-Control-Allow-Headers': ('Content-Type, Accept, X-Ollama-Target, X-Generation-Priority, '
+                                             'X-Generation-Id, X-Generation-Resume')
+        })
+
+    # X-Ollama-Target names a preferred backend; the pool may fail over
+    preferred = proxy.upstream_pool.resolve_target(request.headers.get('X-Ollama-Target'))
+    body, template, error = proxy.expand_template(await request.read())
+    if error:
+        return web.json_response({'error': error}, status=400, headers=CORS_HEADERS)
+    body, cache_key = proxy.split_cache_key(body)
+    priority = proxy.request_priority(request.headers, cache_key)
+    client_id = request.headers.get('X-Generation-Id')
+
+    # Share the registry with proxy.py so both modes coalesce the same way
+    key = generation_key(body, template)
+    try:
+        flight, is_leader = proxy.generation_flights.join(
+            key, lambda: proxy.generation_scheduler.submit(key[0], priority, preferred, client_id))
+    except QueueFull as e:
+        return web.Response(text=str(e), status=503, headers={**CORS_HEADERS, 'Retry-After': '5'})
+    if cache_key and not flight.add_cache_key(cache_key):
+        # Joined after the leader's final save: the stream is complete, save it here
+        await asyncio.get_running_loop().run_in_executor(
+            request.app[wsgi_executor_key], proxy.save_generation, flight, {cache_key})
+    if is_leader:
+        if proxy.resume_requested(request.headers):
+            body = await asyncio.get_running_loop().run_in_executor(
+                request.app[wsgi_executor_key], proxy.resume_from_checkpoint, flight, body, cache_key)
+        task = asyncio.create_task(pump_generation(request.app, flight, body))
+        request.app[pump_tasks_key].add(task)
+        task.add_done_callback(request.app[pump_tasks_key].discard)
+    else:
+        proxy.generation_scheduler.promote(flight.ticket, priority, client_id)
+
+    if not await flight.wait_started_async():
+        return web.Response(text=flight.error or 'Upstream request failed', status=502)
+
+    resp = web.StreamResponse(status=flight.status, headers=CORS_HEADERS)
+    resp.content_type = flight.content_type
+    if cache_key:
+        resp.headers['X-Guide-Cache'] = 'write-through'
+    if flight.resumed_chars:
+        resp.headers['X-Generation-Resumed'] = str(flight.resumed_chars)
+    if template:
+        resp.headers['X-Prompt-Template'] = template
+    try:
+        await resp.prepare(request)
+        async for chunk in flight.aiter_chunks():
+            await resp.write(chunk)
+            metrics.stream_bytes_sent.inc(len(chunk))
+        await resp.write_eof()
+    except ConnectionResetError:
+        # The browser went away; the flight keeps running for other subscribers
+        pass
+    return resp
+
+
+async def open_upstream(app, flight, body):
+    """
+    Async counterpart of proxy.open_upstream: connect to the admitted
+    backend, failing over while nothing has been received yet.
+    Returns: (backend, response, first chunk, remaining chunk iterator)
+    """
+    timeout = ClientTimeout(total=None, sock_connect=proxy.UPSTREAM_TIMEOUT, sock_read=proxy.UPSTREAM_TIMEOUT)
+    scheduler = proxy.generation_scheduler
+    last_error = None
+    for backend, has_fallback in scheduler.attempts(flight.ticket):
+        if backend is None:
+            await scheduler.wait_async(flight.ticket)
+            continue
+        started = time.perf_counter()
+        proxy.upstream_pool.acquire(backend)
+        upstream = None
+        try:
+            session = get_upstream_session(app, backend.generate_url)
+            upstream = await session.post(backend.generate_url, data=body, headers={'Content-Type': 'application/json'}, timeout=timeout)
+            if upstream.status >= 500 and has_fallback:
+                upstream.release()
+                proxy.upstream_failed(flight, backend, f'HTTP {upstream.status}')
+                continue
+            chunks = upstream.content.iter_any()
+            try:
+                first = await chunks.__anext__()
+            except StopAsyncIteration:
+                first = b''
+        except (ClientError, asyncio.TimeoutError) as e:
+            if upstream is not None:
+                upstream.release()
+            proxy.upstream_failed(flight, backend, str(e) or type(e).__name__, down=True)
+            last_error = e
+            continue
+        except asyncio.CancelledError:
+            if upstream is not None:
+                upstream.release()
+            proxy.upstream_pool.release(backend)
+            raise
+        proxy.upstream_connected(flight, backend, started)
+        return backend, upstream, first, chunks
+    raise last_error or ClientError('No Ollama backend available')
+
+
+async def pump_generation(app, flight, body):
+    """Wait for admission, then forward one generation upstream and feed its stream into flight."""
+    scheduler = proxy.generation_scheduler
+    try:
+        await scheduler.wait_async(flight.ticket)
+        backend, upstream, first, chunks = await open_upstream(app, flight, body)
+    except asyncio.CancelledError:
+        scheduler.release(flight.ticket)
+        proxy.generation_flights.finish(flight, error='cancelled')
+        raise
+    except Exception as e:
+        scheduler.release(flight.ticket)
+        proxy.generation_flights.finish(flight, error=str(e) or type(e).__name__)
+        return
+
+    loop = asyncio.get_running_loop()
+    executor = app[wsgi_executor_key]
+    error = None
+    # At most one checkpoint save in the executor at a time, finished before the final save
+    checkpointing = None
+    try:
+        proxy.start_flight(flight, upstream.status, upstream.content_type or 'application/x-ndjson')
+        if first:
+            proxy.publish_upstream_chunk(flight, first)
+        async for chunk in chunks:
+            if proxy.publish_upstream_chunk(flight, chunk) and (checkpointing is None or checkpointing.done()):
+                checkpointing = loop.run_in_executor(executor, proxy.checkpoint_flight, flight)
+        if checkpointing is not None:
+            await checkpointing
+        await loop.run_in_executor(executor, proxy.complete_generation, flight)
+    except asyncio.CancelledError:
+        error = 'cancelled'
+        # Shutting down (e.g. a serve.py reload): keep the text for a resume
+        proxy.checkpoint_flight(flight)
+        proxy.generation_flights.finish(flight, error=error)
+        raise
+    except Exception as e:
+        error = str(e) or type(e).__name__
+        if checkpointing is not None:
+            await asyncio.wait([checkpointing])
+        await loop.run_in_executor(executor, proxy.fail_generation, flight, error)
+    finally:
+        upstream.release()
+        proxy.upstream_pool.release(backend, error=error)
+        scheduler.release(flight.ticket)
+
+
+async def handle_events(request):
+    # Same hub as the Flask routes, so broadcasts from either side reach everyone
+    subscriber = proxy.event_hub.subscribe()
+    proxy.publish_presence()
+
+    resp = web.StreamResponse(headers={
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'Connection': 'keep-alive',
+        **CORS_HEADERS
+    })
+    try:
+        await resp.prepare(request)
+        await resp.write(b': connected\n\n')
+        # close_all() on shutdown ends the stream; EventSource reconnects to another worker
+        while not subscriber.closed:
+            messages = await subscriber.wait_async()
+            if not messages:
+                # Heartbeat; fails with ConnectionResetError once the peer is gone
+                await resp.write(HEARTBEAT_FRAME.encode('utf-8'))
+            for msg in messages:
+                await resp.write(format_frame(msg).encode('utf-8'))
+    except (ConnectionResetError, asyncio.CancelledError):
+        pass
+    finally:
+        proxy.event_hub.unsubscribe(subscriber)
+        proxy.publish_presence()
+    return resp
+
+
+async def handle_static(request):
+    """Front-end files with compression, ETags and cache headers (production mode)."""
+    asset = request.app[static_files_key].get(request.match_info.get('name', INDEX_FILE))
+    if asset is None:
+        raise web.HTTPNotFound()
+    body, encoding, etag = asset.select(request.headers.get('Accept-Encoding'))
+    headers = {
+        'ETag': f'"{etag}"',
+        'Vary': 'Accept-Encoding',
+        # index.html links carry ?v=<hash>, so a versioned URL never changes
+        'Cache-Control': IMMUTABLE_CACHE_CONTROL if 'v' in request.query else REVALIDATE_CACHE_CONTROL,
+    }
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    if_none_match = request.headers.get('If-None-Match', '')
+    if f'"{etag}"' in if_none_match or if_none_match.strip() == '*':
+        return web.Response(status=304, headers=headers)
+    return web.Response(body=body, headers=headers, content_type=asset.content_type.split(';')[0], charset='utf-8')
+
+
+async def handle_notify(request):
+    proxy.notify_message(await request.text())
+    return web.Response(status=204, headers=CORS_HEADERS)
+
+
+def _build_environ(request, body):
+    environ = {
+        'REQUEST_METHOD': request.method,
+        'SCRIPT_NAME': '',
+        'PATH_INFO': request.path,
+        'QUERY_STRING': request.query_string,
+        'SERVER_NAME': request.url.host or HOST,
+        'SERVER_PORT': str(request.url.port or PORT),
+        'SERVER_PROTOCOL': f'HTTP/{request.version.major}.{request.version.minor}',
+        'REMOTE_ADDR': request.remote or '',
+        'CONTENT_TYPE': request.headers.get('Content-Type', ''),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': request.scheme,
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in request.headers.items():
+        key = 'HTTP_' + name.upper().replace('-', '_')
+        if key in ('HTTP_CONTENT_TYPE', 'HTTP_CONTENT_LENGTH'):
+            continue
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+def _run_wsgi(environ):
+    """Call the Flask app synchronously and collect the full response."""
+    status_headers = {}
+
+    def start_response(status, headers, exc_info=None):
+        status_headers['status'] = int(status.split(' ', 1)[0])
+        status_headers['headers'] = headers
+
+    result = proxy.app(environ, start_response)
+    try:
+        body = b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return status_headers['status'], status_headers['headers'], body
+
+
+async def _call_wsgi(request, environ):
+    loop = asyncio.get_running_loop()
+    status, headers, payload = await loop.run_in_executor(request.app[wsgi_executor_key], _run_wsgi, environ)
+    resp = web.Response(status=status, body=payload)
+    for name, value in headers:
+        if name.lower() != 'content-length':
+            resp.headers.add(name, value)
+    return resp
+
+
+async def handle_wsgi(request):
+    """Delegate non-streaming routes to the Flask app in a worker thread."""
+    body = await request.read()
+    return await _call_wsgi(request, _build_environ(request, body))
+
+
+async def handle_import(request):
+    """
+    /api/cache/import without the client_max_size limit: the upload is
+    spooled (to disk once large) and the Flask route reads it from there.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES)
+    try:
+        size = 0
+        async for chunk in request.content.iter_chunked(64 * 1024):
+            spool.write(chunk)
+            size += len(chunk)
+        spool.seek(0)
+        environ = _build_environ(request, b'')
+        environ['wsgi.input'] = spool
+        environ['CONTENT_LENGTH'] = str(size)
+        return await _call_wsgi(request, environ)
+    finally:
+        spool.close()
+
+
+async def handle_export(request):
+    """/api/cache/export streamed batch by batch instead of buffered by the WSGI bridge."""
+    if not proxy.task_cache:
+        return await handle_wsgi(request)
+    filters, error = proxy.export_filters_from(request.query)
+    if error:
+        return web.json_response({'error': error}, status=400, headers=CORS_HEADERS)
+
+    loop = asyncio.get_running_loop()
+    executor = request.app[wsgi_executor_key]
+    chunks = proxy.task_cache.iter_export_chunks(**filters)
+    resp = web.StreamResponse(headers=proxy.EXPORT_HEADERS)
+    try:
+        await resp.prepare(request)
+        while True:
+            chunk = await loop.run_in_executor(executor, next, chunks, None)
+            if chunk is None:
+                break
+            await resp.write(chunk)
+        await resp.write_eof()
+    except ConnectionResetError:
+        pass
+    finally:
+        # Still inside next() in a worker thread if this handler was cancelled
+        if not chunks.gi_running:
+            chunks.close()
+    return resp
+
+
+@web.middleware
+async def timing_middleware(request, handler):
+    request['started'] = time.perf_counter()
+    return await handler(request)
+
+
+async def _record_latency(request, response):
+    """Observe time to response headers for the routes served natively here."""
+    started = request.get('started')
+    route = request.match_info.route.resource
+    # Bridged routes are timed by the Flask app itself
+    if started is None or route is None or request.match_info.handler is handle_wsgi:
+        return
+    metrics.http_request_seconds.observe(
+        time.perf_counter() - started, route=route.canonical, method=request.method, status=response.status)
+
+
+async def _on_startup(app):
+    app[wsgi_executor_key] = ThreadPoolExecutor(max_workers=WSGI_WORKERS, thread_name_prefix='wsgi')
+    proxy.upstream_pool.start_health_checks()
+    proxy.start_cache_maintenance()
+
+
+async def _on_shutdown(app):
+    # Long-lived SSE streams would otherwise hold a graceful shutdown open
+    proxy.event_hub.close_all()
+
+
+async def _on_cleanup(app):
+    for task in list(app[pump_tasks_key]):
+        task.cancel()
+    for session in app[upstream_sessions_key].values():
+        await session.close()
+    app[wsgi_executor_key].shutdown(wait=False)
+
+
+def create_app(static_root=None):
+    """
+    Build the aiohttp app. With static_root, the front-end files in that
+    directory are served too (production mode, see serve.py).
+    """
+    app = web.Application(client_max_size=16 * 1024 * 1024, middlewares=[timing_middleware])
+    app[upstream_sessions_key] = {}
+    app[pump_tasks_key] = set()
+    app.router.add_route('POST', '/api/generate', handle_generate)
+    app.router.add_route('OPTIONS', '/api/generate', handle_generate)
+    app.router.add_get('/events', handle_events)
+    app.router.add_post('/notify', handle_notify)
+    app.router.add_get('/api/cache/export', handle_export)
+    app.router.add_post('/api/cache/import', handle_import)
+    if static_root:
+        app[static_files_key] = StaticFiles(static_root)
+        app.router.add_get('/', handle_static)
+        app.router.add_get(r'/{name:[^/]+\.(?:html|js|css|txt)}', handle_static)
+    app.router.add_route('*', '/{tail:.*}', handle_wsgi)
+    app.on_response_prepare.append(_record_latency)
+    app.on_startup.append(_on_startup)
+    app.on_shutdown.append(_on_shutdown)
+    app.on_cleanup.append(_on_cleanup)
+    return app
+
+
+if __name__ == '__main__':
+    web.run_app(create_app(), host=HOST, port=PORT)
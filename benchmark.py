@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Load-test the proxy with concurrent generate, cache and SSE workloads.
+
+Generations are sent to a mock Ollama (see mock_ollama.py) through the
+X-Ollama-Target header, so no GPU is needed. Everything the benchmark
+writes to the cache uses the model name BENCH_MODEL and is deleted at the
+end unless --keep is given.
+
+Reports count, errors, throughput and p50/p95/p99 latency per operation,
+so runs can be compared across commits and serving modes.
+
+Examples:
+    python3 mock_ollama.py &
+    python3 benchmark.py --proxy http://127.0.0.1:8001
+    python3 benchmark.py --generate 32 --dup-ratio 0.5 --cache 0 --sse 300 --duration 60
+    python3 benchmark.py --json results-async.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+import uuid
+
+import aiohttp
+
+PROXY_URL = 'http://127.0.0.1:8001'
+MOCK_URL = 'http://127.0.0.1:11435'
+BENCH_MODEL = 'benchmark-mock'
+CACHE_KEYS = 200
+SHARED_PROMPTS = 8
+NOTIFY_INTERVAL = 0.5
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank percentile
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[min(len(sorted_values), max(rank, 1)) - 1]
+
+
+class Recorder:
+    """Latency samples and error counts per operation name."""
+
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self.bytes = {}
+
+    def observe(self, op, seconds, nbytes=0):
+        self.samples.setdefault(op, []).append(seconds)
+        if nbytes:
+            self.bytes[op] = self.bytes.get(op, 0) + nbytes
+
+    def error(self, op):
+        self.errors[op] = self.errors.get(op, 0) + 1
+
+    def summary(self, elapsed):
+        report = {}
+        for op in sorted(set(self.samples) | set(self.errors)):
+            values = sorted(self.samples.get(op, []))
+            report[op] = {
+                'count': len(values),
+                'errors': self.errors.get(op, 0),
+                'per_second': round(len(values) / elapsed, 2) if elapsed else 0.0,
+                'p50_ms': round(percentile(values, 50) * 1000, 2),
+                'p95_ms': round(percentile(values, 95) * 1000, 2),
+                'p99_ms': round(percentile(values, 99) * 1000, 2),
+                'max_ms': round(values[-1] * 1000, 2) if values else 0.0,
+                'bytes': self.bytes.get(op, 0)
+            }
+        return report
+
+
+def guide_key(n):
+    return {
+        'task_name': f'bench-task-{n}',
+        'task_description': f'Benchmark task {n}',
+        'is_advanced': False,
+        'model_name': BENCH_MODEL
+    }
+
+
+async def generate_worker(session, args, recorder, deadline, used_keys):
+    headers = {'Content-Type': 'application/json', 'X-Ollama-Target': args.mock}
+    while time.monotonic() < deadline:
+        # Shared prompts overlap in time and exercise generation coalescing
+        if random.random() < args.dup_ratio:
+            n = f'shared-{random.randrange(SHARED_PROMPTS)}'
+        else:
+            n = uuid.uuid4().hex[:12]
+        key = guide_key(n)
+        used_keys.add(n)
+        body = {'model': BENCH_MODEL, 'prompt': f'Write a guide for task {n}', 'stream': True, 'cache_key': key}
+        started = time.perf_counter()
+        first_byte = None
+        received = 0
+        try:
+            async with session.post(f'{args.proxy}/api/generate', json=body, headers=headers) as resp:
+                if resp.status != 200:
+                    recorder.error('generate')
+                    await resp.read()
+                    continue
+                async for chunk in resp.content.iter_any():
+                    if first_byte is None:
+                        first_byte = time.perf_counter()
+                    received += len(chunk)
+            if first_byte is not None:
+                recorder.observe('generate.ttfb', first_byte - started)
+            recorder.observe('generate', time.perf_counter() - started, received)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            recorder.error('generate')
+
+
+async def cache_worker(session, args, recorder, deadline):
+    etags = {}
+    while time.monotonic() < deadline:
+        n = random.randrange(CACHE_KEYS)
+        key = guide_key(n)
+        roll = random.random()
+        started = time.perf_counter()
+        try:
+            if roll < 0.6:
+                # Conditional GET, the way the browser revalidates its copy
+                headers = {'Accept-Encoding': 'deflate'}
+                if n in etags:
+                    headers['If-None-Match'] = etags[n]
+                params = {k: str(v).lower() if isinstance(v, bool) else v for k, v in key.items()}
+                async with session.get(f'{args.proxy}/api/cache/guide', params=params, headers=headers) as resp:
+                    payload = await resp.read()
+                    if resp.status not in (200, 304, 404):
+                        raise aiohttp.ClientError(f'HTTP {resp.status}')
+                    if resp.headers.get('ETag'):
+                        etags[n] = resp.headers['ETag']
+                op = 'cache.guide.304' if resp.status == 304 else 'cache.guide'
+                recorder.observe(op, time.perf_counter() - started, len(payload))
+            elif roll < 0.9:
+                async with session.post(f'{args.proxy}/api/cache/get', json=key) as resp:
+                    payload = await resp.read()
+                    if resp.status != 200:
+                        raise aiohttp.ClientError(f'HTTP {resp.status}')
+                recorder.observe('cache.get', time.perf_counter() - started, len(payload))
+            else:
+                content = f'# Guide {n}\n\n' + ('Step text for the benchmark. ' * random.randint(20, 200))
+                async with session.post(f'{args.proxy}/api/cache/save', json={**key, 'guide_content': content}) as resp:
+                    await resp.read()
+                    if resp.status != 200:
+                        raise aiohttp.ClientError(f'HTTP {resp.status}')
+                recorder.observe('cache.save', time.perf_counter() - started)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            recorder.error('cache')
+
+
+async def sse_subscriber(session, args, recorder, ready):
+    """Follow /events and measure how long benchmark notifications take to arrive."""
+    try:
+        async with session.get(f'{args.proxy}/events', timeout=aiohttp.ClientTimeout(total=None, sock_read=None)) as resp:
+            ready.release()
+            async for line in resp.content:
+                text = line.decode('utf-8', 'replace').strip()
+                if text.startswith('data: bench '):
+                    sent = float(text.split(' ', 2)[2])
+                    recorder.observe('sse.delivery', time.time() - sent)
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+        recorder.error('sse.delivery')
+        ready.release()
+
+
+async def sse_publisher(session, args, recorder, deadline):
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            async with session.post(f'{args.proxy}/notify', data=f'bench {time.time():.6f}') as resp:
+                await resp.read()
+            recorder.observe('sse.notify', time.perf_counter() - started)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            recorder.error('sse.notify')
+        await asyncio.sleep(NOTIFY_INTERVAL)
+
+
+async def seed_cache(session, args):
+    for n in range(0, CACHE_KEYS, 2):
+        content = f'# Guide {n}\n\n' + 'Seeded benchmark guide text. ' * 100
+        async with session.post(f'{args.proxy}/api/cache/save', json={**guide_key(n), 'guide_content': content}) as resp:
+            await resp.read()
+
+
+async def cleanup(session, args, used_keys):
+    names = list(used_keys) + list(range(CACHE_KEYS))
+    for n in names:
+        try:
+            async with session.post(f'{args.proxy}/api/cache/delete', json=guide_key(n)) as resp:
+                await resp.read()
+        except aiohttp.ClientError:
+            pass
+
+
+async def run(args):
+    recorder = Recorder()
+    used_keys = set()
+    connector = aiohttp.TCPConnector(limit=0)
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        if args.cache:
+            await seed_cache(session, args)
+
+        # Connect SSE subscribers before the clock starts
+        ready = asyncio.Semaphore(0)
+        subscribers = [asyncio.create_task(sse_subscriber(session, args, recorder, ready)) for _ in range(args.sse)]
+        for _ in range(args.sse):
+            await ready.acquire()
+
+        started = time.monotonic()
+        deadline = started + args.duration
+        workers = [generate_worker(session, args, recorder, deadline, used_keys) for _ in range(args.generate)]
+        workers += [cache_worker(session, args, recorder, deadline) for _ in range(args.cache)]
+        if args.sse:
+            workers.append(sse_publisher(session, args, recorder, deadline))
+        await asyncio.gather(*workers)
+        elapsed = time.monotonic() - started
+
+        await asyncio.sleep(NOTIFY_INTERVAL)
+        for task in subscribers:
+            task.cancel()
+        await asyncio.gather(*subscribers, return_exceptions=True)
+
+        if not args.keep:
+            await cleanup(session, args, used_keys)
+    return recorder.summary(elapsed), elapsed
+
+
+def print_report(report, elapsed, args):
+    print(f"\nProxy {args.proxy}  |  {elapsed:.1f}s  |  generate x{args.generate} "
+          f"(dup {args.dup_ratio:.0%}), cache x{args.cache}, sse x{args.sse}")
+    print(f"{'operation':<18}{'count':>8}{'err':>6}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    print('-' * 81)
+    for op, row in report.items():
+        print(f"{op:<18}{row['count']:>8}{row['errors']:>6}{row['per_second']:>9.1f}"
+              f"{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}{row['max_ms']:>10.1f}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark the GroupApp proxy against a mock Ollama.')
+    parser.add_argument('--proxy', default=PROXY_URL, help=f'Proxy URL (default: {PROXY_URL})')
+    parser.add_argument('--mock', default=MOCK_URL, help=f'Mock Ollama URL sent as X-Ollama-Target (default: {MOCK_URL})')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to run (default: 30)')
+    parser.add_argument('--generate', type=int, default=8, help='Concurrent generate clients (default: 8)')
+    parser.add_argument('--dup-ratio', type=float, default=0.25,
+                        help='Fraction of generations using a shared prompt (default: 0.25)')
+    parser.add_argument('--cache', type=int, default=8, help='Concurrent cache clients (default: 8)')
+    parser.add_argument('--sse', type=int, default=50, help='Idle SSE subscribers (default: 50)')
+    parser.add_argument('--timeout', type=float, default=300, help='Per-request timeout in seconds')
+    parser.add_argument('--keep', action='store_true', help=f'Keep the {BENCH_MODEL} guides afterwards')
+    parser.add_argument('--json', help='Also write the report to this file')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    args.proxy = args.proxy.rstrip('/')
+    args.mock = args.mock.rstrip('/')
+    report, elapsed = asyncio.run(run(args))
+    print_report(report, elapsed, args)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'elapsed': elapsed, 'args': vars(args), 'results': report}, f, indent=2)
+    return 1 if any(row['errors'] for row in report.values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,276 @@
+"""
+Publish/subscribe hub behind /events and /notify.
+
+Messages are either plain strings (sent as bare data frames, e.g. 'reload')
+or (event_type, payload) pairs sent as named SSE events with a JSON body.
+Every subscriber gets a small bounded buffer instead of an unbounded queue.
+Messages with the same coalesce key collapse into one pending entry that
+carries the latest payload, and a subscriber that falls too far behind has its
+buffer replaced by a single resync message. Idle streams wake up every
+HEARTBEAT_SECONDS to send a comment frame, which is how dead peers are
+noticed and dropped. Subscribers can wait from a thread (Flask mode) or a
+coroutine (async mode), so idle async subscribers cost no thread at all.
+
+With several worker processes (serve.py) each worker's hub attaches a
+SocketRelay: publishes go to the master process, which echoes them to every
+worker for local delivery, and subscriber counts are shared the same way.
+Other per-process state (such as the proxy's in-memory guide cache) is kept
+in step with relay_op frames, handled by add_relay_handler callbacks.
+"""
+import asyncio
+import json
+import os
+import signal
+import threading
+from collections import deque
+
+DEFAULT_BUFFER_SIZE = 64
+HEARTBEAT_SECONDS = 15
+RESYNC_MESSAGE = 'reload'
+HEARTBEAT_FRAME = ': ping\n\n'
+
+
+def format_frame(message):
+    """Encode one message as an SSE frame (named event when it is a pair)."""
+    event = None
+    if isinstance(message, tuple):
+        event, payload = message
+        message = json.dumps(payload, separators=(',', ':'))
+    lines = str(message).splitlines() or ['']
+    frame = f'event: {event}\n' if event else ''
+    return frame + ''.join(f'data: {line}\n' for line in lines) + '\n'
+
+
+class Subscriber:
+    """One /events connection: a bounded, coalescing message buffer."""
+
+    def __init__(self, hub, buffer_size):
+        self.hub = hub
+        self.buffer_size = buffer_size
+        self.pending = deque()
+        self.closed = False
+        self._cond = threading.Condition()
+        self._async_waiters = set()
+
+    def _notify_locked(self):
+        self._cond.notify_all()
+        for loop, event in list(self._async_waiters):
+            loop.call_soon_threadsafe(event.set)
+
+    def push(self, message, coalesce_key=None):
+        """
+        Queue a message without ever blocking the publisher.
+        Returns: 'queued', 'coalesced', 'overflow' or 'closed'.
+        """
+        with self._cond:
+            if self.closed:
+                return 'closed'
+            if coalesce_key is not None:
+                for index, (key, _) in enumerate(self.pending):
+                    if key == coalesce_key:
+                        # Keep the queue position, deliver the newest payload
+                        self.pending[index] = (key, message)
+                        return 'coalesced'
+            outcome = 'queued'
+            if len(self.pending) >= self.buffer_size:
+                # Too far behind to replay: tell the client to resync instead
+                self.pending.clear()
+                self.pending.append((RESYNC_MESSAGE, RESYNC_MESSAGE))
+                outcome = 'overflow'
+                if coalesce_key == RESYNC_MESSAGE:
+                    self._notify_locked()
+                    return outcome
+            self.pending.append((coalesce_key, message))
+            self._notify_locked()
+            return outcome
+
+    def _drain_locked(self):
+        messages = [message for _, message in self.pending]
+        self.pending.clear()
+        return messages
+
+    def wait(self, timeout=HEARTBEAT_SECONDS):
+        """Block until messages arrive or timeout passes. Returns them (maybe [])."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.pending or self.closed, timeout)
+            return self._drain_locked()
+
+    async def wait_async(self, timeout=HEARTBEAT_SECONDS):
+        """Coroutine counterpart of wait for the aiohttp serving mode."""
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        waiter = (loop, event)
+        with self._cond:
+            if self.pending or self.closed:
+                return self._drain_locked()
+            self._async_waiters.add(waiter)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._cond:
+                self._async_waiters.discard(waiter)
+        with self._cond:
+            return self._drain_locked()
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._notify_locked()
+
+
+def _as_tuple(value):
+    """Undo JSON's tuple-to-list conversion (coalesce keys must be hashable)."""
+    if isinstance(value, list):
+        return tuple(_as_tuple(item) for item in value)
+    return value
+
+
+def encode_relay_frame(frame):
+    return (json.dumps(frame, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+class SocketRelay:
+    """
+    Worker side of the cross-process event channel: one line of JSON per
+    frame over a socket to the serve.py master.
+    """
+
+    def __init__(self, sock, worker_id=None):
+        self.sock = sock
+        self.worker_id = worker_id or os.getpid()
+        self._send_lock = threading.Lock()
+        self._thread = None
+
+    def send(self, frame):
+        data = encode_relay_frame(dict(frame, worker=self.worker_id))
+        with self._send_lock:
+            try:
+                self.sock.sendall(data)
+            except OSError as e:
+                print(f"Warning: event relay send failed: {e}")
+
+    def start(self, hub):
+        """Feed frames from the master into hub in a daemon thread."""
+        self._thread = threading.Thread(target=self._read_loop, args=(hub,), daemon=True)
+        self._thread.start()
+
+    def _read_loop(self, hub):
+        with self.sock.makefile('rb') as stream:
+            for line in stream:
+                try:
+                    frame = json.loads(line)
+                except ValueError:
+                    continue
+                hub.handle_relay_frame(frame)
+        # The master is gone: shut this worker down gracefully too
+        os.kill(os.getpid(), signal.SIGTERM)
+
+
+class EventHub:
+    """Fan-out of /notify messages to every connected subscriber."""
+
+    def __init__(self, buffer_size=DEFAULT_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._relay = None
+        # Subscriber counts of the other worker processes, by worker id
+        self._peer_subscribers = {}
+        self._relay_handlers = {}
+        self.published = 0
+        self.coalesced = 0
+        self.overflows = 0
+
+    def attach_relay(self, relay):
+        """Route publishes through relay so every worker process delivers them."""
+        self._relay = relay
+        relay.start(self)
+        self._report_subscribers()
+
+    def _report_subscribers(self):
+        if self._relay is not None:
+            with self._lock:
+                count = len(self._subscribers)
+            self._relay.send({'op': 'subscribers', 'count': count})
+
+    def subscribe(self):
+        subscriber = Subscriber(self, self.buffer_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        self._report_subscribers()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+        subscriber.close()
+        self._report_subscribers()
+
+    def close_all(self):
+        """End every subscription (graceful shutdown); clients reconnect elsewhere."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.close()
+
+    def publish(self, message, coalesce_key=None):
+        """Deliver message to all subscribers (in every worker when relayed). Never blocks on a slow client."""
+        if self._relay is not None:
+            self._relay.send({'op': 'publish', 'message': message, 'key': coalesce_key})
+            return
+        self.deliver(message, coalesce_key)
+
+    def add_relay_handler(self, op, handler):
+        """Call handler(frame) for relay_op frames of this op sent by other workers."""
+        self._relay_handlers[op] = handler
+
+    def relay_op(self, frame):
+        """Send frame (a dict with an 'op') to the other worker processes; no-op without a relay."""
+        if self._relay is not None:
+            self._relay.send(frame)
+
+    def handle_relay_frame(self, frame):
+        """Apply one frame echoed by the master (see serve.py)."""
+        op = frame.get('op')
+        if op == 'publish':
+            message = frame.get('message')
+            if isinstance(message, list):
+                message = tuple(message)
+            self.deliver(message, _as_tuple(frame.get('key')))
+        elif op == 'subscribers' and frame.get('worker') != self._relay.worker_id:
+            with self._lock:
+                if frame.get('count'):
+                    self._peer_subscribers[frame.get('worker')] = frame['count']
+                else:
+                    self._peer_subscribers.pop(frame.get('worker'), None)
+        elif op in self._relay_handlers and frame.get('worker') != self._relay.worker_id:
+            self._relay_handlers[op](frame)
+
+    def deliver(self, message, coalesce_key=None):
+        """Push message to this process's subscribers."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self.published += 1
+        coalesced = overflows = 0
+        for subscriber in subscribers:
+            outcome = subscriber.push(message, coalesce_key)
+            if outcome == 'coalesced':
+                coalesced += 1
+            elif outcome == 'overflow':
+                overflows += 1
+        with self._lock:
+            self.coalesced += coalesced
+            self.overflows += overflows
+        return len(subscribers)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers) + sum(self._peer_subscribers.values()),
+                'local_subscribers': len(self._subscribers),
+                'published': self.published,
+                'coalesced': self.coalesced,
+                'overflows': self.overflows
+            }
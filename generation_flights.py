@@ -0,0 +1,224 @@
+"""
+Single-flight deduplication for /api/generate.
+
+Identical generations (same model, prompt and options) that overlap in time
+share one upstream call. The first request starts a flight that pumps the
+Ollama stream into a chunk buffer; later requests attach to it and replay
+the already-emitted prefix before following the live tail. Subscribers can
+be plain threads (Flask mode) or coroutines (async mode).
+"""
+import asyncio
+import hashlib
+import json
+import threading
+import time
+import uuid
+
+
+def generation_key(body, template=None):
+    """
+    Build the coalescing key for a raw /api/generate request body.
+    template is the 'id@version' of the prompt template the body was
+    rendered from, if any. Returns a unique key when the body is not a
+    JSON object, so such requests never share a flight.
+    """
+    try:
+        payload = json.loads(body)
+    except (TypeError, ValueError):
+        payload = None
+    if not isinstance(payload, dict):
+        return ('uncoalesced', uuid.uuid4().hex)
+
+    payload = dict(payload)
+    model = payload.pop('model', None)
+    payload['stream'] = payload.get('stream', True)
+    if template:
+        payload['prompt_template'] = template
+    digest = hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+    return (model, digest)
+
+
+class GenerationFlight:
+    """Buffered upstream stream that any number of subscribers can follow."""
+
+    def __init__(self, key):
+        self.key = key
+        self.status = None
+        self.content_type = None
+        self.error = None
+        self.done = False
+        self.chunks = []
+        self.subscribers = 0
+        self.cache_keys = set()
+        # Set once the final save took cache_keys; later keys are refused
+        self.cache_keys_taken = False
+        # Scheduler ticket of the leader, so joiners can raise its priority
+        # (set by FlightRegistry.join before the flight can be joined)
+        self.ticket = None
+        # Partial-text checkpoints: when the last one was taken, and how much
+        # of the stream was replayed from an earlier checkpoint
+        self.checkpointed_at = time.monotonic()
+        self.resumed_chars = 0
+        self._cond = threading.Condition()
+        self._async_waiters = set()
+
+    def _notify_locked(self):
+        self._cond.notify_all()
+        for loop, event in list(self._async_waiters):
+            loop.call_soon_threadsafe(event.set)
+
+    def start(self, status, content_type):
+        """Record the upstream status line; releases waiting subscribers."""
+        with self._cond:
+            self.status = status
+            self.content_type = content_type
+            self._notify_locked()
+
+    def publish(self, chunk):
+        with self._cond:
+            self.chunks.append(chunk)
+            self._notify_locked()
+
+    def finish(self, error=None):
+        with self._cond:
+            self.error = error
+            self.done = True
+            self._notify_locked()
+
+    def add_cache_key(self, key):
+        """
+        Ask for the finished guide to be saved under key (write-through).
+        Returns False once the keys were taken for the final save: the
+        stream is complete by then and the caller must save key itself.
+        """
+        with self._cond:
+            if self.cache_keys_taken:
+                return False
+            self.cache_keys.add(key)
+            return True
+
+    def pending_cache_keys(self):
+        with self._cond:
+            return set(self.cache_keys)
+
+    def take_cache_keys(self):
+        """Hand the cache keys to the final save; later add_cache_key calls are refused."""
+        with self._cond:
+            keys, self.cache_keys = self.cache_keys, set()
+            self.cache_keys_taken = True
+            return keys
+
+    def _started(self):
+        return self.status is not None or self.done
+
+    def wait_started(self, timeout=None):
+        """Block until the upstream responded. Returns False if it failed first."""
+        with self._cond:
+            self._cond.wait_for(self._started, timeout)
+            return self.status is not None
+
+    def iter_chunks(self):
+        """Yield every chunk from the start of the stream (blocking)."""
+        with self._cond:
+            self.subscribers += 1
+        try:
+            index = 0
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: index < len(self.chunks) or self.done)
+                    pending = self.chunks[index:]
+                    index += len(pending)
+                    finished = self.done and index >= len(self.chunks)
+                for chunk in pending:
+                    yield chunk
+                if finished:
+                    return
+        finally:
+            with self._cond:
+                self.subscribers -= 1
+
+    async def _wait_async(self, ready):
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        waiter = (loop, event)
+        with self._cond:
+            self._async_waiters.add(waiter)
+        try:
+            while True:
+                with self._cond:
+                    if ready():
+                        return
+                    event.clear()
+                await event.wait()
+        finally:
+            with self._cond:
+                self._async_waiters.discard(waiter)
+
+    async def wait_started_async(self):
+        await self._wait_async(self._started)
+        return self.status is not None
+
+    async def aiter_chunks(self):
+        """Async counterpart of iter_chunks for the aiohttp serving mode."""
+        with self._cond:
+            self.subscribers += 1
+        try:
+            index = 0
+            while True:
+                await self._wait_async(lambda: index < len(self.chunks) or self.done)
+                with self._cond:
+                    pending = self.chunks[index:]
+                    index += len(pending)
+                    finished = self.done and index >= len(self.chunks)
+                for chunk in pending:
+                    yield chunk
+                if finished:
+                    return
+        finally:
+            with self._cond:
+                self.subscribers -= 1
+
+
+class FlightRegistry:
+    """Tracks in-flight generations by key."""
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.started = 0
+        self.coalesced = 0
+
+    def join(self, key, submit=None):
+        """
+        Attach to the flight for key, creating it if needed.
+        A new flight's ticket comes from submit() before anyone else can
+        join it, so followers always find flight.ticket set; if submit
+        raises, no flight is created.
+        Returns: (flight, is_leader). The leader must start the upstream call.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                return flight, False
+            flight = GenerationFlight(key)
+            if submit is not None:
+                flight.ticket = submit()
+            self._flights[key] = flight
+            self.started += 1
+            return flight, True
+
+    def finish(self, flight, error=None):
+        """Retire a flight so later identical requests start a fresh one."""
+        with self._lock:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+        flight.finish(error)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'in_flight': len(self._flights),
+                'started': self.started,
+                'coalesced': self.coalesced
+            }
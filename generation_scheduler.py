@@ -0,0 +1,368 @@
+"""
+Priority admission control for upstream generations.
+
+Every new flight gets a ticket in one of three classes: 'interactive'
+(Ask Ollama, regenerate clicks), 'assignment' (guide fan-out for the
+current assignments) and 'background' (populators). A ticket is admitted
+once a backend serving its model has a free slot. Tickets are served in
+class order: while a higher-class ticket waits for a backend, no lower-class
+ticket takes a slot on that backend (other backends keep serving whatever
+they can), and background work may only ever hold part of a backend's
+slots. Waiting works from threads (Flask mode) or coroutines (async mode).
+
+Several processes (serve.py workers) can share the per-backend limits
+through SharedSlots: every slot is a lock file, so the limits hold for the
+whole server rather than per process.
+"""
+import asyncio
+import fcntl
+import hashlib
+import itertools
+import os
+import threading
+import time
+
+PRIORITIES = ('interactive', 'assignment', 'background')
+DEFAULT_PRIORITY = 'interactive'
+
+# Concurrent generations per backend (Ollama serves a few at a time on one GPU)
+SLOTS_PER_BACKEND = 2
+# Background fill never takes the last slot(s) of a backend
+BACKGROUND_SLOTS_PER_BACKEND = 1
+# Admission control: tickets beyond this per class are refused outright
+MAX_WAITING = {'interactive': 64, 'assignment': 256, 'background': 64}
+REDISPATCH_SECONDS = 1.0
+
+
+def normalize_priority(value, default=DEFAULT_PRIORITY):
+    value = (value or '').strip().lower()
+    return value if value in PRIORITIES else default
+
+
+class QueueFull(Exception):
+    """Raised by submit() when a priority class has too many waiting tickets."""
+
+
+class SharedSlots:
+    """
+    Backend slots shared between processes: slot i of a backend is held by
+    whoever has an exclusive flock on its lock file in directory. The kernel
+    drops the lock when the holder closes it or dies.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, backend, index):
+        digest = hashlib.sha1(backend.url.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.directory, f'{digest}-{index}.lock')
+
+    def acquire(self, backend, indexes):
+        """Lock the first free slot among indexes. Returns its handle, or None when all are held."""
+        for index in indexes:
+            fd = os.open(self._path(backend, index), os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                os.close(fd)
+        return None
+
+    def release(self, handle):
+        os.close(handle)
+
+
+class Ticket:
+    """One flight waiting for, or holding, an upstream slot."""
+
+    def __init__(self, seq, model, priority, preferred=None, client_id=None):
+        self.seq = seq
+        self.model = model
+        self.priority = priority
+        self.preferred = preferred
+        self.client_ids = {client_id} if client_id else set()
+        self.enqueued_at = time.time()
+        self.admitted_at = None
+        self.backend = None
+        # SharedSlots handle of the slot held on backend, if slots are shared
+        self.slot = None
+        self.cancelled = False
+
+    @property
+    def rank(self):
+        return PRIORITIES.index(self.priority)
+
+
+class GenerationScheduler:
+    """Priority queue in front of the upstream pool."""
+
+    def __init__(self, pool, slots_per_backend=SLOTS_PER_BACKEND,
+                 background_slots=BACKGROUND_SLOTS_PER_BACKEND):
+        self.pool = pool
+        self.slots_per_backend = slots_per_backend
+        self.background_slots = background_slots
+        self.shared_slots = None
+        self._cond = threading.Condition()
+        self._async_waiters = set()
+        self._waiting = []
+        self._running = {}
+        self._seq = itertools.count()
+        self.admitted = {priority: 0 for priority in PRIORITIES}
+        self.rejected = {priority: 0 for priority in PRIORITIES}
+
+    def _notify_locked(self):
+        self._cond.notify_all()
+        for loop, event in list(self._async_waiters):
+            loop.call_soon_threadsafe(event.set)
+
+    def _in_use_locked(self, backend, priority=None):
+        tickets = self._running.get(backend, ())
+        if priority is None:
+            return len(tickets)
+        return sum(1 for t in tickets if t.priority == priority)
+
+    def _has_slot_locked(self, ticket, backend):
+        if self._in_use_locked(backend) >= self.slots_per_backend:
+            return False
+        if ticket.priority == 'background' and self._in_use_locked(backend, 'background') >= self.background_slots:
+            return False
+        return True
+
+    def _claim_slot_locked(self, ticket, backend):
+        """
+        Take ticket's slot on backend in SharedSlots. Background may only use
+        the first background_slots slot files; other classes try the rest
+        first so those stay free for background work.
+        """
+        if self.shared_slots is None:
+            return True
+        if ticket.priority == 'background':
+            indexes = range(self.background_slots)
+        else:
+            indexes = reversed(range(self.slots_per_backend))
+        slot = self.shared_slots.acquire(backend, indexes)
+        if slot is None:
+            return False
+        self._release_slot_locked(ticket)
+        ticket.slot = slot
+        return True
+
+    def _release_slot_locked(self, ticket):
+        if ticket.slot is not None:
+            self.shared_slots.release(ticket.slot)
+            ticket.slot = None
+
+    def _candidates_locked(self, ticket):
+        candidates = self.pool.plan(ticket.model, ticket.preferred)
+        return [b for b in candidates if b.healthy] or candidates
+
+    def _claim_backend_locked(self, ticket, reserved=()):
+        """Take a slot for ticket on the first candidate backend that has one free."""
+        for backend in self._candidates_locked(ticket):
+            if backend in reserved or not self._has_slot_locked(ticket, backend):
+                continue
+            if self._claim_slot_locked(ticket, backend):
+                return backend
+        return None
+
+    def _dispatch_locked(self):
+        """
+        Admit waiting tickets in class order. A blocked ticket reserves the
+        backends it could run on against lower classes only, so they still
+        start on backends it cannot use.
+        """
+        self._waiting.sort(key=lambda t: (t.rank, t.seq))
+        # Backends wanted by blocked tickets, by the class that wants them
+        reserved = {}
+        admitted_any = False
+        for ticket in list(self._waiting):
+            held = set()
+            for rank, backends in reserved.items():
+                if rank < ticket.rank:
+                    held |= backends
+            backend = self._claim_backend_locked(ticket, held)
+            if backend is None:
+                reserved.setdefault(ticket.rank, set()).update(self._candidates_locked(ticket))
+                continue
+            self._waiting.remove(ticket)
+            ticket.backend = backend
+            ticket.admitted_at = time.time()
+            self._running.setdefault(backend, []).append(ticket)
+            self.admitted[ticket.priority] += 1
+            admitted_any = True
+        if admitted_any:
+            self._notify_locked()
+
+    def submit(self, model, priority=DEFAULT_PRIORITY, preferred=None, client_id=None):
+        """Queue a flight for admission. Raises QueueFull when its class is saturated."""
+        priority = normalize_priority(priority)
+        with self._cond:
+            waiting = sum(1 for t in self._waiting if t.priority == priority)
+            if waiting >= MAX_WAITING[priority]:
+                self.rejected[priority] += 1
+                raise QueueFull(f'{priority} queue is full ({waiting} waiting)')
+            ticket = Ticket(next(self._seq), model, priority, preferred, client_id)
+            self._waiting.append(ticket)
+            self._dispatch_locked()
+            return ticket
+
+    def promote(self, ticket, priority, client_id=None):
+        """Raise a waiting ticket's class (e.g. a student joined a background flight)."""
+        priority = normalize_priority(priority)
+        with self._cond:
+            if client_id:
+                ticket.client_ids.add(client_id)
+            if PRIORITIES.index(priority) < ticket.rank:
+                ticket.priority = priority
+                if ticket.backend is None:
+                    self._dispatch_locked()
+
+    def wait(self, ticket):
+        """Block until ticket is admitted. Returns its backend, or None if cancelled."""
+        with self._cond:
+            while ticket.backend is None and not ticket.cancelled:
+                # Health changes (and slots freed by other processes) are not
+                # signalled, so re-check periodically
+                self._cond.wait(REDISPATCH_SECONDS)
+                self._dispatch_locked()
+            return ticket.backend
+
+    async def wait_async(self, ticket):
+        """Coroutine counterpart of wait for the aiohttp serving mode."""
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        waiter = (loop, event)
+        with self._cond:
+            self._async_waiters.add(waiter)
+        try:
+            while True:
+                with self._cond:
+                    if ticket.backend is not None or ticket.cancelled:
+                        return ticket.backend
+                    event.clear()
+                try:
+                    await asyncio.wait_for(event.wait(), REDISPATCH_SECONDS)
+                except asyncio.TimeoutError:
+                    with self._cond:
+                        self._dispatch_locked()
+        finally:
+            with self._cond:
+                self._async_waiters.discard(waiter)
+
+    def move(self, ticket, backend):
+        """
+        Move an admitted ticket's slot to backend (upstream failover).
+        Returns False, leaving the ticket where it is, when backend has no free slot.
+        """
+        with self._cond:
+            if ticket.backend is backend:
+                return True
+            if ticket.backend is None or not self._has_slot_locked(ticket, backend):
+                return False
+            if not self._claim_slot_locked(ticket, backend):
+                return False
+            running = self._running.get(ticket.backend, [])
+            if ticket in running:
+                running.remove(ticket)
+            if not running:
+                self._running.pop(ticket.backend, None)
+            ticket.backend = backend
+            self._running.setdefault(backend, []).append(ticket)
+            self._dispatch_locked()
+            return True
+
+    def attempts(self, ticket):
+        """
+        Backends to try for an admitted ticket's upstream call, in order:
+        the admitted one, then failover candidates, each only once the
+        ticket's slot has moved there. Yields (backend, has_fallback); the
+        caller does the I/O and asks for the next one on failure. When the
+        remaining backends are all full the ticket is queued again and
+        (None, True) is yielded: wait for admission, then keep iterating.
+        Shared by both serving modes.
+        """
+        admitted = ticket.backend
+        tried = set()
+        while True:
+            candidates = self.pool.plan(ticket.model, ticket.preferred)
+            if admitted is not None:
+                candidates = [admitted] + [b for b in candidates if b is not admitted]
+            untried = [b for b in candidates if b not in tried]
+            busy = False
+            for index, backend in enumerate(untried):
+                # Failing over takes a slot on the new backend
+                if backend is not admitted and not self.move(ticket, backend):
+                    busy = True
+                    continue
+                tried.add(backend)
+                yield backend, index < len(untried) - 1
+            if not busy:
+                return
+            # The remaining backends are full: queue again for one of their slots
+            self.requeue(ticket)
+            yield None, True
+            admitted = ticket.backend
+            if admitted is None or admitted in tried:
+                return
+
+    def requeue(self, ticket):
+        """Give up an admitted ticket's slot and queue it again in its old place (failover with no free slot)."""
+        with self._cond:
+            if ticket.backend is None:
+                return
+            running = self._running.get(ticket.backend, [])
+            if ticket in running:
+                running.remove(ticket)
+            if not running:
+                self._running.pop(ticket.backend, None)
+            self._release_slot_locked(ticket)
+            ticket.backend = None
+            ticket.admitted_at = None
+            self._waiting.append(ticket)
+            self._dispatch_locked()
+            self._notify_locked()
+
+    def release(self, ticket):
+        """Give back the ticket's slot (or drop it from the queue) and admit the next one."""
+        with self._cond:
+            if ticket.backend is None:
+                ticket.cancelled = True
+                if ticket in self._waiting:
+                    self._waiting.remove(ticket)
+            else:
+                running = self._running.get(ticket.backend, [])
+                if ticket in running:
+                    running.remove(ticket)
+                if not running:
+                    self._running.pop(ticket.backend, None)
+                self._release_slot_locked(ticket)
+            self._dispatch_locked()
+            self._notify_locked()
+
+    def status(self, client_id=None):
+        """Queue depth per class, slot use per backend and every waiting ticket's position."""
+        now = time.time()
+        with self._cond:
+            waiting = sorted(self._waiting, key=lambda t: (t.rank, t.seq))
+            entries = [{
+                'position': index + 1,
+                'priority': t.priority,
+                'model': t.model,
+                'waited_seconds': round(now - t.enqueued_at, 1)
+            } for index, t in enumerate(waiting)]
+            status = {
+                'depth': {p: sum(1 for t in waiting if t.priority == p) for p in PRIORITIES},
+                'running': {p: sum(1 for ts in self._running.values() for t in ts if t.priority == p) for p in PRIORITIES},
+                'slots': {
+                    backend.url: {'in_use': len(tickets), 'limit': self.slots_per_backend}
+                    for backend, tickets in self._running.items()
+                },
+                'admitted': dict(self.admitted),
+                'rejected': dict(self.rejected),
+                'waiting': entries
+            }
+            if client_id:
+                mine = [e for e, t in zip(entries, waiting) if client_id in t.client_ids]
+                running = any(client_id in t.client_ids for ts in self._running.values() for t in ts)
+                status['request'] = mine[0] if mine else {'position': 0, 'running': running}
+            return status
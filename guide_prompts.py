@@ -0,0 +1,478 @@
+"""
+Prompt templates for generated guides, shared by the proxy, app.js and the
+cache populator.
+Each function takes a task dict with 'name' and 'description' keys.
+
+Clients ask for a template by id (PROMPT_TEMPLATES) and the proxy renders
+it, so every client sends the same prompt for the same guide. Bump a
+template's version whenever its text changes: the version is part of the
+generation key, so requests for the old and new text are never coalesced
+and a checkpoint of the old text is never resumed with the new one.
+Everything that varies per task comes at the end of a prompt, so Ollama
+can reuse the evaluated prefix from one guide to the next.
+"""
+
+NO_DESCRIPTION = '(no detailed description provided)'
+
+
+def describe(task):
+    description = (task.get('description') or '').strip()
+    return description or NO_DESCRIPTION
+
+
+def normal_guide_prompt(task):
+    """Standard step-by-step KB article."""
+    return f"""You are a technical documentation expert. Create a step-by-step KB (Knowledge Base) article to help complete the task below.
+
+Format your response EXACTLY like this structure:
+## Overview
+[Brief 1-2 sentence summary of what will be accomplished]
+
+## Prerequisites
+- [List any required tools, access, or knowledge]
+
+## Steps
+### Step 1: [Action Title]
+[Clear instruction on what to do]
+
+### Step 2: [Action Title]
+[Clear instruction on what to do]
+
+[Continue with numbered steps as needed]
+
+## Verification
+[How to confirm the task was completed successfully]
+
+## Additional Resources
+- [Link to documentation or tutorial if applicable]
+
+Task: {task['name']}
+Task details: {describe(task)}
+
+Keep it concise (10-15 steps maximum). Include command examples in code blocks where relevant."""
+
+
+def advanced_guide_prompt(task):
+    """ADVANCED KB article, roughly twice the length of a standard guide."""
+    return f"""You are an expert-level technical documentation specialist and security professional. Create a comprehensive, ADVANCED KB (Knowledge Base) article to help complete the task below. This guide should be TWICE the length of a standard guide and include expert-level knowledge, security considerations, advanced techniques, and deep technical details.
+
+Format your response EXACTLY like this structure:
+## Overview
+[Comprehensive 3-4 sentence summary covering the technical context, security implications, and what will be accomplished]
+
+## Prerequisites
+- [Detailed list of required tools with specific versions]
+- [Required permissions and access levels]
+- [Advanced knowledge requirements and technical background needed]
+- [Security considerations before starting]
+
+## Technical Background
+[2-3 paragraphs explaining the underlying technology, protocols, or concepts involved at an expert level]
+
+## Steps
+### Step 1: [Detailed Action Title]
+[In-depth instruction with technical reasoning, security implications, and best practices]
+**Security Note:** [Security considerations for this step]
+**Advanced Tip:** [Expert-level optimization or alternative approach]
+
+### Step 2: [Detailed Action Title]
+[In-depth instruction with technical reasoning, security implications, and best practices]
+**Security Note:** [Security considerations for this step]
+**Advanced Tip:** [Expert-level optimization or alternative approach]
+
+[Continue with 20-30 detailed steps as needed for comprehensive coverage]
+
+## Verification and Validation
+### Verification Steps
+[Detailed steps to confirm successful completion]
+
+### Troubleshooting Common Issues
+[List potential problems and expert-level solutions]
+
+### Performance Optimization
+[How to optimize the implementation]
+
+## Security Hardening
+[Additional security measures and hardening techniques specific to this task]
+
+## Advanced Scenarios
+[Complex use cases and edge cases with solutions]
+
+## Additional Resources
+- [Links to advanced documentation, RFCs, or technical papers]
+- [Industry best practices and compliance standards]
+- [Advanced tutorials and expert-level resources]
+
+## Expert Notes
+[Additional insights, caveats, or advanced considerations that experts should know]
+
+Task: {task['name']}
+Task details: {describe(task)}
+
+Make this guide comprehensive and detailed (20-30+ steps). Include detailed command examples with explanations, configuration files, security best practices, and advanced techniques throughout."""
+
+
+def project_guide_prompt(project):
+    """Medium-style long-form tutorial for a project from projects.txt."""
+    return f"""You are a professional technical writer creating an in-depth, engaging tutorial guide in the style of popular Medium articles. Write in a conversational yet authoritative tone, using personal pronouns (you, we, I), storytelling elements, and practical examples. Make the content engaging, accessible, and comprehensive.
+
+Format your response EXACTLY like this structure, with [Project Name] standing for the project given at the end:
+
+# [Project Name]: A Complete Guide
+
+## Introduction
+
+Hey there! Today we're going to dive deep into [Project Name]. Whether you're just getting started or looking to strengthen your understanding, this guide will walk you through everything you need to know.
+
+**What we'll cover in this guide:**
+- [Key topic 1]
+- [Key topic 2]
+- [Key topic 3]
+- [Continue with 5-8 main topics]
+
+**By the end of this tutorial, you'll be able to:**
+- [Specific outcome 1]
+- [Specific outcome 2]
+- [Continue with 5-7 outcomes]
+
+**Time to complete:** [Estimated time]
+**Difficulty level:** [Beginner/Intermediate/Advanced]
+
+---
+
+## Why This Matters
+
+Before we jump into the technical details, let's talk about why you should care about this.
+
+[Write 3-4 engaging paragraphs explaining:
+- The real-world problem this solves
+- Why professionals use this technology
+- How it fits into modern development
+- The career/skill benefits of learning this]
+
+**Real-world use case:** [Describe a concrete scenario where this is used in production]
+
+---
+
+## What You'll Need
+
+Here's what you should have ready before we begin:
+
+**Required:**
+- [Tool/software 1] - [Why you need it]
+- [Tool/software 2] - [Why you need it]
+- [Continue...]
+
+**Nice to have:**
+- [Optional tool 1]
+- [Optional tool 2]
+
+**Knowledge prerequisites:**
+You should be comfortable with [list basics]. Don't worry if you're not an expert—I'll explain everything as we go!
+
+---
+
+## Understanding the Fundamentals
+
+Let's start by understanding what we're actually working with here.
+
+### What is [Technology/Concept]?
+
+[Write 2-3 conversational paragraphs explaining the concept in plain English, using everyday analogies]
+
+Think of it like this: [Simple analogy that makes it relatable]
+
+### How Does It Work?
+
+Here's the interesting part. [Explain the underlying mechanism in 3-4 paragraphs, breaking down complexity into digestible pieces]
+
+**The key components are:**
+1. **[Component 1]** - [What it does in simple terms]
+2. **[Component 2]** - [What it does in simple terms]
+3. **[Component 3]** - [What it does in simple terms]
+
+### Why We Build It This Way
+
+You might be wondering why we don't just [alternative approach]. Good question! [Explain the reasoning behind the design choices]
+
+---
+
+## Let's Get Started: Part 1 - [Section Name]
+
+Alright, enough theory—let's build something!
+
+### Step 1: [First Action]
+
+First things first, we need to [action description]. Here's how:
+
+```bash
+# [Command with descriptive comment]
+[actual command]
+```
+
+**What's happening here?**
+When you run this command, [explain what happens step by step]. The `[flag/option]` tells it to [explanation], which is important because [reason].
+
+**You should see:**
+```
+[Expected output]
+```
+
+If you see something different, don't panic! [Common variation and what it means]
+
+### Step 2: [Next Action]
+
+Now that we've got [previous step result], let's [next action]. This is where things get interesting.
+
+```python
+# [Descriptive comment explaining what this code does]
+[code example with inline comments]
+```
+
+**Let's break this down line by line:**
+
+**Line 1:** `[code snippet]` - This [explanation]. We're using [approach] because [reason].
+
+**Line 2:** `[code snippet]` - Here we're [explanation]. Notice how [important detail]? That's crucial because [reason].
+
+**Line 3:** `[code snippet]` - [Continue detailed explanation]
+
+**Pro tip:** [Helpful insight or best practice]
+
+### Step 3: [Continue Pattern]
+
+[Continue with detailed, conversational explanations]
+
+[Include 8-12 major steps in Part 1]
+
+---
+
+## Part 2 - [Next Major Section]
+
+Great! You've made it through the basics. Now let's level up.
+
+### [Next Topic]
+
+Here's where most tutorials gloss over important details, but we won't do that. Let me explain [concept] properly.
+
+[Write detailed explanation in conversational style]
+
+**Here's the code:**
+
+```javascript
+// [Comment explaining overall purpose]
+[code with extensive inline comments explaining each important line]
+```
+
+**Wait, what's going on here?**
+
+I know that might look confusing at first. Let me walk you through it:
+
+1. First, we [action] - this sets up [thing]
+2. Then we [action] - this is important because [reason]
+3. Finally, we [action] - which gives us [result]
+
+**Common mistake alert!** 
+Many developers try to [common mistake]. Don't do this! It causes [problem] because [explanation]. Instead, always [correct approach].
+
+[Continue with detailed sections]
+
+---
+
+## Part 3 - [Advanced Topic]
+
+You're doing great! Now let's tackle something a bit more advanced.
+
+[Continue pattern with conversational tone and detailed explanations]
+
+[Include 15-20 major sections total across all parts]
+
+---
+
+## Putting It All Together: A Complete Example
+
+Let's build a real, working example from scratch. I'll walk you through every single line.
+
+**What we're building:** [Description of complete example]
+
+**Here's the full code:**
+
+```python
+# [Comprehensive example with extensive comments]
+[complete, working code example]
+```
+
+**Now let's understand every piece:**
+
+[Provide detailed walkthrough of entire example, explaining how all parts work together]
+
+**Testing it out:**
+
+Run this with:
+```bash
+[command to run]
+```
+
+You should see:
+```
+[expected output]
+```
+
+Awesome! If you got this working, you've just successfully [achievement]. That's a big deal!
+
+---
+
+## Common Issues and How to Fix Them
+
+Let me share some issues I've run into (and how I solved them).
+
+### Problem 1: [Common Error]
+
+**What you see:**
+```
+[Error message]
+```
+
+**What it means:**
+[Plain English explanation of what's wrong]
+
+**How to fix it:**
+[Step-by-step solution with explanation]
+
+**Why this happens:**
+[Root cause explanation]
+
+### Problem 2: [Another Common Issue]
+
+[Continue pattern for 6-8 common issues]
+
+---
+
+## Best Practices and Pro Tips
+
+Now that you've got the basics down, here are some tips I wish someone had told me when I was learning this:
+
+**1. [Best Practice Title]**
+[Explanation of why this matters and how to implement it]
+
+**2. [Best Practice Title]**
+[Continue with explanations]
+
+**3. Do this, not that:**
+❌ **Don't:** [Bad practice]
+✅ **Do:** [Good practice]
+**Why:** [Explanation]
+
+[Include 8-10 best practices]
+
+---
+
+## Taking It Further
+
+Congratulations! You've built [what they built]. But don't stop here—let's talk about what's next.
+
+### Ideas for Enhancement
+
+**Easy additions:**
+- [Enhancement 1] - [How it improves the project]
+- [Enhancement 2] - [How it improves the project]
+
+**Intermediate challenges:**
+- [Challenge 1] - [What you'll learn]
+- [Challenge 2] - [What you'll learn]
+
+**Advanced projects:**
+- [Advanced idea 1] - [Skills you'll practice]
+- [Advanced idea 2] - [Skills you'll practice]
+
+### Related Topics to Explore
+
+Now that you understand [Project Name], you're ready to learn:
+- **[Related topic 1]** - [How it connects]
+- **[Related topic 2]** - [How it connects]
+- **[Related topic 3]** - [How it connects]
+
+---
+
+## Frequently Asked Questions
+
+**Q: [Common question]**
+A: [Detailed, helpful answer]
+
+**Q: [Another question]**
+A: [Detailed, helpful answer]
+
+[Include 8-10 FAQs]
+
+---
+
+## Resources and Further Reading
+
+Want to dive deeper? Here are my favorite resources:
+
+**Documentation:**
+- [Resource 1] - [What makes it useful]
+- [Resource 2] - [What makes it useful]
+
+**Tutorials and Courses:**
+- [Resource 1] - [Why I recommend it]
+- [Resource 2] - [Why I recommend it]
+
+**Community:**
+- [Forum/Community 1] - [What you'll find there]
+- [Forum/Community 2] - [What you'll find there]
+
+---
+
+## Wrapping Up
+
+Let's recap what we've covered today:
+
+✅ [Key learning 1]
+✅ [Key learning 2]
+✅ [Key learning 3]
+✅ [Continue with all major learnings]
+
+You've come a long way! When I first started with [Project Name], I struggled with [relatable struggle]. But with practice, it becomes second nature.
+
+**Your next steps:**
+1. [Immediate next action]
+2. [Follow-up practice]
+3. [Advanced exploration]
+
+Remember, the best way to learn is by doing. Take this code, break it, fix it, and make it your own.
+
+**Got questions?** Drop them in the comments below, and I'll help you out!
+
+**Found this helpful?** Share it with someone who's learning [Project Name]!
+
+Happy coding! 🚀
+
+---
+
+*Project: {project['name']}*
+*Details: {describe(project)}*
+
+Write this as an engaging, comprehensive Medium-style tutorial with a conversational tone. Use personal pronouns, storytelling, practical examples, and detailed code explanations. Include 15-20 major sections with thorough walkthroughs, common pitfalls, best practices, and actionable next steps. Make it feel like a friendly expert is teaching the reader one-on-one."""
+
+
+# Template id -> version, renderer and the kind of guide it produces
+PROMPT_TEMPLATES = {
+    'task-normal': {'version': 1, 'render': normal_guide_prompt, 'guide_kind': 'task', 'is_advanced': False},
+    'task-advanced': {'version': 1, 'render': advanced_guide_prompt, 'guide_kind': 'task', 'is_advanced': True},
+    'project': {'version': 1, 'render': project_guide_prompt, 'guide_kind': 'project', 'is_advanced': False}
+}
+
+
+def template_ref(template_id):
+    """'id@version' for a registered template (KeyError if unknown)."""
+    return f"{template_id}@{PROMPT_TEMPLATES[template_id]['version']}"
+
+
+def render_prompt(template_id, task_name, task_description=''):
+    """
+    Render a registered template for one task.
+    Raises KeyError for an unknown template id.
+    """
+    template = PROMPT_TEMPLATES[template_id]
+    return template['render']({'name': task_name, 'description': task_description or ''})
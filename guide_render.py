@@ -0,0 +1,309 @@
+"""
+Server-side Markdown to HTML rendering for cached guides.
+
+Covers the Markdown the guide prompts produce, with the same options app.js
+gives showdown: headings, paragraphs with simple line breaks, fenced and
+indented code, nested and task lists, tables, block quotes, rules, links,
+images, emphasis and strikethrough. Output is sanitized by construction:
+all text is HTML-escaped, raw HTML in the guide is shown literally, only
+the tags below are ever emitted, and links and images must use http(s),
+mailto or relative URLs.
+
+Bump RENDERER_VERSION whenever the output changes; stored renderings from
+older versions are re-rendered on their next read.
+"""
+import html
+import re
+
+RENDERER_VERSION = 1
+
+_FENCE_RE = re.compile(r'^ {0,3}(`{3,}|~{3,})\s*([^`\s]*)')
+_HEADING_RE = re.compile(r'^ {0,3}(#{1,6})(?:\s+(.*?))?\s*#*\s*$')
+_RULE_RE = re.compile(r'^ {0,3}([-*_])(?:\s*\1){2,}\s*$')
+_LIST_ITEM_RE = re.compile(r'^( {0,3})([-*+]|\d{1,9}[.)])(\s+|$)(.*)$')
+_TASK_RE = re.compile(r'^\[([ xX])\]\s+')
+_QUOTE_RE = re.compile(r'^ {0,3}> ?')
+_TABLE_DIVIDER_RE = re.compile(r'^\s*\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?\s*$')
+_INDENTED_CODE_RE = re.compile(r'^(?: {4}|\t)')
+_LANGUAGE_RE = re.compile(r'[^\w+#.-]')
+
+_CODE_SPAN_RE = re.compile(r'(`+)(.+?)(?<!`)\1(?!`)', re.S)
+_LINK_RE = re.compile(r'(!?)\[((?:[^\[\]]|\[[^\]]*\])*)\]\(\s*<?([^\s)>]*)>?(?:\s+"([^"]*)")?\s*\)')
+_AUTOLINK_RE = re.compile(r'<((?:https?://|mailto:)[^\s<>]+)>')
+_ESCAPE_RE = re.compile(r'\\([\\`*_{}\[\]()#+\-.!|~>])')
+_STRONG_RE = re.compile(r'(\*\*|__)(?=\S)(.+?)(?<=\S)\1')
+_EM_STAR_RE = re.compile(r'\*(?=\S)(.+?)(?<=\S)\*')
+# Underscores inside words are literal (literalMidWordUnderscores)
+_EM_UNDERSCORE_RE = re.compile(r'(?<!\w)_(?=\S)(.+?)(?<=\S)_(?!\w)')
+_STRIKE_RE = re.compile(r'~~(?=\S)(.+?)(?<=\S)~~')
+_PLACEHOLDER_RE = re.compile('\x00(\\d+)\x00')
+
+_SAFE_URL_RE = re.compile(r'^(?:https?:|mailto:|[#/.]|[^:/?#]*(?:[/?#]|$))', re.I)
+
+
+def _escape(text):
+    return html.escape(text, quote=True)
+
+
+def _safe_url(url):
+    url = url.strip()
+    return url if url and _SAFE_URL_RE.match(url) else None
+
+
+def _inline(text, slots):
+    """Render inline Markdown, leaving finished fragments as placeholders into slots."""
+
+    def hold(fragment):
+        slots.append(fragment)
+        return f'\x00{len(slots) - 1}\x00'
+
+    def code_span(match):
+        return hold(f'<code>{_escape(match.group(2).strip())}</code>')
+
+    def link(match):
+        is_image, label, url, title = match.groups()
+        url = _safe_url(url)
+        title_attr = f' title="{_escape(title)}"' if title else ''
+        if is_image:
+            if url is None:
+                return hold(_escape(label))
+            return hold(f'<img src="{_escape(url)}" alt="{_escape(label)}"{title_attr} />')
+        if url is None:
+            return hold(_inline(label, slots))
+        return hold(f'<a href="{_escape(url)}"{title_attr} target="_blank" rel="noopener noreferrer">'
+                    f'{_inline(label, slots)}</a>')
+
+    def autolink(match):
+        url = match.group(1)
+        return hold(f'<a href="{_escape(url)}" target="_blank" rel="noopener noreferrer">{_escape(url)}</a>')
+
+    text = _CODE_SPAN_RE.sub(code_span, text)
+    text = _ESCAPE_RE.sub(lambda m: hold(_escape(m.group(1))), text)
+    text = _LINK_RE.sub(link, text)
+    text = _AUTOLINK_RE.sub(autolink, text)
+    text = _escape(text)
+    text = _STRONG_RE.sub(r'<strong>\2</strong>', text)
+    text = _EM_STAR_RE.sub(r'<em>\1</em>', text)
+    text = _EM_UNDERSCORE_RE.sub(r'<em>\1</em>', text)
+    return _STRIKE_RE.sub(r'<del>\1</del>', text)
+
+
+def render_inline(text):
+    """Render one block's inline Markdown to HTML."""
+    slots = []
+    text = _inline(text.replace('\x00', ''), slots)
+    # Placeholders can nest (a code span inside a link label), so loop
+    while _PLACEHOLDER_RE.search(text):
+        text = _PLACEHOLDER_RE.sub(lambda m: slots[int(m.group(1))], text)
+    return text
+
+
+def _split_row(line):
+    line = line.strip()
+    if line.startswith('|'):
+        line = line[1:]
+    if line.endswith('|') and not line.endswith('\\|'):
+        line = line[:-1]
+    return [cell.strip().replace('\\|', '|') for cell in re.split(r'(?<!\\)\|', line)]
+
+
+def _alignment(cell):
+    cell = cell.strip()
+    if cell.startswith(':') and cell.endswith(':'):
+        return 'center'
+    if cell.endswith(':'):
+        return 'right'
+    if cell.startswith(':'):
+        return 'left'
+    return None
+
+
+def _render_table(header, divider, rows):
+    aligns = [_alignment(cell) for cell in _split_row(divider)]
+
+    def cells(tag, values):
+        out = []
+        for index, value in enumerate(values):
+            align = aligns[index] if index < len(aligns) else None
+            style = f' style="text-align:{align};"' if align else ''
+            out.append(f'<{tag}{style}>{render_inline(value)}</{tag}>')
+        return ''.join(out)
+
+    head = _split_row(header)
+    body = ''.join(f'<tr>{cells("td", (_split_row(row) + [""] * len(head))[:len(head)])}</tr>\n' for row in rows)
+    return (f'<table>\n<thead>\n<tr>{cells("th", head)}</tr>\n</thead>\n'
+            f'<tbody>\n{body}</tbody>\n</table>')
+
+
+def _starts_block(line, next_line=None):
+    return bool(
+        _FENCE_RE.match(line) or _HEADING_RE.match(line) or _RULE_RE.match(line)
+        or _QUOTE_RE.match(line) or _LIST_ITEM_RE.match(line)
+        or ('|' in line and next_line is not None and _TABLE_DIVIDER_RE.match(next_line)
+            and '-' in next_line)
+    )
+
+
+def _dedent(line, width):
+    """Remove up to width columns of leading whitespace (tabs count as 4)."""
+    removed = 0
+    index = 0
+    while index < len(line) and removed < width and line[index] in ' \t':
+        removed += 4 if line[index] == '\t' else 1
+        index += 1
+    return line[index:]
+
+
+def _render_list(lines, start):
+    """Render the list starting at lines[start]. Returns (html, next index)."""
+    first = _LIST_ITEM_RE.match(lines[start])
+    ordered = first.group(2)[0].isdigit()
+    items = []
+    loose = False
+    index = start
+    while index < len(lines):
+        match = _LIST_ITEM_RE.match(lines[index])
+        if not match or match.group(2)[0].isdigit() != ordered:
+            break
+        content_indent = len(match.group(1)) + len(match.group(2)) + min(len(match.group(3)), 4)
+        body = [match.group(4)]
+        index += 1
+        while index < len(lines):
+            line = lines[index]
+            if not line.strip():
+                # A blank line continues the item only if indented content follows
+                following = next((l for l in lines[index + 1:] if l.strip()), None)
+                if following is not None and len(following) - len(following.lstrip()) >= min(content_indent, 2):
+                    body.append('')
+                    index += 1
+                    continue
+                break
+            indent = len(line) - len(line.lstrip())
+            if indent >= min(content_indent, 2) or (not _starts_block(line) and body[-1].strip()):
+                body.append(_dedent(line, content_indent))
+                index += 1
+                continue
+            break
+        if '' in body:
+            loose = True
+        items.append(body)
+        # Blank lines between items make the list loose
+        if index < len(lines) and not lines[index].strip():
+            following = next((i for i in range(index, len(lines)) if lines[i].strip()), None)
+            if following is not None and _LIST_ITEM_RE.match(lines[following]):
+                nxt = _LIST_ITEM_RE.match(lines[following])
+                if nxt.group(2)[0].isdigit() == ordered:
+                    loose = True
+                    index = following
+
+    out = []
+    for body in items:
+        checkbox = ''
+        task = _TASK_RE.match(body[0])
+        if task:
+            body[0] = body[0][task.end():]
+            checked = ' checked' if task.group(1) in 'xX' else ''
+            checkbox = f'<input type="checkbox" disabled{checked} /> '
+        inner = _render_blocks(body, tight=not loose)
+        item_class = ' class="task-list-item"' if task else ''
+        out.append(f'<li{item_class}>{checkbox}{inner}</li>')
+
+    tag = 'ol' if ordered else 'ul'
+    start_attr = ''
+    if ordered:
+        number = int(first.group(2)[:-1])
+        if number != 1:
+            start_attr = f' start="{number}"'
+    return f'<{tag}{start_attr}>\n' + '\n'.join(out) + f'\n</{tag}>', index
+
+
+def _render_blocks(lines, tight=False):
+    blocks = []
+    index = 0
+    while index < len(lines):
+        line = lines[index]
+        next_line = lines[index + 1] if index + 1 < len(lines) else None
+
+        if not line.strip():
+            index += 1
+            continue
+
+        fence = _FENCE_RE.match(line)
+        if fence:
+            marker = fence.group(1)
+            language = _LANGUAGE_RE.sub('', fence.group(2))
+            code = []
+            index += 1
+            while index < len(lines) and not re.match(rf'^ {{0,3}}{re.escape(marker[0])}{{{len(marker)},}}\s*$', lines[index]):
+                code.append(lines[index])
+                index += 1
+            index += 1
+            css = f' class="{language} language-{language}"' if language else ''
+            blocks.append(f'<pre><code{css}>{_escape(chr(10).join(code))}\n</code></pre>')
+            continue
+
+        heading = _HEADING_RE.match(line)
+        if heading:
+            level = len(heading.group(1))
+            blocks.append(f'<h{level}>{render_inline(heading.group(2) or "")}</h{level}>')
+            index += 1
+            continue
+
+        if _RULE_RE.match(line):
+            blocks.append('<hr />')
+            index += 1
+            continue
+
+        if _QUOTE_RE.match(line):
+            quoted = []
+            while index < len(lines) and lines[index].strip() and (_QUOTE_RE.match(lines[index]) or quoted):
+                if not _QUOTE_RE.match(lines[index]) and _starts_block(lines[index]):
+                    break
+                quoted.append(_QUOTE_RE.sub('', lines[index], count=1))
+                index += 1
+            blocks.append(f'<blockquote>\n{_render_blocks(quoted)}\n</blockquote>')
+            continue
+
+        if _LIST_ITEM_RE.match(line):
+            rendered, index = _render_list(lines, index)
+            blocks.append(rendered)
+            continue
+
+        if '|' in line and next_line is not None and _TABLE_DIVIDER_RE.match(next_line) and '-' in next_line:
+            rows = []
+            index += 2
+            while index < len(lines) and lines[index].strip() and '|' in lines[index]:
+                rows.append(lines[index])
+                index += 1
+            blocks.append(_render_table(line, next_line, rows))
+            continue
+
+        if _INDENTED_CODE_RE.match(line) and not tight:
+            code = []
+            while index < len(lines) and (_INDENTED_CODE_RE.match(lines[index]) or not lines[index].strip()):
+                code.append(_dedent(lines[index], 4))
+                index += 1
+            while code and not code[-1].strip():
+                code.pop()
+            blocks.append(f'<pre><code>{_escape(chr(10).join(code))}\n</code></pre>')
+            continue
+
+        paragraph = [line.strip()]
+        index += 1
+        while index < len(lines) and lines[index].strip():
+            following = lines[index + 1] if index + 1 < len(lines) else None
+            if _starts_block(lines[index], following):
+                break
+            paragraph.append(lines[index].strip())
+            index += 1
+        # simpleLineBreaks: single newlines inside a paragraph are kept
+        text = '<br />\n'.join(render_inline(part) for part in paragraph)
+        blocks.append(text if tight else f'<p>{text}</p>')
+
+    return '\n'.join(blocks)
+
+
+def render_guide(markdown):
+    """Render guide Markdown to sanitized HTML."""
+    text = (markdown or '').replace('\r\n', '\n').replace('\r', '\n').replace('\x00', '')
+    return _render_blocks(text.split('\n'))
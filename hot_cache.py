@@ -0,0 +1,112 @@
+"""
+In-process LRU cache for recently served guides.
+Sits in front of task_cache so repeat /api/cache/get lookups for the same
+assignment are answered from memory without touching SQLite.
+"""
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 2048
+
+
+def make_key(task_name, task_description, is_advanced, model_name, guide_kind='task'):
+    """Normalize a cache key so equivalent requests share one entry."""
+    return (task_name, task_description or '', bool(is_advanced), model_name, guide_kind)
+
+
+class HotGuideCache:
+    """Thread-safe LRU keyed by guide key, bounded by total content bytes."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Invalidation counts per key, so a value read from SQLite before a
+        # write is not cached after it (see token). Dropped wholesale when it
+        # grows too big; the epoch makes that void every outstanding token.
+        self._generations = {}
+        self._epoch = 0
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _sizeof(value):
+        size = 0
+        for part in value:
+            if isinstance(part, bytes):
+                size += len(part)
+            elif part is not None:
+                size += len(str(part).encode('utf-8'))
+        return size
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def token(self, key):
+        """Take before reading key from the database; pass the result to put()."""
+        with self._lock:
+            return (self._epoch, self._generations.get(key, 0))
+
+    def put(self, key, value, token=None):
+        """
+        Insert or replace an entry, evicting least recently used ones.
+        With a token, the value is dropped if key was invalidated since.
+        """
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if token is not None and token != (self._epoch, self._generations.get(key, 0)):
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            while self._entries and (self.current_bytes > self.max_bytes or len(self._entries) > self.max_entries):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """Drop one entry (after the guide was saved or deleted)."""
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            if len(self._generations) >= 4 * self.max_entries:
+                self._generations.clear()
+                self._epoch += 1
+            self._generations[key] = self._generations.get(key, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+            self._generations.clear()
+            self._epoch += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,213 @@
+"""
+Minimal in-process metrics in the Prometheus text exposition format.
+
+Counters, gauges and histograms with labels, kept in plain dicts behind a
+lock so the hot path costs one dict update. Values that already live
+elsewhere (LRU stats, SSE subscribers, in-flight generations) are read at
+scrape time through collector callbacks instead of being mirrored.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; covers sub-millisecond SQLite reads up to multi-minute generations
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 30, 50, 75, 100, 150, 200)
+INF_LABEL = 'le="+Inf"'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} expects labels {self.labelnames}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _header(self):
+        return [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return self._header() + [
+            f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}' for key, value in items
+        ]
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    render = Counter.render
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0, 0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][index] += 1
+                    break
+            entry[1] += 1
+            entry[2] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of the with-block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self):
+        with self._lock:
+            items = sorted((key, (list(entry[0]), entry[1], entry[2])) for key, entry in self._values.items())
+        lines = self._header()
+        for key, (counts, total, value_sum) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}')
+            lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, INF_LABEL)} {total}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, key)} {total}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(value_sum)}')
+        return lines
+
+
+class Registry:
+    """Holds every metric plus callbacks that refresh gauges at scrape time."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._add(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self._add(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, help_text, labelnames, buckets))
+
+    def add_collector(self, callback):
+        """Register a function called before every render (e.g. to set gauges)."""
+        with self._lock:
+            self._collectors.append(callback)
+
+    def render(self):
+        with self._lock:
+            collectors = list(self._collectors)
+            metrics = list(self._metrics)
+        for callback in collectors:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Warning: metrics collector failed: {e}")
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+# Shared by proxy.py, async_proxy.py and task_cache.py
+http_request_seconds = REGISTRY.histogram(
+    'groupapp_http_request_duration_seconds', 'Time to produce the response headers, per route.',
+    ('route', 'method', 'status'))
+sqlite_query_seconds = REGISTRY.histogram(
+    'groupapp_sqlite_query_duration_seconds', 'Time spent in task_cache SQLite operations.', ('operation',))
+guide_lookups = REGISTRY.counter(
+    'groupapp_guide_lookups_total', 'Cached guide lookups by the tier that answered them.', ('result',))
+upstream_ttft_seconds = REGISTRY.histogram(
+    'groupapp_upstream_ttft_seconds', 'Upstream time to first streamed chunk.', ('model',))
+upstream_tokens_per_second = REGISTRY.histogram(
+    'groupapp_upstream_tokens_per_second', 'Generation speed reported by Ollama.', ('model',), RATE_BUCKETS)
+upstream_bytes = REGISTRY.counter(
+    'groupapp_upstream_bytes_total', 'Bytes received from Ollama.', ('model',))
+upstream_errors = REGISTRY.counter(
+    'groupapp_upstream_errors_total', 'Generations that failed before finishing.', ('model',))
+stream_bytes_sent = REGISTRY.counter(
+    'groupapp_stream_bytes_sent_total', 'Generation bytes streamed to browsers (after coalescing fan-out).')
+guides_retired = REGISTRY.counter(
+    'groupapp_guides_retired_total', 'Guides removed by the retention policy (TTL expiry or size-budget eviction).',
+    ('reason',))
+generations_resumed = REGISTRY.counter(
+    'groupapp_generations_resumed_total', 'Generations continued from a saved partial checkpoint.', ('model',))
+
+
+def sqlite_timer(operation):
+    return sqlite_query_seconds.time(operation=operation)
+
+
+def render():
+    return REGISTRY.render()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for Ollama's /api/generate, for benchmarking the proxy
+without a GPU box.
+
+Streams NDJSON records like Ollama does, with a configurable time to
+first token, token rate, and injected failures (HTTP errors, dropped
+connections, stalls). Point the proxy at it with the X-Ollama-Target
+header (benchmark.py does this), e.g. X-Ollama-Target: http://127.0.0.1:11435
+
+Examples:
+    python3 mock_ollama.py
+    python3 mock_ollama.py --tokens-per-second 15 --ttft 2 --error-rate 0.05
+    python3 mock_ollama.py --stall-rate 0.1 --stall-seconds 40
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timezone
+
+from aiohttp import web
+
+HOST = '127.0.0.1'
+PORT = 11435
+
+WORDS = ('the', 'guide', 'step', 'run', 'command', 'config', 'server', 'check', 'output', 'network',
+         'file', 'user', 'install', 'service', 'verify', 'next', 'then', 'example', 'and', 'with')
+
+settings_key = web.AppKey('settings', dict)
+stats_key = web.AppKey('stats', dict)
+
+
+def record(model, **fields):
+    base = {
+        'model': model,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+    }
+    base.update(fields)
+    return (json.dumps(base) + '\n').encode('utf-8')
+
+
+async def handle_generate(request):
+    settings = request.app[settings_key]
+    stats = request.app[stats_key]
+    stats['requests'] += 1
+    try:
+        payload = await request.json()
+    except ValueError:
+        return web.json_response({'error': 'invalid JSON'}, status=400)
+    model = payload.get('model', 'mock')
+    rng = random.Random(payload.get('prompt', ''))
+    tokens = settings['tokens'] + rng.randint(-settings['tokens_jitter'], settings['tokens_jitter'])
+    tokens = max(1, tokens)
+    started = time.perf_counter()
+
+    await asyncio.sleep(settings['ttft'])
+    if random.random() < settings['error_rate']:
+        stats['errors'] += 1
+        return web.json_response({'error': 'mock: injected failure'}, status=500)
+
+    delay = 1.0 / settings['tokens_per_second'] if settings['tokens_per_second'] > 0 else 0
+    text = [rng.choice(WORDS) + ' ' for _ in range(tokens)]
+
+    if not payload.get('stream', True):
+        await asyncio.sleep(delay * tokens)
+        body = json.loads(record(model, response=''.join(text), done=True, eval_count=tokens,
+                                 eval_duration=int((time.perf_counter() - started) * 1e9)))
+        return web.json_response(body)
+
+    resp = web.StreamResponse()
+    resp.content_type = 'application/x-ndjson'
+    await resp.prepare(request)
+    drop_at = rng.randrange(tokens) if random.random() < settings['drop_rate'] else None
+    stall_at = rng.randrange(tokens) if random.random() < settings['stall_rate'] else None
+    eval_started = time.perf_counter()
+    try:
+        for index, token in enumerate(text):
+            if index == drop_at:
+                stats['drops'] += 1
+                # Abort the connection mid-stream, like a crashed upstream
+                request.transport.close()
+                return resp
+            if index == stall_at:
+                stats['stalls'] += 1
+                await asyncio.sleep(settings['stall_seconds'])
+            await resp.write(record(model, response=token, done=False))
+            if delay:
+                await asyncio.sleep(delay)
+        await resp.write(record(
+            model, response='', done=True, done_reason='stop',
+            total_duration=int((time.perf_counter() - started) * 1e9),
+            eval_count=tokens,
+            eval_duration=int((time.perf_counter() - eval_started) * 1e9)
+        ))
+        await resp.write_eof()
+        stats['completed'] += 1
+    except ConnectionResetError:
+        pass
+    return resp
+
+
+async def handle_tags(request):
+    models = request.app[settings_key]['models']
+    return web.json_response({'models': [{'name': name, 'model': name} for name in models]})
+
+
+async def handle_stats(request):
+    return web.json_response(request.app[stats_key])
+
+
+def create_app(settings):
+    app = web.Application()
+    app[settings_key] = settings
+    app[stats_key] = {'requests': 0, 'completed': 0, 'errors': 0, 'drops': 0, 'stalls': 0}
+    app.router.add_post('/api/generate', handle_generate)
+    app.router.add_get('/api/tags', handle_tags)
+    app.router.add_get('/mock/stats', handle_stats)
+    return app
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Mock Ollama /api/generate server.')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--models', default='mock,benchmark-mock',
+                        help='Comma-separated model names listed by /api/tags')
+    parser.add_argument('--tokens', type=int, default=300, help='Tokens per response (default: 300)')
+    parser.add_argument('--tokens-jitter', type=int, default=50, help='Random +/- tokens per response')
+    parser.add_argument('--tokens-per-second', type=float, default=40, help='Stream rate, 0 = unthrottled')
+    parser.add_argument('--ttft', type=float, default=0.3, help='Seconds before the first token')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction answered with HTTP 500')
+    parser.add_argument('--drop-rate', type=float, default=0.0, help='Fraction cut off mid-stream')
+    parser.add_argument('--stall-rate', type=float, default=0.0, help='Fraction that pause mid-stream')
+    parser.add_argument('--stall-seconds', type=float, default=35, help='Length of a stall')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    settings = {
+        'models': [m.strip() for m in args.models.split(',') if m.strip()],
+        'tokens': args.tokens,
+        'tokens_jitter': min(args.tokens_jitter, max(0, args.tokens - 1)),
+        'tokens_per_second': args.tokens_per_second,
+        'ttft': args.ttft,
+        'error_rate': args.error_rate,
+        'drop_rate': args.drop_rate,
+        'stall_rate': args.stall_rate,
+        'stall_seconds': args.stall_seconds,
+    }
+    print(f"Mock Ollama on http://{args.host}:{args.port} ({args.tokens} tokens @ {args.tokens_per_second}/s, ttft {args.ttft}s)")
+    web.run_app(create_app(settings), host=args.host, port=args.port, print=None)
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Populate the task cache database with generated guides.
+
+Works out which guides are missing up front (one batched lookup per mode),
+then spreads the missing ones across a pool of worker threads and every
+Ollama endpoint listed in models.txt. Stops once coverage is complete.
+
+Examples:
+    python3 populate_cache.py                      # normal guides
+    python3 populate_cache.py --mode advanced
+    python3 populate_cache.py --mode normal --mode advanced --workers 2
+    python3 populate_cache.py --mode project --model ministral-3
+"""
+
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+
+import requests
+
+# Configuration
+PROXY_URL = 'http://10.207.20.29:8001'
+MODELS_FILE = 'models.txt'
+TASK_FILES = ['ccna.txt', 'linux.txt', 'sysadmin.txt', 'hacking.txt', 'python.txt', 'javascript.txt', 'ai.txt']
+PROJECT_FILE = 'projects.txt'
+LOOKUP_BATCH_SIZE = 200
+
+# Per-mode settings: which files to read, which proxy prompt template, how long to wait
+MODES = {
+    'normal': {
+        'files': TASK_FILES,
+        'template': 'task-normal',
+        'is_advanced': False,
+        'is_project': False,
+        'timeout': 120
+    },
+    'advanced': {
+        'files': TASK_FILES,
+        'template': 'task-advanced',
+        'is_advanced': True,
+        'is_project': False,
+        'timeout': 300
+    },
+    'project': {
+        'files': [PROJECT_FILE],
+        'template': 'project',
+        'is_advanced': False,
+        'is_project': True,
+        'timeout': 300
+    }
+}
+
+print_lock = threading.Lock()
+
+def log(message):
+    with print_lock:
+        print(message, flush=True)
+
+def load_tasks_from_file(filename):
+    """Load tasks from a text file (format: Name: description)."""
+    try:
+        with open(filename, 'r') as f:
+            lines = f.readlines()
+
+        tasks = []
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+
+            if ':' in line:
+                parts = line.split(':', 1)
+                tasks.append({
+                    'name': parts[0].strip(),
+                    'description': parts[1].strip() if len(parts) > 1 else '',
+                    'file': filename
+                })
+
+        return tasks
+    except Exception as e:
+        log(f"Error loading {filename}: {e}")
+        return []
+
+def load_endpoints(filename=MODELS_FILE):
+    """Read active URL|MODEL lines from models.txt."""
+    endpoints = []
+    try:
+        with open(filename, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                parts = line.split('|')
+                endpoints.append({
+                    'url': parts[0].strip(),
+                    'model': parts[1].strip() if len(parts) > 1 else 'qwen3:8b'
+                })
+    except Exception as e:
+        log(f"Error loading {filename}: {e}")
+    return endpoints
+
+def cache_key(task, mode, model_name):
+    settings = MODES[mode]
+    return {
+        'task_name': task['name'],
+        'task_description': task['description'],
+        'is_advanced': settings['is_advanced'],
+        'model_name': model_name,
+        'is_project': settings['is_project']
+    }
+
+def find_uncached(tasks, mode, model_name):
+    """Return the tasks that have no cached guide yet, using batched lookups."""
+    uncached = []
+    for start in range(0, len(tasks), LOOKUP_BATCH_SIZE):
+        batch = tasks[start:start + LOOKUP_BATCH_SIZE]
+        response = requests.post(
+            f'{PROXY_URL}/api/cache/get_many',
+            # Presence only: the guide text is not needed to know it exists
+            json={'keys': [cache_key(task, mode, model_name) for task in batch], 'include_content': False},
+            timeout=30
+        )
+        response.raise_for_status()
+        results = response.json().get('results', [])
+        for task, result in zip(batch, results):
+            if not result.get('found'):
+                uncached.append(task)
+    return uncached
+
+def generate_guide(job, endpoint):
+    """
+    Generate one guide through the proxy.
+    The proxy renders the prompt template and saves the guide to the cache
+    itself (write-through under the task's key).
+    Returns the number of characters generated, or None on failure.
+    """
+    settings = MODES[job['mode']]
+    task = job['task']
+    # Background fill: the proxy runs it only when no student is waiting.
+    # If an earlier attempt's stream dropped, continue from its checkpoint.
+    headers = {'Content-Type': 'application/json', 'X-Generation-Priority': 'background', 'X-Generation-Resume': '1'}
+    # Same rule as app.js: only external (ngrok) endpoints go in the header
+    if endpoint['url'].startswith('https://'):
+        headers['X-Ollama-Target'] = endpoint['url']
+
+    try:
+        response = requests.post(
+            f'{PROXY_URL}/api/generate',
+            headers=headers,
+            json={
+                'model': endpoint['model'],
+                'prompt_template': settings['template'],
+                'fields': {'task_name': task['name'], 'task_description': task['description']},
+                'stream': True
+            },
+            stream=True,
+            timeout=settings['timeout']
+        )
+
+        if not response.ok:
+            log(f"  ✗ {task['name']} [{job['mode']}] FAILED (HTTP {response.status_code})")
+            return None
+
+        resumed = int(response.headers.get('X-Generation-Resumed', 0))
+        if resumed:
+            log(f"  ↻ {task['name']} [{job['mode']}] resuming after {resumed} saved chars")
+
+        chars = 0
+        finished = False
+        for line in response.iter_lines():
+            if line:
+                try:
+                    data = json.loads(line)
+                    chars += len(data.get('response', ''))
+                    finished = finished or bool(data.get('done'))
+                except json.JSONDecodeError:
+                    pass
+
+        if not finished:
+            log(f"  ✗ {task['name']} [{job['mode']}] stream ended early")
+            return None
+        return chars
+
+    except requests.exceptions.Timeout:
+        log(f"  ✗ {task['name']} [{job['mode']}] TIMEOUT")
+        return None
+    except Exception as e:
+        log(f"  ✗ {task['name']} [{job['mode']}] ERROR: {e}")
+        return None
+
+def get_cache_stats():
+    """Get current cache statistics."""
+    try:
+        response = requests.get(f'{PROXY_URL}/api/cache/stats', timeout=5)
+        if response.ok:
+            return response.json()
+        return None
+    except Exception:
+        return None
+
+def print_cache_summary(label, stats):
+    """Guide counts by kind; normal + advanced + project adds up to the total."""
+    print(f"{label}: {stats['total_guides']} guides")
+    print(f"  {stats['normal_guides']} normal, {stats['advanced_guides']} advanced")
+    print(f"  {stats['project_guides']} project")
+
+
+class Populator:
+    """Worker pool draining one job queue per model."""
+
+    def __init__(self, endpoints, workers_per_endpoint=1, retries=1):
+        self.endpoints = endpoints
+        self.workers_per_endpoint = workers_per_endpoint
+        self.retries = retries
+        self.queues = {}
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.generated = 0
+        self.failed = 0
+        self.total = 0
+
+    def add_jobs(self, model_name, mode, tasks):
+        q = self.queues.setdefault(model_name, queue.Queue())
+        for task in tasks:
+            q.put({'task': task, 'mode': mode, 'attempts': 0})
+        self.total += len(tasks)
+
+    def worker(self, name, endpoint):
+        q = self.queues.get(endpoint['model'])
+        while q is not None and not self.stop_event.is_set():
+            try:
+                job = q.get_nowait()
+            except queue.Empty:
+                return
+
+            job['attempts'] += 1
+            started = time.time()
+            chars = generate_guide(job, endpoint)
+            with self.lock:
+                if chars is not None:
+                    self.generated += 1
+                    done = self.generated + self.failed
+                    log(f"  ✓ [{done}/{self.total}] {name}: {job['task']['name']} [{job['mode']}] "
+                        f"({chars} chars, {time.time() - started:.0f}s)")
+                elif job['attempts'] <= self.retries:
+                    q.put(job)
+                else:
+                    self.failed += 1
+
+    def run(self):
+        threads = []
+        for index, endpoint in enumerate(self.endpoints):
+            for n in range(self.workers_per_endpoint):
+                name = f"{endpoint['model']}#{index}.{n}"
+                thread = threading.Thread(target=self.worker, args=(name, endpoint), daemon=True)
+                thread.start()
+                threads.append(thread)
+
+        try:
+            while any(thread.is_alive() for thread in threads):
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            log("\nStopping after current generations finish... (Ctrl+C again to abort)")
+            self.stop_event.set()
+            for thread in threads:
+                thread.join()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Fill the guide cache until every task is covered.')
+    parser.add_argument('--mode', action='append', choices=sorted(MODES),
+                        help='Guide kind to generate (repeatable, default: normal)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Concurrent generations per endpoint (default: 1)')
+    parser.add_argument('--model', action='append',
+                        help='Only use endpoints serving this model (repeatable)')
+    parser.add_argument('--retries', type=int, default=1,
+                        help='Retries per failed guide (default: 1)')
+    parser.add_argument('--proxy', default=PROXY_URL, help=f'Proxy URL (default: {PROXY_URL})')
+    parser.add_argument('--dry-run', action='store_true', help='Only report coverage')
+    return parser.parse_args()
+
+def main():
+    global PROXY_URL
+    args = parse_args()
+    PROXY_URL = args.proxy.rstrip('/')
+    modes = args.mode or ['normal']
+
+    endpoints = load_endpoints()
+    if args.model:
+        endpoints = [ep for ep in endpoints if ep['model'] in args.model]
+    if not endpoints:
+        print("ERROR: No Ollama endpoints configured (check models.txt / --model)")
+        return 1
+
+    print("=" * 70)
+    print("Task Cache Populator")
+    print("=" * 70)
+    print(f"Modes: {', '.join(modes)}")
+    print(f"Proxy: {PROXY_URL}")
+    for ep in endpoints:
+        print(f"Endpoint: {ep['url']} ({ep['model']}) x{args.workers}")
+    print()
+
+    stats = get_cache_stats()
+    if stats:
+        print_cache_summary('Current cache', stats)
+
+    populator = Populator(endpoints, workers_per_endpoint=max(1, args.workers), retries=args.retries)
+    models = sorted({ep['model'] for ep in endpoints})
+
+    # Coverage-driven: work out everything that is missing before generating
+    for mode in modes:
+        tasks = []
+        for filename in MODES[mode]['files']:
+            tasks.extend(load_tasks_from_file(filename))
+        for model_name in models:
+            try:
+                missing = find_uncached(tasks, mode, model_name)
+            except requests.RequestException as e:
+                print(f"ERROR: Could not check cache coverage: {e}")
+                return 1
+            print(f"  {mode:<8} {model_name:<20} {len(tasks) - len(missing)}/{len(tasks)} cached, {len(missing)} to generate")
+            populator.add_jobs(model_name, mode, missing)
+
+    if populator.total == 0:
+        print("\nCoverage complete, nothing to generate.")
+        return 0
+    if args.dry_run:
+        return 0
+
+    print(f"\nGenerating {populator.total} guides... (Press Ctrl+C to stop)")
+    print("-" * 70)
+    started = time.time()
+    populator.run()
+
+    print("\n" + "=" * 70)
+    print(f"Generated: {populator.generated} new guides in {(time.time() - started) / 60:.1f} min")
+    print(f"Failed: {populator.failed}")
+    stats = get_cache_stats()
+    if stats:
+        print_cache_summary('Final cache', stats)
+    print("=" * 70)
+    return 0 if populator.failed == 0 else 2
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,14 @@
-from flask import Flask, request, Response, stream_with_context, jsonify
+from flask import Flask, request, Response, stream_with_context, jsonify, g
 import requests
 import threading
-import queue
 import json
+import re
+import hashlib
+import itertools
+import time
+import zlib
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
 
 # Import task cache module
 try:
@@ -11,23 +17,462 @@ except ImportError:
     task_cache = None
     print("Warning: task_cache module not found, caching disabled")
 
+from hot_cache import HotGuideCache, make_key
+from generation_flights import FlightRegistry, generation_key
+from event_hub import EventHub, format_frame, HEARTBEAT_FRAME
+from upstream_pool import UpstreamPool
+from generation_scheduler import GenerationScheduler, QueueFull, normalize_priority
+import guide_prompts
+import metrics
+
 app = Flask(__name__)
 
+# Recently served guides, kept in memory in front of SQLite
+guide_lru = HotGuideCache()
+
+# Generations currently streaming from Ollama, keyed by model + prompt hash
+generation_flights = FlightRegistry()
+
 # Default Ollama URL
 DEFAULT_OLLAMA_URL = 'http://10.207.20.29:11434/api/generate'
+UPSTREAM_TIMEOUT = 30
+
+# One keep-alive session per upstream target, so repeated generations reuse
+# the TCP/TLS connection instead of handshaking with ngrok every time
+upstream_sessions = {}
+upstream_sessions_lock = threading.Lock()
+
+# Backends for /api/generate: the default Ollama plus models.txt endpoints
+upstream_pool = UpstreamPool(DEFAULT_OLLAMA_URL)
+upstream_pool.load_models_file()
+
+# Priority queue and per-backend concurrency limits in front of the pool
+generation_scheduler = GenerationScheduler(upstream_pool)
+
+def get_upstream_session(url):
+    """Return the pooled requests.Session for the origin of url."""
+    parts = urlsplit(url)
+    origin = f'{parts.scheme}://{parts.netloc}'
+    with upstream_sessions_lock:
+        session = upstream_sessions.get(origin)
+        if session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=32)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            upstream_sessions[origin] = session
+        return session
 
-# Simple in-memory SSE broadcaster
-clients = []
-clients_lock = threading.Lock()
+# SSE fan-out shared by /events and /notify (and async_proxy.py)
+event_hub = EventHub()
+
+# Named events clients may relay through /notify; the rest are server-only
+RELAYED_EVENT_TYPES = ('assignment-updated',)
 
 def broadcast(message: str):
-    with clients_lock:
-        for q in list(clients):
-            try:
-                q.put(message)
-            except Exception:
-                # ignore broken clients
-                pass
+    # Repeated reloads collapse into one pending frame per client
+    event_hub.publish(message, coalesce_key=message if message == 'reload' else None)
+
+def publish_event(event_type, payload, coalesce_key=None):
+    """Send a named SSE event with a small JSON payload to every client."""
+    if coalesce_key is not None:
+        coalesce_key = (event_type, coalesce_key)
+    event_hub.publish((event_type, payload), coalesce_key=coalesce_key)
+
+def publish_presence():
+    # Only the newest count matters, so pending presence events collapse
+    publish_event('presence', {'subscribers': event_hub.stats()['subscribers']}, coalesce_key='count')
+
+def guide_event_payload(key):
+    task_name, task_description, is_advanced, model_name, guide_kind = key
+    return {
+        'task_name': task_name,
+        'task_description': task_description,
+        'is_advanced': is_advanced,
+        'model_name': model_name,
+        'guide_kind': guide_kind
+    }
+
+def publish_guide_event(event_type, key):
+    """Tell clients which cached guide changed (guide-saved / guide-deleted)."""
+    publish_event(event_type, guide_event_payload(key), coalesce_key=key)
+
+def publish_guides_saved(keys):
+    """
+    One guides-saved event listing many saved guides (bulk saves), so a
+    batch takes one slot in each subscriber's buffer instead of overflowing it.
+    """
+    publish_event('guides-saved', {'guides': [guide_event_payload(key) for key in keys]})
+
+def notify_message(text):
+    """
+    Handle a /notify body: a JSON {"type", "data"} object for a relayed
+    named event, anything else is broadcast as a plain message.
+    """
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = None
+    if isinstance(data, dict) and data.get('type') in RELAYED_EVENT_TYPES:
+        publish_event(data['type'], data.get('data') if isinstance(data.get('data'), dict) else {})
+    else:
+        broadcast(text or 'reload')
+
+
+THINK_TAG_RE = re.compile(r'<think>[\s\S]*?</think>', re.IGNORECASE)
+
+def guide_kind_from(data):
+    """Read the guide kind from a request: is_project or an explicit guide_kind."""
+    if data.get('is_project'):
+        return 'project'
+    kind = data.get('guide_kind', 'task')
+    return kind if kind in ('task', 'project') else 'task'
+
+def expand_template(body):
+    """
+    Render a templated generate request ({"prompt_template": id, "fields":
+    {"task_name", "task_description"}} instead of a prompt) into a plain one.
+    Ollama's own "template" field is not ours and is forwarded untouched.
+    Its write-through cache_key defaults to the task the template was
+    rendered for.
+    Returns: (body, 'id@version' or None for untemplated bodies, error message or None)
+    """
+    try:
+        payload = json.loads(body)
+    except (TypeError, ValueError):
+        return body, None, None
+    if not isinstance(payload, dict) or 'prompt_template' not in payload:
+        return body, None, None
+
+    template_id = payload.pop('prompt_template')
+    fields = payload.pop('fields', None)
+    if template_id not in guide_prompts.PROMPT_TEMPLATES:
+        return body, None, f"Unknown prompt template {template_id!r}"
+    if not isinstance(fields, dict) or not isinstance(fields.get('task_name'), str) or not fields['task_name']:
+        return body, None, 'fields.task_name is required'
+    task_description = fields.get('task_description') or ''
+    if not isinstance(task_description, str):
+        return body, None, 'fields.task_description must be a string'
+
+    template = guide_prompts.PROMPT_TEMPLATES[template_id]
+    payload['prompt'] = guide_prompts.render_prompt(template_id, fields['task_name'], task_description)
+    if 'cache_key' not in payload:
+        payload['cache_key'] = {
+            'task_name': fields['task_name'],
+            'task_description': task_description,
+            'is_advanced': template['is_advanced'],
+            'guide_kind': template['guide_kind']
+        }
+    return json.dumps(payload).encode('utf-8'), guide_prompts.template_ref(template_id), None
+
+def split_cache_key(body):
+    """
+    Pull the optional write-through cache_key out of a generate request body.
+    Returns: (body to forward to Ollama, normalized cache key or None)
+    """
+    try:
+        payload = json.loads(body)
+    except (TypeError, ValueError):
+        return body, None
+    if not isinstance(payload, dict) or not isinstance(payload.get('cache_key'), dict):
+        return body, None
+
+    data = payload.pop('cache_key')
+    if not data.get('task_name'):
+        return json.dumps(payload).encode('utf-8'), None
+    key = make_key(
+        data.get('task_name'),
+        data.get('task_description', ''),
+        data.get('is_advanced', False),
+        data.get('model_name') or payload.get('model', 'qwen3:8b'),
+        guide_kind_from(data)
+    )
+    return json.dumps(payload).encode('utf-8'), key
+
+def stream_text(raw):
+    """
+    Join the response text of an NDJSON stream.
+    Returns: (text, whether the final done record arrived)
+    """
+    text = []
+    complete = False
+    for line in raw.splitlines():
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(record, dict):
+            continue
+        text.append(record.get('response', ''))
+        complete = complete or bool(record.get('done'))
+    return ''.join(text), complete
+
+def extract_guide_text(raw):
+    """
+    Assemble the response text from a finished NDJSON stream.
+    Returns None unless the stream reached its final done record.
+    """
+    text, complete = stream_text(raw)
+    if not complete:
+        return None
+    return THINK_TAG_RE.sub('', text).replace('<think>', '').replace('</think>', '').strip()
+
+def partial_guide_text(raw):
+    """Text of an unfinished stream without thinking; an open <think> block is cut off."""
+    text = THINK_TAG_RE.sub('', stream_text(raw)[0])
+    start = text.lower().find('<think>')
+    if start != -1:
+        text = text[:start]
+    return text.lstrip()
+
+
+# Generations with cache keys save their text so far this often, so a
+# dropped stream can be resumed (X-Generation-Resume) instead of restarted
+CHECKPOINT_SECONDS = 5
+# Less text than this is not worth resuming from
+CHECKPOINT_MIN_CHARS = 200
+
+# Ollama's /api/generate applies the model's chat template to the prompt, so
+# a generation cannot be continued mid-answer directly; instead the model is
+# shown the answer so far and asked to carry on from its last word
+RESUME_PROMPT = '''{prompt}
+
+Part of the answer has already been written; it is between the markers below. Continue it from exactly where it stops. Do not repeat any of it and do not add an introduction.
+
+<<<ANSWER SO FAR>>>
+{prefix}
+<<<END>>>'''
+
+def resume_requested(headers):
+    return (headers.get('X-Generation-Resume') or '').strip().lower() in ('1', 'true', 'yes')
+
+def checkpoint_due(flight):
+    return bool(flight.cache_keys) and time.monotonic() - flight.checkpointed_at >= CHECKPOINT_SECONDS
+
+def checkpoint_flight(flight, keys=None):
+    """Save the flight's text so far under its cache keys (see CHECKPOINT_SECONDS)."""
+    flight.checkpointed_at = time.monotonic()
+    keys = flight.pending_cache_keys() if keys is None else keys
+    if not keys or not task_cache or flight.status != 200:
+        return
+    text = partial_guide_text(b''.join(list(flight.chunks)))
+    if len(text) < CHECKPOINT_MIN_CHARS:
+        return
+    for key in keys:
+        task_name, task_description, is_advanced, model_name, guide_kind = key
+        try:
+            task_cache.save_checkpoint(task_name, task_description, is_advanced, model_name,
+                                       flight.key[1], text, guide_kind)
+        except Exception as e:
+            print(f"Warning: checkpoint save failed for {key[0]!r}: {e}")
+
+def resume_from_checkpoint(flight, body, cache_key):
+    """
+    Start a new flight from the checkpoint saved for cache_key by the same
+    prompt: the saved text is published right away as the first record, and
+    the returned body asks Ollama for the rest.
+    Returns the body to send upstream (unchanged when there is no checkpoint).
+    """
+    if not task_cache or not cache_key:
+        return body
+    task_name, task_description, is_advanced, model_name, guide_kind = cache_key
+    try:
+        saved = task_cache.get_checkpoint(task_name, task_description, is_advanced, model_name,
+                                          flight.key[1], guide_kind)
+    except Exception as e:
+        print(f"Warning: checkpoint lookup failed for {task_name!r}: {e}")
+        return body
+    if not saved:
+        return body
+
+    prefix = saved[0]
+    payload = json.loads(body)
+    payload['prompt'] = RESUME_PROMPT.format(prompt=payload.get('prompt', ''), prefix=prefix)
+    record = {
+        'model': flight.key[0],
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'response': prefix,
+        'done': False,
+        'resumed': True
+    }
+    flight.resumed_chars = len(prefix)
+    flight.start(200, 'application/x-ndjson')
+    flight.publish((json.dumps(record) + '\n').encode('utf-8'))
+    metrics.generations_resumed.inc(model=model_label(flight))
+    return json.dumps(payload).encode('utf-8')
+
+def start_flight(flight, status, content_type):
+    """Pass the upstream status on; a resumed flight has already answered 200."""
+    if flight.status is None:
+        flight.start(status, content_type)
+    elif status != 200:
+        raise RuntimeError(f'Ollama answered HTTP {status} to the resumed generation')
+
+def write_through(flight):
+    """Save a finished generation under every cache key its clients asked for."""
+    save_generation(flight, flight.take_cache_keys())
+
+def save_generation(flight, keys):
+    """
+    Save a finished flight's guide under keys. A stream that ended without
+    its done record is checkpointed instead.
+    """
+    if not keys or not task_cache or flight.status != 200:
+        return
+    guide_content = extract_guide_text(b''.join(flight.chunks))
+    if not guide_content:
+        checkpoint_flight(flight, keys)
+        return
+    # Shares a commit with the other generations finishing right now
+    try:
+        task_cache.group_save(
+            (task_name, task_description, is_advanced, model_name, guide_content, guide_kind)
+            for task_name, task_description, is_advanced, model_name, guide_kind in keys
+        )
+    except Exception as e:
+        print(f"Warning: write-through save failed for {next(iter(keys))[0]!r}: {e}")
+        return
+    for key in keys:
+        invalidate_guide(key)
+        publish_guide_event('guide-saved', key)
+
+
+def model_label(flight):
+    return str(flight.key[0] or 'unknown')
+
+def record_generation_speed(flight):
+    """Observe the tokens/second Ollama reports in its final done record."""
+    tail = b''.join(flight.chunks[-4:]).strip().rsplit(b'\n', 1)[-1]
+    try:
+        record = json.loads(tail)
+    except ValueError:
+        return
+    if not isinstance(record, dict):
+        return
+    eval_count = record.get('eval_count')
+    eval_duration = record.get('eval_duration')
+    if record.get('done') and eval_count and eval_duration:
+        # eval_duration is in nanoseconds
+        metrics.upstream_tokens_per_second.observe(eval_count / (eval_duration / 1e9), model=model_label(flight))
+
+def stream_to_client(flight):
+    """Follow a flight for one browser, counting the bytes sent."""
+    for chunk in flight.iter_chunks():
+        metrics.stream_bytes_sent.inc(len(chunk))
+        yield chunk
+
+
+def request_priority(headers, cache_key):
+    """
+    Scheduling class from X-Generation-Priority. Without it, guide fan-out
+    (requests carrying a cache_key) is 'assignment', anything else is
+    'interactive'.
+    """
+    default = 'assignment' if cache_key else 'interactive'
+    return normalize_priority(headers.get('X-Generation-Priority'), default)
+
+
+def upstream_failed(flight, backend, error, down=False):
+    """Book a failed connection attempt; down=True also takes the backend out."""
+    upstream_pool.release(backend, error=error, down=down)
+    metrics.upstream_errors.inc(model=model_label(flight))
+
+def upstream_connected(flight, backend, started):
+    """Book the first byte from backend (started: time.perf_counter() at connect)."""
+    elapsed = time.perf_counter() - started
+    upstream_pool.first_byte(backend, elapsed)
+    metrics.upstream_ttft_seconds.observe(elapsed, model=model_label(flight))
+
+def publish_upstream_chunk(flight, chunk):
+    """Pass one upstream chunk to the flight. Returns True when a checkpoint is due."""
+    metrics.upstream_bytes.inc(len(chunk), model=model_label(flight))
+    flight.publish(chunk)
+    return checkpoint_due(flight)
+
+def complete_generation(flight):
+    """The upstream stream ended: save the guide, then release the flight's clients."""
+    record_generation_speed(flight)
+    # Save before finishing so clients that re-read the cache see the guide
+    write_through(flight)
+    generation_flights.finish(flight)
+
+def fail_generation(flight, error):
+    """The upstream stream broke off midway."""
+    metrics.upstream_errors.inc(model=model_label(flight))
+    # Keep what arrived so a retry with X-Generation-Resume can pick it up
+    checkpoint_flight(flight)
+    generation_flights.finish(flight, error=error)
+
+
+def open_upstream(flight, body):
+    """
+    Connect to the backend the scheduler admitted the flight to. While
+    nothing has been received yet, connection errors and 5xx answers fail
+    over to the next backend (see GenerationScheduler.attempts).
+    Returns: (backend, response, first chunk, remaining chunk iterator)
+    """
+    headers = {'Content-Type': 'application/json'}
+    last_error = None
+    for backend, has_fallback in generation_scheduler.attempts(flight.ticket):
+        if backend is None:
+            generation_scheduler.wait(flight.ticket)
+            continue
+        started = time.perf_counter()
+        upstream_pool.acquire(backend)
+        try:
+            session = get_upstream_session(backend.generate_url)
+            r = session.post(backend.generate_url, headers=headers, data=body, stream=True, timeout=UPSTREAM_TIMEOUT)
+        except requests.RequestException as e:
+            upstream_failed(flight, backend, str(e), down=True)
+            last_error = e
+            continue
+        if r.status_code >= 500 and has_fallback:
+            r.close()
+            upstream_failed(flight, backend, f'HTTP {r.status_code}')
+            continue
+        try:
+            chunks = (chunk for chunk in r.iter_content(chunk_size=4096) if chunk)
+            first = next(chunks, b'')
+        except requests.RequestException as e:
+            r.close()
+            upstream_failed(flight, backend, str(e), down=True)
+            last_error = e
+            continue
+        upstream_connected(flight, backend, started)
+        return backend, r, first, chunks
+    raise last_error or requests.ConnectionError('No Ollama backend available')
+
+
+def pump_generation(flight, body):
+    """
+    Forward one generation to Ollama and feed its stream into flight.
+    Runs in its own thread so the upstream call outlives any single client.
+    Waits for the scheduler to admit the flight before connecting.
+    """
+    generation_scheduler.wait(flight.ticket)
+    try:
+        backend, r, first, chunks = open_upstream(flight, body)
+    except requests.RequestException as e:
+        generation_scheduler.release(flight.ticket)
+        generation_flights.finish(flight, error=str(e))
+        return
+
+    error = None
+    try:
+        start_flight(flight, r.status_code, r.headers.get('Content-Type', 'application/x-ndjson'))
+        for chunk in itertools.chain([first] if first else [], chunks):
+            if publish_upstream_chunk(flight, chunk):
+                checkpoint_flight(flight)
+        complete_generation(flight)
+    except Exception as e:
+        error = str(e)
+        fail_generation(flight, error)
+    finally:
+        r.close()
+        upstream_pool.release(backend, error=error)
+        generation_scheduler.release(flight.ticket)
 
 
 @app.route('/api/generate', methods=['POST', 'OPTIONS'])
@@ -38,63 +483,80 @@ def proxy_generate():
         resp.headers['Access-Control-Allow-Origin'] = '*'
         resp.headers['Access-Control-Allow-Methods'] = 'POST, OPTIONS'
         # Allow common headers used by the client
-        resp.headers['Access-Control-Allow-Headers'] = 'Content-Type, Accept, X-Ollama-Target'
+        resp.headers['Access-Control-Allow-Headers'] = ('Content-Type, Accept, X-Ollama-Target, X-Generation-Priority, '
+                                                        'X-Generation-Id, X-Generation-Resume')
         return resp
 
-    # Check if custom target URL is provided in headers
-    custom_target = request.headers.get('X-Ollama-Target')
-    
-    if custom_target:
-        # Use custom target (e.g., ngrok URL)
-        ollama_url = f"{custom_target}/api/generate"
-    else:
-        # Use default local Ollama
-        ollama_url = DEFAULT_OLLAMA_URL
+    # X-Ollama-Target names a preferred backend; the pool may fail over
+    preferred = upstream_pool.resolve_target(request.headers.get('X-Ollama-Target'))
+    body, template, error = expand_template(request.get_data())
+    if error:
+        resp = jsonify({'error': error})
+        resp.headers['Access-Control-Allow-Origin'] = '*'
+        return resp, 400
+    body, cache_key = split_cache_key(body)
+    priority = request_priority(request.headers, cache_key)
+    # Optional client-chosen id for looking up queue position in /api/generate/queue
+    client_id = request.headers.get('X-Generation-Id')
 
-    # Forward POST body and headers to Ollama
-    headers = {'Content-Type': 'application/json'}
+    # Identical generations already in flight are shared instead of re-run
+    key = generation_key(body, template)
     try:
-        r = requests.post(ollama_url, headers=headers, data=request.get_data(), stream=True, timeout=30)
-    except requests.RequestException as e:
-        return Response(str(e), status=502)
+        flight, is_leader = generation_flights.join(
+            key, lambda: generation_scheduler.submit(key[0], priority, preferred, client_id))
+    except QueueFull as e:
+        resp = Response(str(e), status=503)
+        resp.headers['Access-Control-Allow-Origin'] = '*'
+        resp.headers['Retry-After'] = '5'
+        return resp
+    if cache_key and not flight.add_cache_key(cache_key):
+        # Joined after the leader's final save: the stream is complete, save it here
+        save_generation(flight, {cache_key})
+    if is_leader:
+        # X-Generation-Resume: continue from the checkpoint of a dropped attempt
+        if resume_requested(request.headers):
+            body = resume_from_checkpoint(flight, body, cache_key)
+        threading.Thread(target=pump_generation, args=(flight, body), daemon=True).start()
+    else:
+        generation_scheduler.promote(flight.ticket, priority, client_id)
 
-    # Stream response back to client, preserving ndjson content-type
-    def generate():
-        try:
-            for chunk in r.iter_content(chunk_size=4096):
-                if chunk:
-                    yield chunk
-        finally:
-            r.close()
+    if not flight.wait_started():
+        return Response(flight.error or 'Upstream request failed', status=502)
 
-    resp = Response(stream_with_context(generate()), status=r.status_code, content_type=r.headers.get('Content-Type', 'application/x-ndjson'))
+    # Stream response back to client, preserving ndjson content-type
+    resp = Response(stream_with_context(stream_to_client(flight)), status=flight.status, content_type=flight.content_type)
     resp.headers['Access-Control-Allow-Origin'] = '*'
+    if cache_key:
+        resp.headers['X-Guide-Cache'] = 'write-through'
+    if flight.resumed_chars:
+        resp.headers['X-Generation-Resumed'] = str(flight.resumed_chars)
+    if template:
+        resp.headers['X-Prompt-Template'] = template
     return resp
 
 
 @app.route('/events', methods=['GET'])
 def sse_events():
-    # Server-Sent Events endpoint. When a new client connects, notify other clients to reload
-    q = queue.Queue()
-
-    with clients_lock:
-        # notify existing clients that a new client connected
-        broadcast('reload')
-        clients.append(q)
+    # Server-Sent Events endpoint. Clients get named events for what changed;
+    # connects and disconnects only update the presence count
+    subscriber = event_hub.subscribe()
+    publish_presence()
 
     def stream():
         try:
             # Send a comment to keep connection alive initially
             yield ': connected\n\n'
             while True:
-                msg = q.get()
-                # SSE data frame
-                yield f'data: {msg}\n\n'
+                messages = subscriber.wait()
+                if not messages:
+                    # Heartbeat; writing to a dead peer ends this generator
+                    yield HEARTBEAT_FRAME
+                for msg in messages:
+                    yield format_frame(msg)
         finally:
             # Clean up on client disconnect
-            with clients_lock:
-                if q in clients:
-                    clients.remove(q)
+            event_hub.unsubscribe(subscriber)
+            publish_presence()
 
     headers = {
         'Content-Type': 'text/event-stream',
@@ -108,9 +570,168 @@ def sse_events():
 @app.route('/notify', methods=['POST'])
 def notify():
     # Manual trigger to broadcast a message to all connected clients
-    msg = request.get_data(as_text=True) or 'reload'
-    broadcast(msg)
-    return ('', 204)
+    notify_message(request.get_data(as_text=True))
+    return ('', 204, {'Access-Control-Allow-Origin': '*'})
+
+
+def lookup_stored_guide(key):
+    """
+    Find a guide in the in-memory LRU, falling back to SQLite.
+    Returns the stored row (content, encoding, created_at, updated_at) or None.
+    """
+    result = guide_lru.get(key)
+    if result is not None:
+        metrics.guide_lookups.inc(result='memory')
+        task_cache.note_access([key])
+        return result
+    token = guide_lru.token(key)
+    result = task_cache.get_stored_guide(*key)
+    if result:
+        guide_lru.put(key, result, token)
+        task_cache.note_access([key])
+    metrics.guide_lookups.inc(result='sqlite' if result else 'miss')
+    return result
+
+
+def html_key(key):
+    """LRU key of a guide's HTML rendering (kept next to the markdown row)."""
+    return key + ('html',)
+
+
+def invalidate_guides(keys):
+    """
+    Drop guides' markdown and HTML rows from the LRU after a write, here
+    and (under serve.py) in every other worker process.
+    """
+    keys = list(keys)
+    for key in keys:
+        guide_lru.invalidate(key)
+        guide_lru.invalidate(html_key(key))
+    if keys:
+        event_hub.relay_op({'op': 'invalidate', 'keys': keys})
+
+
+def invalidate_guide(key):
+    invalidate_guides([key])
+
+
+def clear_guides():
+    """Empty the LRU in every worker process (after bulk writes like an import)."""
+    guide_lru.clear()
+    event_hub.relay_op({'op': 'invalidate', 'all': True})
+
+
+def apply_relayed_invalidation(frame):
+    """Invalidation from another worker (see invalidate_guides)."""
+    if frame.get('all'):
+        guide_lru.clear()
+        return
+    for key in frame.get('keys', []):
+        key = tuple(key)
+        guide_lru.invalidate(key)
+        guide_lru.invalidate(html_key(key))
+
+event_hub.add_relay_handler('invalidate', apply_relayed_invalidation)
+
+
+def lookup_rendered_guide(key):
+    """
+    Like lookup_stored_guide, for the stored HTML rendering.
+    Returns (html, encoding, created_at, updated_at) or None.
+    """
+    result = guide_lru.get(html_key(key))
+    if result is not None:
+        metrics.guide_lookups.inc(result='memory')
+        task_cache.note_access([key])
+        return result
+    token = guide_lru.token(html_key(key))
+    result = task_cache.get_rendered_guide(*key)
+    if result:
+        guide_lru.put(html_key(key), result, token)
+        task_cache.note_access([key])
+    metrics.guide_lookups.inc(result='sqlite' if result else 'miss')
+    return result
+
+
+def forget_retained(result):
+    """Drop the guides task_cache retention removed from the in-memory LRU."""
+    invalidate_guides(make_key(*key) for key in result['expired'] + result['evicted'])
+    for reason in ('expired', 'evicted'):
+        metrics.guides_retired.inc(len(result[reason]), reason=reason)
+
+
+def start_cache_maintenance():
+    """Start access-time flushing and retention (retention.txt) for this process."""
+    if task_cache:
+        task_cache.start_maintenance(on_evict=forget_retained)
+
+
+def guide_etag(stored):
+    """Content hash of a stored guide, used as its HTTP ETag."""
+    if isinstance(stored, str):
+        stored = stored.encode('utf-8')
+    return hashlib.sha256(stored).hexdigest()[:32]
+
+
+def parse_db_timestamp(value):
+    """Parse a SQLite CURRENT_TIMESTAMP string (UTC) into an aware datetime."""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+    except (TypeError, ValueError):
+        return None
+
+
+@app.route('/api/cache/guide', methods=['GET'])
+def get_cache_guide():
+    """
+    Cached guide as a plain markdown resource (GET, query-string key).
+    With format=html, the sanitized server-side HTML rendering instead.
+    Compressed rows are sent as stored to clients accepting deflate.
+    """
+    if not task_cache:
+        return jsonify({'error': 'Cache not available'}), 503
+    
+    args = request.args
+    key = make_key(
+        args.get('task_name'),
+        args.get('task_description', ''),
+        args.get('is_advanced', 'false').lower() in ('1', 'true'),
+        args.get('model_name', 'qwen3:8b'),
+        guide_kind_from({
+            'is_project': args.get('is_project', 'false').lower() in ('1', 'true'),
+            'guide_kind': args.get('guide_kind', 'task')
+        })
+    )
+    as_html = args.get('format') == 'html'
+    result = lookup_rendered_guide(key) if as_html else lookup_stored_guide(key)
+    if not result:
+        resp = Response('Not cached', status=404, content_type='text/plain; charset=utf-8')
+        resp.headers['Access-Control-Allow-Origin'] = '*'
+        return resp
+    
+    stored, encoding, created_at, updated_at = result
+    content_type = 'text/html; charset=utf-8' if as_html else 'text/markdown; charset=utf-8'
+    etag = guide_etag(stored)
+    if encoding == task_cache.ENCODING_ZLIB and 'deflate' in request.headers.get('Accept-Encoding', ''):
+        resp = Response(stored, content_type=content_type)
+        resp.headers['Content-Encoding'] = 'deflate'
+        etag += '-deflate'
+    else:
+        resp = Response(task_cache.decode_content(stored, encoding), content_type=content_type)
+    if as_html:
+        resp.headers['X-Guide-Renderer-Version'] = str(task_cache.RENDERER_VERSION)
+    resp.set_etag(etag)
+    last_modified = parse_db_timestamp(updated_at or created_at)
+    if last_modified:
+        resp.last_modified = last_modified
+    # Let the browser keep a copy but revalidate it on every use
+    resp.headers['Cache-Control'] = 'no-cache'
+    resp.headers['Vary'] = 'Accept-Encoding'
+    resp.headers['X-Guide-Created-At'] = created_at
+    resp.headers['Access-Control-Allow-Origin'] = '*'
+    resp.headers['Access-Control-Expose-Headers'] = 'X-Guide-Created-At, X-Guide-Renderer-Version, ETag, Last-Modified'
+    # Answers If-None-Match / If-Modified-Since with 304 Not Modified
+    return resp.make_conditional(request)
 
 
 @app.route('/api/cache/get', methods=['POST', 'OPTIONS'])
@@ -131,15 +752,16 @@ def get_cache():
     task_description = data.get('task_description', '')
     is_advanced = data.get('is_advanced', False)
     model_name = data.get('model_name', 'qwen3:8b')
+    guide_kind = guide_kind_from(data)
     
-    result = task_cache.get_cached_guide(task_name, task_description, is_advanced, model_name)
+    result = lookup_stored_guide(make_key(task_name, task_description, is_advanced, model_name, guide_kind))
     
     resp_data = {}
     if result:
         resp_data = {
             'found': True,
-            'guide_content': result[0],
-            'created_at': result[1]
+            'guide_content': task_cache.decode_content(result[0], result[1]),
+            'created_at': result[2]
         }
     else:
         resp_data = {'found': False}
@@ -149,6 +771,81 @@ def get_cache():
     return resp
 
 
+@app.route('/api/cache/get_many', methods=['POST', 'OPTIONS'])
+def get_cache_many():
+    """
+    Get cached guides for a list of tasks in one round trip.
+    With include_content=false only presence is reported, so the client
+    can fetch hits through the cacheable GET /api/cache/guide.
+    Entries that are not objects are skipped and reported as not found,
+    so results stay aligned with keys.
+    """
+    if request.method == 'OPTIONS':
+        resp = Response()
+        resp.headers['Access-Control-Allow-Origin'] = '*'
+        resp.headers['Access-Control-Allow-Methods'] = 'POST, OPTIONS'
+        resp.headers['Access-Control-Allow-Headers'] = 'Content-Type'
+        return resp
+    
+    if not task_cache:
+        return jsonify({'error': 'Cache not available'}), 503
+    
+    data = request.get_json(silent=True) or {}
+    items = data.get('keys', []) if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        return jsonify({'error': 'keys must be a list'}), 400
+    include_content = data.get('include_content', True)
+    keys = []
+    for item in items:
+        if not isinstance(item, dict):
+            keys.append(None)
+            continue
+        keys.append(make_key(
+            item.get('task_name'),
+            item.get('task_description', ''),
+            item.get('is_advanced', False),
+            item.get('model_name', 'qwen3:8b'),
+            guide_kind_from(item)
+        ))
+    
+    # Serve what we can from memory, fetch the rest with one query
+    cached = {key: guide_lru.get(key) for key in set(keys) if key is not None}
+    missing = [key for key, value in cached.items() if value is None]
+    metrics.guide_lookups.inc(len(cached) - len(missing), result='memory')
+    if missing:
+        tokens = {key: guide_lru.token(key) for key in missing}
+        rows = task_cache.get_stored_guides(missing)
+        for key in missing:
+            result = rows.get((key[0], key[1], int(key[2]), key[3], key[4]))
+            if result:
+                guide_lru.put(key, result, tokens[key])
+                cached[key] = result
+        metrics.guide_lookups.inc(len(rows), result='sqlite')
+        metrics.guide_lookups.inc(len(missing) - len(rows), result='miss')
+    # Presence probes (app.js prefetch, populator coverage scans) are not
+    # reads; counting them would keep unread guides from ever aging out
+    if include_content:
+        task_cache.note_access(key for key, value in cached.items() if value is not None)
+    
+    results = []
+    for key in keys:
+        result = cached.get(key)
+        if result and include_content:
+            results.append({
+                'found': True,
+                'guide_content': task_cache.decode_content(result[0], result[1]),
+                'created_at': result[2]
+            })
+        elif result:
+            results.append({'found': True, 'created_at': result[2]})
+        else:
+            results.append({'found': False})
+    
+    resp = jsonify({'results': results})
+    resp.headers['Access-Control-Allow-Origin'] = '*'
+    return resp
+
+
 @app.route('/api/cache/save', methods=['POST', 'OPTIONS'])
 def save_cache():
     """Save guide to cache."""
@@ -168,14 +865,71 @@ def save_cache():
     is_advanced = data.get('is_advanced', False)
     model_name = data.get('model_name', 'qwen3:8b')
     guide_content = data.get('guide_content')
+    guide_kind = guide_kind_from(data)
     
-    task_cache.save_guide(task_name, task_description, is_advanced, model_name, guide_content)
+    key = make_key(task_name, task_description, is_advanced, model_name, guide_kind)
+    task_cache.group_save([(task_name, task_description, is_advanced, model_name, guide_content, guide_kind)])
+    invalidate_guide(key)
+    publish_guide_event('guide-saved', key)
     
     resp = jsonify({'success': True})
     resp.headers['Access-Control-Allow-Origin'] = '*'
     return resp
 
 
+# One request is one transaction; bigger uploads should be split
+SAVE_MANY_MAX_GUIDES = 1000
+
+
+@app.route('/api/cache/save_many', methods=['POST', 'OPTIONS'])
+def save_cache_many():
+    """
+    Save a list of guides (same fields as /api/cache/save) in one transaction.
+    Entries without a task_name or guide_content are skipped.
+    """
+    if request.method == 'OPTIONS':
+        resp = Response()
+        resp.headers['Access-Control-Allow-Origin'] = '*'
+        resp.headers['Access-Control-Allow-Methods'] = 'POST, OPTIONS'
+        resp.headers['Access-Control-Allow-Headers'] = 'Content-Type'
+        return resp
+    
+    if not task_cache:
+        return jsonify({'error': 'Cache not available'}), 503
+    
+    data = request.get_json(silent=True) or {}
+    items = data.get('guides')
+    if not isinstance(items, list):
+        return jsonify({'error': 'guides must be a list'}), 400
+    if len(items) > SAVE_MANY_MAX_GUIDES:
+        return jsonify({'error': f'at most {SAVE_MANY_MAX_GUIDES} guides per request'}), 400
+    
+    guides = []
+    for item in items:
+        if not isinstance(item, dict) or not item.get('task_name') or not isinstance(item.get('guide_content'), str):
+            continue
+        key = make_key(
+            item['task_name'],
+            item.get('task_description', ''),
+            item.get('is_advanced', False),
+            item.get('model_name', 'qwen3:8b'),
+            guide_kind_from(item)
+        )
+        guides.append((key, item['guide_content']))
+    
+    task_cache.group_save(
+        (task_name, task_description, is_advanced, model_name, guide_content, guide_kind)
+        for (task_name, task_description, is_advanced, model_name, guide_kind), guide_content in guides
+    )
+    invalidate_guides(key for key, _ in guides)
+    if guides:
+        publish_guides_saved([key for key, _ in guides])
+    
+    resp = jsonify({'success': True, 'saved': len(guides), 'skipped': len(items) - len(guides)})
+    resp.headers['Access-Control-Allow-Origin'] = '*'
+    return resp
+
+
 @app.route('/api/cache/delete', methods=['POST', 'OPTIONS'])
 def delete_cache():
     """Delete cached guide (for regeneration)."""
@@ -194,8 +948,12 @@ def delete_cache():
     task_description = data.get('task_description', '')
     is_advanced = data.get('is_advanced', False)
     model_name = data.get('model_name', 'qwen3:8b')
+    guide_kind = guide_kind_from(data)
     
-    task_cache.delete_guide(task_name, task_description, is_advanced, model_name)
+    key = make_key(task_name, task_description, is_advanced, model_name, guide_kind)
+    task_cache.delete_guide(task_name, task_description, is_advanced, model_name, guide_kind)
+    invalidate_guide(key)
+    publish_guide_event('guide-deleted', key)
     
     resp = jsonify({'success': True})
     resp.headers['Access-Control-Allow-Origin'] = '*'
@@ -209,10 +967,211 @@ def cache_stats():
         return jsonify({'error': 'Cache not available'}), 503
     
     stats = task_cache.get_cache_stats()
+    stats['memory_cache'] = guide_lru.stats()
+    stats['events'] = event_hub.stats()
+    stats['group_commit'] = task_cache.group_commit_stats()
     resp = jsonify(stats)
     resp.headers['Access-Control-Allow-Origin'] = '*'
     return resp
 
 
+@app.route('/api/cache/search', methods=['GET'])
+def search_cache():
+    """
+    Ranked full-text search over cached guides.
+    Query: q, optional model_name / guide_kind / is_advanced filters, limit, offset.
+    """
+    if not task_cache:
+        return jsonify({'error': 'Cache not available'}), 503
+    if not task_cache.search_available:
+        return jsonify({'error': 'Search not available'}), 503
+
+    args = request.args
+    is_advanced = args.get('is_advanced')
+    try:
+        limit = int(args.get('limit', task_cache.SEARCH_PAGE_SIZE))
+        offset = int(args.get('offset', 0))
+    except ValueError:
+        return jsonify({'error': 'limit and offset must be integers'}), 400
+
+    found = task_cache.search_guides(
+        args.get('q', ''),
+        model_name=args.get('model_name') or None,
+        guide_kind=args.get('guide_kind') or None,
+        is_advanced=is_advanced.lower() in ('1', 'true') if is_advanced else None,
+        limit=limit,
+        offset=offset
+    )
+    limit = max(1, min(limit, task_cache.SEARCH_MAX_PAGE_SIZE))
+    offset = max(0, offset)
+    found['limit'] = limit
+    found['offset'] = offset
+    found['next_offset'] = offset + limit if offset + limit < found['total'] else None
+    resp = jsonify(found)
+    resp.headers['Access-Control-Allow-Origin'] = '*'
+    return resp
+
+
+
+EXPORT_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}( \d{2}:\d{2}:\d{2})?$')
+
+def export_filters_from(args):
+    """
+    Read model_name, mode, since and until from query args.
+    Returns: (filters for task_cache.iter_export_chunks, error message or None)
+    """
+    mode = args.get('mode') or None
+    if mode and mode not in task_cache.EXPORT_MODES:
+        return None, f"mode must be one of {', '.join(task_cache.EXPORT_MODES)}"
+    for name in ('since', 'until'):
+        if args.get(name) and not EXPORT_DATE_RE.match(args[name]):
+            return None, f'{name} must be YYYY-MM-DD or YYYY-MM-DD HH:MM:SS'
+    return {
+        'model_name': args.get('model_name') or None,
+        'mode': mode,
+        'since': args.get('since') or None,
+        'until': args.get('until') or None
+    }, None
+
+
+EXPORT_HEADERS = {
+    'Content-Type': 'application/gzip',
+    'Content-Disposition': 'attachment; filename="guides.ndjson.gz"',
+    'Access-Control-Allow-Origin': '*'
+}
+
+
+@app.route('/api/cache/export', methods=['GET'])
+def export_cache():
+    """
+    Stream guides as gzip'd NDJSON (one guide per line).
+    Query: optional model_name, mode (normal/advanced/project), since, until.
+    """
+    if not task_cache:
+        return jsonify({'error': 'Cache not available'}), 503
+    filters, error = export_filters_from(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+    return Response(task_cache.iter_export_chunks(**filters), headers=EXPORT_HEADERS)
+
+
+@app.route('/api/cache/import', methods=['POST', 'OPTIONS'])
+def import_cache():
+    """
+    Load an export (gzip'd or plain NDJSON request body) into the cache.
+    Existing guides are only replaced by newer ones unless ?replace=1.
+    """
+    if request.method == 'OPTIONS':
+        resp = Response()
+        resp.headers['Access-Control-Allow-Origin'] = '*'
+        resp.headers['Access-Control-Allow-Methods'] = 'POST, OPTIONS'
+        resp.headers['Access-Control-Allow-Headers'] = 'Content-Type'
+        return resp
+
+    if not task_cache:
+        return jsonify({'error': 'Cache not available'}), 503
+
+    replace = request.args.get('replace', '').lower() in ('1', 'true')
+    try:
+        counts = task_cache.import_guides(request.stream, replace=replace)
+    except (OSError, EOFError, zlib.error) as e:
+        return jsonify({'error': f'Unreadable import: {e}'}), 400
+    # Too many keys to invalidate one by one; the LRU refills on demand
+    clear_guides()
+
+    resp = jsonify(counts)
+    resp.headers['Access-Control-Allow-Origin'] = '*'
+    return resp
+
+sse_subscribers_gauge = metrics.REGISTRY.gauge(
+    'groupapp_sse_subscribers', 'Connected /events subscribers.')
+generations_in_flight_gauge = metrics.REGISTRY.gauge(
+    'groupapp_generations_in_flight', 'Upstream generations currently streaming.')
+generations_gauge = metrics.REGISTRY.gauge(
+    'groupapp_generations', 'Generation requests since start, by whether they started or joined a flight.', ('outcome',))
+memory_cache_gauge = metrics.REGISTRY.gauge(
+    'groupapp_memory_cache', 'In-memory guide LRU counters (hits, misses, evictions, entries, bytes, hit_ratio).', ('stat',))
+
+upstream_in_flight_gauge = metrics.REGISTRY.gauge(
+    'groupapp_upstream_in_flight', 'Generations in flight per Ollama backend.', ('backend',))
+upstream_healthy_gauge = metrics.REGISTRY.gauge(
+    'groupapp_upstream_healthy', '1 if the Ollama backend passed its last check.', ('backend',))
+generation_queue_gauge = metrics.REGISTRY.gauge(
+    'groupapp_generation_queue', 'Generations waiting for or holding an upstream slot, by priority class.', ('priority', 'state'))
+
+def collect_gauges():
+    sse_subscribers_gauge.set(event_hub.stats()['subscribers'])
+    flights = generation_flights.stats()
+    generations_in_flight_gauge.set(flights['in_flight'])
+    generations_gauge.set(flights['started'], outcome='started')
+    generations_gauge.set(flights['coalesced'], outcome='coalesced')
+    for stat, value in guide_lru.stats().items():
+        memory_cache_gauge.set(value, stat=stat)
+    for backend in upstream_pool.stats():
+        upstream_in_flight_gauge.set(backend['in_flight'], backend=backend['url'])
+        upstream_healthy_gauge.set(int(backend['healthy']), backend=backend['url'])
+    queue = generation_scheduler.status()
+    for priority, depth in queue['depth'].items():
+        generation_queue_gauge.set(depth, priority=priority, state='waiting')
+        generation_queue_gauge.set(queue['running'][priority], priority=priority, state='running')
+
+metrics.REGISTRY.add_collector(collect_gauges)
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_latency(resp):
+    started = g.get('request_started')
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.http_request_seconds.observe(
+            time.perf_counter() - started, route=route, method=request.method, status=resp.status_code)
+    return resp
+
+
+@app.route('/api/upstreams', methods=['GET'])
+def upstream_status():
+    """Health, load and models of every Ollama backend."""
+    resp = jsonify({'backends': upstream_pool.stats()})
+    resp.headers['Access-Control-Allow-Origin'] = '*'
+    return resp
+
+
+@app.route('/api/prompt-templates', methods=['GET'])
+def prompt_templates():
+    """Prompt templates /api/generate accepts as {"prompt_template": id, "fields": {...}}."""
+    templates = {
+        template_id: {
+            'version': template['version'],
+            'guide_kind': template['guide_kind'],
+            'is_advanced': template['is_advanced']
+        }
+        for template_id, template in guide_prompts.PROMPT_TEMPLATES.items()
+    }
+    resp = jsonify({'templates': templates})
+    resp.headers['Access-Control-Allow-Origin'] = '*'
+    return resp
+
+
+@app.route('/api/generate/queue', methods=['GET'])
+def generation_queue_status():
+    """Queue depth per priority class and positions; ?id= picks out one X-Generation-Id."""
+    resp = jsonify(generation_scheduler.status(request.args.get('id')))
+    resp.headers['Access-Control-Allow-Origin'] = '*'
+    return resp
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus text-format metrics."""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+
 if __name__ == '__main__':
+    upstream_pool.start_health_checks()
+    start_cache_maintenance()
     app.run(host='0.0.0.0', port=8001)
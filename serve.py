@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Production serving mode: several async_proxy worker processes behind shared
+listening sockets, plus the front-end files, under one master process.
+
+The master binds the sockets and forks the workers; the kernel spreads new
+connections across them. Workers import the app only after the fork, so each
+has its own SQLite connections, threads and event loop, and a reload picks
+up new code. The master also relays SSE traffic: every worker publishes to
+it and it echoes each frame to all workers, so a /notify or guide-saved
+event handled by one worker reaches subscribers connected to any of them.
+Cache invalidations travel the same way, so no worker keeps serving a guide
+from its in-memory LRU after another worker saved, deleted or evicted it.
+Every worker flushes its own guide access counts, but only one at a time
+runs the retention sweep (task_cache holds a lock file for it).
+
+The per-backend slot limits (generation_scheduler.SLOTS_PER_BACKEND, of
+which BACKGROUND_SLOTS_PER_BACKEND may go to background work) hold for the
+whole server: each slot is a lock file in a directory the master creates,
+so workers take slots from the same set. Priority order applies within a
+worker; across workers the first to find a free slot gets it. Generation
+coalescing is per worker: identical generations that reach different
+workers each make their own upstream call.
+
+Run:     python3 serve.py --workers 4 --bind 0.0.0.0:8001 --bind 10.207.20.29:8000
+Reload:  kill -HUP <master pid>   (new workers start, old ones finish their requests)
+Stop:    kill -TERM <master pid>
+"""
+
+import argparse
+import json
+import os
+import selectors
+import signal
+import shutil
+import socket
+import sys
+import tempfile
+import time
+
+# Stdlib-only module, safe to import before forking
+from event_hub import encode_relay_frame
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BINDS = ['0.0.0.0:8001']
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+# Seconds a retiring worker gets to finish streaming generations
+SHUTDOWN_TIMEOUT = 120
+# Workers that die sooner than this after starting are restarted with a delay
+MIN_WORKER_LIFETIME = 5
+RESPAWN_DELAY = 2
+LISTEN_BACKLOG = 1024
+
+
+def parse_bind(value):
+    host, _, port = value.rpartition(':')
+    if not host or not port.isdigit():
+        raise argparse.ArgumentTypeError(f'expected HOST:PORT, got {value!r}')
+    return host, int(port)
+
+
+def listen(host, port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(LISTEN_BACKLOG)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(sockets, channel, slot_dir):
+    """Body of a worker process (never returns)."""
+    # Drop the master's handlers; run_app installs its own for SIGINT/SIGTERM
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+
+    from aiohttp import web
+
+    import async_proxy
+    import proxy
+    from event_hub import SocketRelay
+    from generation_scheduler import SharedSlots
+
+    relay = SocketRelay(channel)
+    proxy.event_hub.attach_relay(relay)
+    proxy.generation_scheduler.shared_slots = SharedSlots(slot_dir)
+
+    async def announce_ready(app):
+        relay.send({'op': 'ready'})
+
+    app = async_proxy.create_app(static_root=ROOT_DIR)
+    app.on_startup.append(announce_ready)
+    web.run_app(app, sock=sockets, shutdown_timeout=SHUTDOWN_TIMEOUT, print=None)
+    os._exit(0)
+
+
+class Worker:
+    def __init__(self, pid, channel, generation):
+        self.pid = pid
+        self.channel = channel
+        self.generation = generation
+        self.started = time.monotonic()
+        self.ready = False
+        self.retiring = False
+        self.buffer = b''
+        self.subscribers = 0
+        self.channel_open = True
+
+
+class Master:
+    """Forks and supervises workers and relays their SSE frames."""
+
+    def __init__(self, sockets, workers):
+        self.sockets = sockets
+        self.size = workers
+        self.workers = {}
+        self.generation = 0
+        self.selector = selectors.DefaultSelector()
+        self.stopping = False
+        self.reload_requested = False
+        self.respawn_at = 0
+        # Lock files of the backend slots shared by all workers (see SharedSlots)
+        self.slot_dir = tempfile.mkdtemp(prefix='groupapp-slots-')
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._wakeup_r.setblocking(False)
+        self._wakeup_w.setblocking(False)
+
+    # --- process management -------------------------------------------------
+
+    def spawn(self):
+        parent_end, child_end = socket.socketpair()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                signal.set_wakeup_fd(-1)
+                self.selector.close()
+                self._wakeup_r.close()
+                self._wakeup_w.close()
+                parent_end.close()
+                for worker in self.workers.values():
+                    worker.channel.close()
+                run_worker(self.sockets, child_end, self.slot_dir)
+            except BaseException as e:
+                print(f"Warning: worker {os.getpid()} failed: {e!r}", file=sys.stderr)
+            finally:
+                os._exit(1)
+        child_end.close()
+        worker = Worker(pid, parent_end, self.generation)
+        self.workers[pid] = worker
+        self.selector.register(parent_end, selectors.EVENT_READ, worker)
+        # Tell the newcomer how many subscribers the others already have
+        for other in self.workers.values():
+            if other is not worker and other.subscribers:
+                self._send(worker, {'op': 'subscribers', 'worker': other.pid, 'count': other.subscribers})
+        return worker
+
+    def current(self):
+        return [w for w in self.workers.values() if w.generation == self.generation]
+
+    def start_reload(self):
+        self.generation += 1
+        print(f"Reloading: starting {self.size} generation-{self.generation} workers")
+        for _ in range(self.size):
+            self.spawn()
+
+    def finish_reload(self):
+        """Retire older workers once the whole new generation is ready."""
+        current = self.current()
+        if len(current) < self.size or not all(w.ready for w in current):
+            return
+        for worker in self.workers.values():
+            if worker.generation < self.generation and not worker.retiring:
+                worker.retiring = True
+                self._signal(worker, signal.SIGTERM)
+
+    def reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            worker = self.workers.pop(pid, None)
+            if worker is None:
+                continue
+            if worker.channel_open:
+                self.selector.unregister(worker.channel)
+            worker.channel.close()
+            if worker.subscribers:
+                self._broadcast({'op': 'subscribers', 'worker': pid, 'count': 0})
+            expected = worker.retiring or self.stopping
+            if not expected:
+                print(f"Warning: worker {pid} exited unexpectedly (status {status})", file=sys.stderr)
+                if time.monotonic() - worker.started < MIN_WORKER_LIFETIME:
+                    self.respawn_at = time.monotonic() + RESPAWN_DELAY
+
+    def top_up(self):
+        if self.stopping or time.monotonic() < self.respawn_at:
+            return
+        while len(self.current()) < self.size:
+            self.spawn()
+
+    def _signal(self, worker, signum):
+        try:
+            os.kill(worker.pid, signum)
+        except ProcessLookupError:
+            pass
+
+    # --- SSE relay ----------------------------------------------------------
+
+    def _send(self, worker, frame):
+        try:
+            worker.channel.sendall(encode_relay_frame(frame))
+        except OSError:
+            pass
+
+    def _broadcast(self, frame=None, raw=None):
+        data = raw if raw is not None else encode_relay_frame(frame)
+        for worker in list(self.workers.values()):
+            try:
+                worker.channel.sendall(data)
+            except OSError:
+                pass
+
+    def _read(self, worker):
+        try:
+            data = worker.channel.recv(65536)
+        except OSError:
+            data = b''
+        if not data:
+            self.selector.unregister(worker.channel)
+            worker.channel_open = False
+            return
+        worker.buffer += data
+        *lines, worker.buffer = worker.buffer.split(b'\n')
+        for line in lines:
+            try:
+                frame = json.loads(line)
+            except ValueError:
+                continue
+            op = frame.get('op')
+            if op == 'ready':
+                worker.ready = True
+                continue
+            if op == 'subscribers':
+                worker.subscribers = frame.get('count', 0)
+            self._broadcast(raw=line + b'\n')
+
+    # --- main loop ----------------------------------------------------------
+
+    def _on_signal(self, signum, frame):
+        if signum == signal.SIGHUP:
+            self.reload_requested = True
+        elif signum in (signal.SIGTERM, signal.SIGINT):
+            self.stopping = True
+
+    def run(self):
+        signal.set_wakeup_fd(self._wakeup_w.fileno())
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+            signal.signal(signum, self._on_signal)
+        self.selector.register(self._wakeup_r, selectors.EVENT_READ, None)
+
+        print(f"Master {os.getpid()}: {self.size} workers on "
+              + ', '.join('%s:%d' % s.getsockname()[:2] for s in self.sockets))
+        self.top_up()
+        while not self.stopping:
+            for key, _ in self.selector.select(timeout=1.0):
+                if key.data is None:
+                    try:
+                        while self._wakeup_r.recv(512):
+                            pass
+                    except BlockingIOError:
+                        pass
+                else:
+                    self._read(key.data)
+            self.reap()
+            if self.reload_requested:
+                self.reload_requested = False
+                self.start_reload()
+            self.finish_reload()
+            self.top_up()
+        self.shutdown()
+
+    def shutdown(self):
+        print(f"Stopping {len(self.workers)} workers")
+        for worker in self.workers.values():
+            self._signal(worker, signal.SIGTERM)
+        deadline = time.monotonic() + SHUTDOWN_TIMEOUT + 5
+        while self.workers and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        for worker in self.workers.values():
+            self._signal(worker, signal.SIGKILL)
+        for sock in self.sockets:
+            sock.close()
+        shutil.rmtree(self.slot_dir, ignore_errors=True)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Run the GroupApp proxy and front end with several workers.')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'Worker processes (default: {DEFAULT_WORKERS})')
+    parser.add_argument('--bind', type=parse_bind, action='append',
+                        help='HOST:PORT to listen on; repeatable (default: 0.0.0.0:8001)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    binds = args.bind or [parse_bind(b) for b in DEFAULT_BINDS]
+    sockets = [listen(host, port) for host, port in binds]
+    Master(sockets, max(1, args.workers)).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -6,11 +6,22 @@ set -euo pipefail
 ROOT_DIR="$(cd "$(dirname "$0")" && pwd)"
 VENV_DIR="$ROOT_DIR/.venv"
 REQUIREMENTS="$ROOT_DIR/requirements.txt"
-PROXY_PY="$ROOT_DIR/proxy.py"
+# PROXY_MODE=async serves /api/generate and /events from the aiohttp event loop
+# PROXY_MODE=production runs serve.py: WORKERS async workers serving both the
+# API and the front-end files (no separate http.server)
+PROXY_MODE="${PROXY_MODE:-flask}"
 STATIC_DIR="$ROOT_DIR"
 PROXY_PORT=8001
 STATIC_PORT=8000
 HOST_IP="10.207.20.29"
+WORKERS="${WORKERS:-4}"
+if [ "$PROXY_MODE" = "async" ]; then
+  PROXY_CMD=("$ROOT_DIR/async_proxy.py")
+elif [ "$PROXY_MODE" = "production" ]; then
+  PROXY_CMD=("$ROOT_DIR/serve.py" --workers "$WORKERS" --bind "0.0.0.0:$PROXY_PORT" --bind "$HOST_IP:$STATIC_PORT")
+else
+  PROXY_CMD=("$ROOT_DIR/proxy.py")
+fi
 
 echo "Starting GroupApp services..."
 
@@ -55,11 +66,14 @@ if [ -f "$PROXY_PID_FILE" ]; then
 fi
 
 if [ ! -f "$PROXY_PID_FILE" ]; then
-  echo "Starting Flask proxy on port $PROXY_PORT..."
-  nohup "$VENV_DIR/bin/python" "$PROXY_PY" > "$ROOT_DIR/proxy.log" 2>&1 &
+  echo "Starting proxy ($PROXY_MODE mode) on port $PROXY_PORT..."
+  nohup "$VENV_DIR/bin/python" "${PROXY_CMD[@]}" > "$ROOT_DIR/proxy.log" 2>&1 &
   echo $! > "$PROXY_PID_FILE"
   sleep 1
   echo "Proxy PID $(cat $PROXY_PID_FILE)" 
+  if [ "$PROXY_MODE" = "production" ]; then
+    echo "Reload code without dropping requests: kill -HUP \$(cat $PROXY_PID_FILE)"
+  fi
 fi
 
 # 5) Start static Python server bound to HOST_IP (or 0.0.0.0)
@@ -74,7 +88,9 @@ if [ -f "$STATIC_PID_FILE" ]; then
   fi
 fi
 
-if [ ! -f "$STATIC_PID_FILE" ]; then
+if [ "$PROXY_MODE" = "production" ]; then
+  echo "Front end is served by the proxy workers on ${HOST_IP}:${STATIC_PORT}"
+elif [ ! -f "$STATIC_PID_FILE" ]; then
   echo "Starting static server on ${HOST_IP}:${STATIC_PORT}..."
   nohup python3 -m http.server $STATIC_PORT --bind $HOST_IP > "$ROOT_DIR/static.log" 2>&1 &
   echo $! > "$STATIC_PID_FILE"
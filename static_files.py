@@ -0,0 +1,131 @@
+"""
+Static front-end files (index.html, app.js, style.css, the task .txt files)
+for the production serving mode, replacing `python3 -m http.server`.
+
+Files are read once per change and kept in memory together with their
+gzip (and, if the brotli package is installed, brotli) encodings and a
+content-hash ETag. index.html is rewritten so its local script and style
+links carry that hash (app.js?v=<hash>); versioned URLs are cached by
+browsers for a year, everything else is revalidated with If-None-Match.
+"""
+import gzip
+import hashlib
+import os
+import re
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+CONTENT_TYPES = {
+    '.html': 'text/html; charset=utf-8',
+    '.js': 'text/javascript; charset=utf-8',
+    '.css': 'text/css; charset=utf-8',
+    '.txt': 'text/plain; charset=utf-8',
+}
+INDEX_FILE = 'index.html'
+COMPRESS_MIN_BYTES = 256
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+_ASSET_REF_RE = re.compile(r'''((?:src|href)=["'])([^"'?#:]+)(\?[^"'#]*)?(["'])''')
+
+
+class Asset:
+    """One file's bytes, pre-compressed variants and ETag."""
+
+    def __init__(self, name, body, content_type, stamp):
+        self.name = name
+        self.body = body
+        self.content_type = content_type
+        self.stamp = stamp
+        self.etag = hashlib.sha256(body).hexdigest()[:20]
+        self.encodings = {}
+        if len(body) >= COMPRESS_MIN_BYTES:
+            packed = gzip.compress(body, GZIP_LEVEL, mtime=0)
+            if len(packed) < len(body):
+                self.encodings['gzip'] = packed
+            if brotli is not None:
+                packed = brotli.compress(body, quality=BROTLI_QUALITY)
+                if len(packed) < len(body):
+                    self.encodings['br'] = packed
+
+    def select(self, accept_encoding):
+        """
+        Pick the smallest encoding the client accepts.
+        Returns: (body, content-encoding or None, etag for that variant)
+        """
+        accepted = _accepted_encodings(accept_encoding)
+        for encoding in ('br', 'gzip'):
+            if encoding in accepted and encoding in self.encodings:
+                return self.encodings[encoding], encoding, f'{self.etag}-{encoding}'
+        return self.body, None, self.etag
+
+
+def _accepted_encodings(header):
+    accepted = set()
+    for part in (header or '').split(','):
+        name, _, params = part.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q=') and quality[2:].strip() in ('0', '0.0', '0.00', '0.000'):
+            continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+class StaticFiles:
+    """Serves the top-level front-end files of root (no subdirectories, no dotfiles)."""
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self._assets = {}
+
+    def _path(self, name):
+        if not name or '/' in name or '\\' in name or name.startswith('.'):
+            return None
+        if os.path.splitext(name)[1] not in CONTENT_TYPES:
+            return None
+        return os.path.join(self.root, name)
+
+    def get(self, name):
+        """Current Asset for name, or None if it is not a servable file."""
+        path = self._path(name)
+        if path is None:
+            return None
+        try:
+            info = os.stat(path)
+        except OSError:
+            return None
+        stamp = (info.st_mtime_ns, info.st_size)
+        asset = self._assets.get(name)
+        if asset is not None and asset.stamp == stamp and name != INDEX_FILE:
+            return asset
+        try:
+            with open(path, 'rb') as f:
+                body = f.read()
+        except OSError:
+            return None
+        if name == INDEX_FILE:
+            # Its links change whenever a referenced file does, so compare content
+            body = self._version_links(body)
+            if asset is not None and asset.stamp == stamp and asset.body == body:
+                return asset
+        asset = Asset(name, body, CONTENT_TYPES[os.path.splitext(name)[1]], stamp)
+        self._assets[name] = asset
+        return asset
+
+    def _version_links(self, body):
+        """Point local src/href references at content-hashed URLs."""
+        def versioned(match):
+            prefix, target, _, quote = match.groups()
+            asset = self.get(target) if target != INDEX_FILE else None
+            if asset is None:
+                return match.group(0)
+            return f'{prefix}{target}?v={asset.etag}{quote}'
+
+        return _ASSET_REF_RE.sub(versioned, body.decode('utf-8')).encode('utf-8')
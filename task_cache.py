@@ -1,120 +1,1452 @@
 """
 SQLite database for caching Ollama task guide responses.
-Stores both normal and advanced versions of guides.
+Stores both normal and advanced versions of guides, for tasks and projects.
 """
 import sqlite3
+import fcntl
+import gzip
+import io
 import json
+import html
 import os
-from datetime import datetime
+import re
+import sys
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timezone
 
-DB_PATH = os.path.join(os.path.dirname(__file__), 'task_cache.db')
+from guide_render import RENDERER_VERSION, render_guide
+from metrics import sqlite_timer
 
-def init_db():
-    """Initialize the database with required tables."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS task_guides (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            task_name TEXT NOT NULL,
-            task_description TEXT NOT NULL,
-            is_advanced BOOLEAN NOT NULL DEFAULT 0,
-            model_name TEXT NOT NULL,
-            guide_content TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            UNIQUE(task_name, task_description, is_advanced, model_name)
+# TASK_CACHE_DB points the cache at another file (e.g. a scratch copy)
+DB_PATH = os.environ.get('TASK_CACHE_DB') or os.path.join(os.path.dirname(__file__), 'task_cache.db')
+
+# Connection tuning. WAL lets the proxy keep reading while a populator writes,
+# and synchronous=NORMAL only fsyncs at checkpoints instead of every commit.
+BUSY_TIMEOUT_SECONDS = 10
+MMAP_SIZE_BYTES = 64 * 1024 * 1024
+CACHE_SIZE_KIB = 16 * 1024
+STATEMENT_CACHE_SIZE = 64
+MAX_IDLE_CONNECTIONS = 8
+
+# Keys per batched lookup; 4 bound parameters each stays under SQLite's
+# default 999-variable limit.
+BATCH_LOOKUP_SIZE = 200
+
+# Guide kinds share the table but never each other's cache entries
+GUIDE_KINDS = ('task', 'project')
+DEFAULT_GUIDE_KIND = 'task'
+# Lists the schema 1 migration reads to tell project guides from task guides
+# (the same files populate_cache.py generates from)
+PROJECT_LIST_FILE = 'projects.txt'
+TASK_LIST_FILES = ('ccna.txt', 'linux.txt', 'sysadmin.txt', 'hacking.txt', 'python.txt', 'javascript.txt', 'ai.txt')
+
+# PRAGMA user_version of the current schema
+# 1: guide_kind column, part of the unique key
+# 2: content_encoding column (zlib-compressed guide_content)
+# 3: guide_stats summary table kept current by triggers
+# 4: guide_search FTS5 index over names, descriptions and guide text
+# 5: rendered_html / html_encoding / renderer_version (server-side HTML)
+# 6: generation_checkpoints table (partial text of unfinished generations)
+# 7: last_accessed_at / hit_count columns for retention; stats update trigger
+#    limited to the columns it summarizes
+SCHEMA_VERSION = 7
+
+# guide_content is stored zlib-compressed ('zlib') once it is big enough for
+# compression to pay off; short or legacy rows stay plain text ('identity').
+# zlib output is exactly HTTP's "deflate" coding, so stored bytes can be sent
+# to browsers as-is.
+ENCODING_IDENTITY = 'identity'
+ENCODING_ZLIB = 'zlib'
+COMPRESS_MIN_BYTES = 512
+COMPRESS_LEVEL = 6
+
+SELECT_GUIDE_SQL = '''
+    SELECT guide_content, content_encoding, created_at, updated_at
+    FROM task_guides
+    WHERE guide_kind = ?
+    AND task_name = ?
+    AND task_description = ?
+    AND is_advanced = ?
+    AND model_name = ?
+'''
+
+UPSERT_GUIDE_SQL = '''
+    INSERT INTO task_guides (guide_kind, task_name, task_description, is_advanced, model_name,
+                             guide_content, content_encoding, rendered_html, html_encoding,
+                             renderer_version, updated_at, last_accessed_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+    ON CONFLICT(guide_kind, task_name, task_description, is_advanced, model_name)
+    DO UPDATE SET
+        guide_content = excluded.guide_content,
+        content_encoding = excluded.content_encoding,
+        rendered_html = excluded.rendered_html,
+        html_encoding = excluded.html_encoding,
+        renderer_version = excluded.renderer_version,
+        updated_at = CURRENT_TIMESTAMP,
+        last_accessed_at = CURRENT_TIMESTAMP
+'''
+
+# HTML rendering of a guide, stored (and compressed) like guide_content.
+# renderer_version 0 means not rendered yet.
+SELECT_RENDERED_SQL = '''
+    SELECT id, rendered_html, html_encoding, renderer_version, guide_content, content_encoding,
+           created_at, updated_at
+    FROM task_guides
+    WHERE guide_kind = ?
+    AND task_name = ?
+    AND task_description = ?
+    AND is_advanced = ?
+    AND model_name = ?
+'''
+
+DELETE_GUIDE_SQL = '''
+    DELETE FROM task_guides
+    WHERE guide_kind = ?
+    AND task_name = ?
+    AND task_description = ?
+    AND is_advanced = ?
+    AND model_name = ?
+'''
+
+
+# One row per (kind, model, mode) so /api/cache/stats never scans task_guides.
+# Triggers keep it in step with every write path, including upserts (which
+# fire the UPDATE trigger) and maintenance commands like compress.
+CREATE_STATS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS guide_stats (
+        guide_kind TEXT NOT NULL,
+        model_name TEXT NOT NULL,
+        is_advanced BOOLEAN NOT NULL,
+        guide_count INTEGER NOT NULL DEFAULT 0,
+        stored_bytes INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (guide_kind, model_name, is_advanced)
+    )
+'''
+
+_STATS_ADD_SQL = '''
+    INSERT INTO guide_stats (guide_kind, model_name, is_advanced, guide_count, stored_bytes)
+    VALUES (NEW.guide_kind, NEW.model_name, NEW.is_advanced, 1, length(CAST(NEW.guide_content AS BLOB)))
+    ON CONFLICT(guide_kind, model_name, is_advanced) DO UPDATE SET
+        guide_count = guide_count + 1,
+        stored_bytes = stored_bytes + excluded.stored_bytes;
+'''
+
+_STATS_REMOVE_SQL = '''
+    UPDATE guide_stats SET
+        guide_count = guide_count - 1,
+        stored_bytes = stored_bytes - length(CAST(OLD.guide_content AS BLOB))
+    WHERE guide_kind = OLD.guide_kind AND model_name = OLD.model_name AND is_advanced = OLD.is_advanced;
+'''
+
+STATS_TRIGGERS_SQL = [
+    f'CREATE TRIGGER IF NOT EXISTS guide_stats_insert AFTER INSERT ON task_guides BEGIN {_STATS_ADD_SQL} END',
+    f'CREATE TRIGGER IF NOT EXISTS guide_stats_delete AFTER DELETE ON task_guides BEGIN {_STATS_REMOVE_SQL} END',
+    # Access tracking and HTML renders update rows too; only these columns matter here
+    f'''CREATE TRIGGER IF NOT EXISTS guide_stats_update
+        AFTER UPDATE OF guide_kind, model_name, is_advanced, guide_content ON task_guides
+        BEGIN {_STATS_REMOVE_SQL} {_STATS_ADD_SQL} END''',
+]
+
+
+# Full-text index of every guide, rowid = task_guides.id. guide_content is
+# usually compressed, so SQL triggers cannot feed the index; save_guides
+# indexes the decoded text in the same transaction instead. Deletes only need
+# the id, so a trigger covers them for every write path.
+CREATE_SEARCH_TABLE_SQL = '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS guide_search USING fts5(
+        task_name, task_description, guide_text,
+        tokenize = 'porter unicode61 remove_diacritics 2'
+    )
+'''
+
+SEARCH_DELETE_TRIGGER_SQL = '''
+    CREATE TRIGGER IF NOT EXISTS guide_search_delete AFTER DELETE ON task_guides BEGIN
+        DELETE FROM guide_search WHERE rowid = OLD.id;
+    END
+'''
+
+# bm25 column weights: a hit in the task name counts most
+SEARCH_WEIGHTS = (10.0, 4.0, 1.0)
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 50
+SNIPPET_TOKENS = 24
+# Control characters cannot occur in guides, so they are safe highlight
+# markers to swap for <mark> after HTML-escaping the snippet
+_MARK_START = '\x02'
+_MARK_END = '\x03'
+
+# Set by init_db; False when this SQLite build lacks FTS5
+search_available = False
+
+
+# Text streamed so far by a generation that has not finished (or whose stream
+# dropped), so a retry can resume from it instead of starting over. One row
+# per guide key; prompt_hash ties it to the exact request that produced it.
+# save_guides removes it once the guide is complete.
+CREATE_CHECKPOINT_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS generation_checkpoints (
+        guide_kind TEXT NOT NULL,
+        task_name TEXT NOT NULL,
+        task_description TEXT NOT NULL,
+        is_advanced BOOLEAN NOT NULL,
+        model_name TEXT NOT NULL,
+        prompt_hash TEXT NOT NULL,
+        partial_text TEXT NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (guide_kind, task_name, task_description, is_advanced, model_name)
+    )
+'''
+
+UPSERT_CHECKPOINT_SQL = '''
+    INSERT INTO generation_checkpoints (guide_kind, task_name, task_description, is_advanced, model_name,
+                                        prompt_hash, partial_text, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(guide_kind, task_name, task_description, is_advanced, model_name)
+    DO UPDATE SET
+        prompt_hash = excluded.prompt_hash,
+        partial_text = excluded.partial_text,
+        updated_at = CURRENT_TIMESTAMP
+'''
+
+DELETE_CHECKPOINT_SQL = '''
+    DELETE FROM generation_checkpoints
+    WHERE guide_kind = ?
+    AND task_name = ?
+    AND task_description = ?
+    AND is_advanced = ?
+    AND model_name = ?
+'''
+
+# Older checkpoints are ignored and removed by prune_checkpoints
+CHECKPOINT_MAX_AGE_HOURS = 24
+
+
+class ConnectionPool:
+    """
+    Small pool of reusable SQLite connections.
+    A connection is handed to one thread at a time and returned to the pool
+    afterwards, so each request reuses an open, already-tuned connection
+    (with its prepared statement cache) instead of reconnecting.
+    """
+
+    def __init__(self, db_path, max_idle=MAX_IDLE_CONNECTIONS):
+        self.db_path = db_path
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=BUSY_TIMEOUT_SECONDS,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE
         )
+        # Applies to a new database file (and to existing ones at their next
+        # VACUUM), so compaction can hand freed pages back to the filesystem
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL')
+        conn.execute(f'PRAGMA mmap_size = {MMAP_SIZE_BYTES}')
+        conn.execute(f'PRAGMA cache_size = -{CACHE_SIZE_KIB}')
+        conn.execute('PRAGMA temp_store = MEMORY')
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; commits on success, rolls back on error."""
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = self._connect()
+
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            with self._lock:
+                if len(self._idle) < self.max_idle:
+                    self._idle.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+
+    def close_all(self):
+        """Close every idle connection (e.g. on shutdown)."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+_pool = ConnectionPool(DB_PATH)
+
+def get_connection():
+    """Context manager yielding a pooled connection to the cache database."""
+    return _pool.connection()
+
+def close_connections():
+    """Close all pooled connections."""
+    _pool.close_all()
+
+CREATE_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        guide_kind TEXT NOT NULL DEFAULT 'task',
+        task_name TEXT NOT NULL,
+        task_description TEXT NOT NULL,
+        is_advanced BOOLEAN NOT NULL DEFAULT 0,
+        model_name TEXT NOT NULL,
+        guide_content TEXT NOT NULL,
+        content_encoding TEXT NOT NULL DEFAULT 'identity',
+        rendered_html TEXT,
+        html_encoding TEXT NOT NULL DEFAULT 'identity',
+        renderer_version INTEGER NOT NULL DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_accessed_at TIMESTAMP,
+        hit_count INTEGER NOT NULL DEFAULT 0
+    )
+'''
+
+def normalize_kind(guide_kind):
+    """Map a client-supplied kind (or None) onto one of GUIDE_KINDS."""
+    return guide_kind if guide_kind in GUIDE_KINDS else DEFAULT_GUIDE_KIND
+
+def encode_content(guide_content):
+    """
+    Prepare guide text for storage.
+    Returns: (stored value, content_encoding)
+    """
+    raw = guide_content.encode('utf-8')
+    if len(raw) >= COMPRESS_MIN_BYTES:
+        packed = zlib.compress(raw, COMPRESS_LEVEL)
+        if len(packed) < len(raw):
+            return packed, ENCODING_ZLIB
+    return guide_content, ENCODING_IDENTITY
+
+def decode_content(stored, content_encoding):
+    """Turn a stored guide_content value back into text."""
+    if content_encoding == ENCODING_ZLIB:
+        return zlib.decompress(stored).decode('utf-8')
+    if isinstance(stored, bytes):
+        return stored.decode('utf-8')
+    return stored
+
+def _has_column(conn, table, column):
+    return any(row[1] == column for row in conn.execute(f'PRAGMA table_info({table})'))
+
+def _listed_tasks(filename):
+    """(name, description) pairs of a 'Name: description' list file next to this module."""
+    try:
+        with open(os.path.join(os.path.dirname(__file__), filename), 'r') as f:
+            lines = f.readlines()
+    except OSError:
+        return set()
+    tasks = set()
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith('#') and ':' in line:
+            name, description = line.split(':', 1)
+            tasks.add((name.strip(), description.strip()))
+    return tasks
+
+def _migrate_add_guide_kind(conn):
+    """
+    Schema 0 -> 1: rebuild task_guides with a guide_kind column in the
+    unique key. SQLite cannot alter a UNIQUE constraint in place, so the
+    rows are copied into a new table. Guides for an entry of projects.txt
+    (and of no task file) become 'project' guides, the rest 'task' guides.
+    """
+    tasks = set()
+    for filename in TASK_LIST_FILES:
+        tasks |= _listed_tasks(filename)
+    conn.execute('CREATE TEMP TABLE migrate_projects (task_name TEXT, task_description TEXT)')
+    conn.executemany('INSERT INTO migrate_projects VALUES (?, ?)', _listed_tasks(PROJECT_LIST_FILE) - tasks)
+
+    conn.execute(CREATE_TABLE_SQL.format(table='task_guides_v1'))
+    conn.execute('''
+        INSERT INTO task_guides_v1 (id, guide_kind, task_name, task_description, is_advanced,
+                                    model_name, guide_content, created_at, updated_at)
+        SELECT id,
+               CASE WHEN EXISTS (
+                   SELECT 1 FROM migrate_projects p
+                   WHERE p.task_name = g.task_name AND p.task_description = g.task_description
+               ) THEN 'project' ELSE 'task' END,
+               task_name, task_description, is_advanced,
+               model_name, guide_content, created_at, updated_at
+        FROM task_guides g
     ''')
-    
-    # Index for faster lookups
-    cursor.execute('''
-        CREATE INDEX IF NOT EXISTS idx_task_lookup 
-        ON task_guides(task_name, task_description, is_advanced, model_name)
+    conn.execute('DROP TABLE migrate_projects')
+    conn.execute('DROP TABLE task_guides')
+    conn.execute('ALTER TABLE task_guides_v1 RENAME TO task_guides')
+
+def rebuild_stats(conn):
+    """Recompute guide_stats from task_guides (one full scan)."""
+    conn.execute('DELETE FROM guide_stats')
+    conn.execute('''
+        INSERT INTO guide_stats (guide_kind, model_name, is_advanced, guide_count, stored_bytes)
+        SELECT guide_kind, model_name, is_advanced, COUNT(*), COALESCE(SUM(length(CAST(guide_content AS BLOB))), 0)
+        FROM task_guides
+        GROUP BY guide_kind, model_name, is_advanced
     ''')
-    
-    conn.commit()
-    conn.close()
 
-def get_cached_guide(task_name, task_description, is_advanced, model_name):
+def _index_guide(conn, row_id, task_name, task_description, guide_text):
+    conn.execute('DELETE FROM guide_search WHERE rowid = ?', (row_id,))
+    conn.execute(
+        'INSERT INTO guide_search (rowid, task_name, task_description, guide_text) VALUES (?, ?, ?, ?)',
+        (row_id, task_name, task_description, guide_text)
+    )
+
+def rebuild_search_index(conn):
+    """Re-index every guide (decompresses each one)."""
+    conn.execute('DELETE FROM guide_search')
+    rows = conn.execute(
+        'SELECT id, task_name, task_description, guide_content, content_encoding FROM task_guides'
+    )
+    for row_id, task_name, task_description, content, encoding in rows.fetchall():
+        _index_guide(conn, row_id, task_name, task_description, decode_content(content, encoding))
+
+def _has_search_table(conn):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'guide_search'"
+    ).fetchone() is not None
+
+def _create_search_index(conn):
+    """Create guide_search and its delete trigger. Returns False without FTS5."""
+    try:
+        conn.execute(CREATE_SEARCH_TABLE_SQL)
+    except sqlite3.OperationalError as e:
+        print(f"Warning: full-text search disabled ({e})")
+        return False
+    conn.execute(SEARCH_DELETE_TRIGGER_SQL)
+    return True
+
+def init_db():
+    """Initialize the database with required tables, migrating old schemas."""
+    global search_available
+    with get_connection() as conn:
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            search_available = _has_search_table(conn)
+            return
+
+        # Re-check under the write lock in case another process migrated first
+        conn.execute('BEGIN IMMEDIATE')
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            search_available = _has_search_table(conn)
+            return
+        has_table = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'task_guides'"
+        ).fetchone()
+        if not has_table:
+            conn.execute(CREATE_TABLE_SQL.format(table='task_guides'))
+        if has_table and version < 1:
+            _migrate_add_guide_kind(conn)
+        if not _has_column(conn, 'task_guides', 'content_encoding'):
+            # Existing rows stay plain text until `python3 task_cache.py compress`
+            conn.execute("ALTER TABLE task_guides ADD COLUMN content_encoding TEXT NOT NULL DEFAULT 'identity'")
+        if not _has_column(conn, 'task_guides', 'renderer_version'):
+            # Existing guides are rendered lazily on first read (or `python3 task_cache.py render`)
+            conn.execute('ALTER TABLE task_guides ADD COLUMN rendered_html TEXT')
+            conn.execute("ALTER TABLE task_guides ADD COLUMN html_encoding TEXT NOT NULL DEFAULT 'identity'")
+            conn.execute('ALTER TABLE task_guides ADD COLUMN renderer_version INTEGER NOT NULL DEFAULT 0')
+        if not _has_column(conn, 'task_guides', 'last_accessed_at'):
+            conn.execute('ALTER TABLE task_guides ADD COLUMN last_accessed_at TIMESTAMP')
+            conn.execute('ALTER TABLE task_guides ADD COLUMN hit_count INTEGER NOT NULL DEFAULT 0')
+        if version < 7:
+            conn.execute('DROP TRIGGER IF EXISTS guide_stats_update')
+            # Until read, a guide counts as last used when it was written
+            conn.execute('UPDATE task_guides SET last_accessed_at = updated_at WHERE last_accessed_at IS NULL')
+
+        # One index seek per (kind, key); also enforces uniqueness for upserts
+        conn.execute('DROP INDEX IF EXISTS idx_task_lookup')
+        conn.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_guide_key
+            ON task_guides(guide_kind, task_name, task_description, is_advanced, model_name)
+        ''')
+        conn.execute(CREATE_STATS_TABLE_SQL)
+        for trigger_sql in STATS_TRIGGERS_SQL:
+            conn.execute(trigger_sql)
+        if version < 3:
+            rebuild_stats(conn)
+        search_available = _create_search_index(conn)
+        if search_available and version < 4:
+            rebuild_search_index(conn)
+        conn.execute(CREATE_CHECKPOINT_TABLE_SQL)
+        conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+def get_stored_guide(task_name, task_description, is_advanced, model_name, guide_kind=DEFAULT_GUIDE_KIND):
+    """
+    Retrieve a guide exactly as stored, without decompressing it.
+    Returns: (guide_content, content_encoding, created_at, updated_at) or None
+    """
+    with sqlite_timer('get'), get_connection() as conn:
+        result = conn.execute(
+            SELECT_GUIDE_SQL,
+            (normalize_kind(guide_kind), task_name, task_description, int(is_advanced), model_name)
+        ).fetchone()
+
+    return result if result else None
+
+def get_cached_guide(task_name, task_description, is_advanced, model_name, guide_kind=DEFAULT_GUIDE_KIND):
     """
     Retrieve a cached guide from the database.
     Returns: (guide_content, created_at) tuple or None if not found
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT guide_content, created_at 
-        FROM task_guides 
-        WHERE task_name = ? 
-        AND task_description = ? 
-        AND is_advanced = ?
-        AND model_name = ?
-    ''', (task_name, task_description, int(is_advanced), model_name))
-    
-    result = cursor.fetchone()
-    conn.close()
-    
-    return result if result else None
+    result = get_stored_guide(task_name, task_description, is_advanced, model_name, guide_kind)
+    if not result:
+        return None
+    return decode_content(result[0], result[1]), result[2]
 
-def save_guide(task_name, task_description, is_advanced, model_name, guide_content):
+def get_stored_guides(keys):
+    """
+    Retrieve many guides at once, as stored.
+    keys: iterable of (task_name, task_description, is_advanced, model_name, guide_kind)
+    Returns: dict mapping each found key (with is_advanced as int) to a
+    (guide_content, content_encoding, created_at, updated_at) tuple.
+    Missing keys are absent.
+    """
+    wanted = list(dict.fromkeys(
+        (name, desc, int(adv), model, normalize_kind(kind)) for name, desc, adv, model, kind in keys
+    ))
+    found = {}
+
+    with sqlite_timer('get_many'), get_connection() as conn:
+        for start in range(0, len(wanted), BATCH_LOOKUP_SIZE):
+            batch = wanted[start:start + BATCH_LOOKUP_SIZE]
+            placeholders = ', '.join(['(?, ?, ?, ?, ?)'] * len(batch))
+            params = [value for key in batch for value in key]
+            # Joining against a VALUES list keeps one index seek per key
+            # (a row-value IN (VALUES ...) makes SQLite scan the table)
+            rows = conn.execute(f'''
+                WITH wanted(task_name, task_description, is_advanced, model_name, guide_kind) AS (
+                    VALUES {placeholders}
+                )
+                SELECT g.task_name, g.task_description, g.is_advanced, g.model_name, g.guide_kind,
+                       g.guide_content, g.content_encoding, g.created_at, g.updated_at
+                FROM wanted w
+                JOIN task_guides g
+                ON g.guide_kind = w.guide_kind
+                AND g.task_name = w.task_name
+                AND g.task_description = w.task_description
+                AND g.is_advanced = w.is_advanced
+                AND g.model_name = w.model_name
+            ''', params).fetchall()
+            for name, desc, adv, model, kind, content, encoding, created_at, updated_at in rows:
+                found[(name, desc, int(adv), model, kind)] = (content, encoding, created_at, updated_at)
+
+    return found
+
+def get_cached_guides(keys):
+    """
+    Retrieve many cached guides at once.
+    Returns: dict mapping each found key (with is_advanced as int) to a
+    (guide_content, created_at) tuple. Missing keys are absent.
+    """
+    return {
+        key: (decode_content(content, encoding), created_at)
+        for key, (content, encoding, created_at, _) in get_stored_guides(keys).items()
+    }
+
+def _guide_ids(conn, keys):
+    """Row ids of (guide_kind, task_name, task_description, is_advanced, model_name) keys."""
+    ids = {}
+    for start in range(0, len(keys), BATCH_LOOKUP_SIZE):
+        batch = keys[start:start + BATCH_LOOKUP_SIZE]
+        placeholders = ', '.join(['(?, ?, ?, ?, ?)'] * len(batch))
+        rows = conn.execute(f'''
+            WITH wanted(guide_kind, task_name, task_description, is_advanced, model_name) AS (
+                VALUES {placeholders}
+            )
+            SELECT g.id, g.guide_kind, g.task_name, g.task_description, g.is_advanced, g.model_name
+            FROM wanted w
+            JOIN task_guides g
+            ON g.guide_kind = w.guide_kind
+            AND g.task_name = w.task_name
+            AND g.task_description = w.task_description
+            AND g.is_advanced = w.is_advanced
+            AND g.model_name = w.model_name
+        ''', [value for key in batch for value in key]).fetchall()
+        for row_id, kind, name, desc, adv, model in rows:
+            ids[(kind, name, desc, int(adv), model)] = row_id
+    return ids
+
+def save_guides(guides):
+    """
+    Save or update many guides in one transaction (one commit instead of one per guide).
+    guides: iterable of (task_name, task_description, is_advanced, model_name, guide_content, guide_kind)
+    A key given twice is written once, with its last content.
+    Returns: number of guides written
+    """
+    latest = {}
+    for task_name, task_description, is_advanced, model_name, guide_content, guide_kind in guides:
+        latest[(normalize_kind(guide_kind), task_name, task_description, int(is_advanced), model_name)] = guide_content
+    if not latest:
+        return 0
+
+    # Compress and render before the transaction takes the write lock
+    rows = []
+    for key, guide_content in latest.items():
+        stored, encoding = encode_content(guide_content)
+        html_stored, html_encoding = encode_content(render_guide(guide_content))
+        rows.append((*key, stored, encoding, html_stored, html_encoding, RENDERER_VERSION))
+    keys = list(latest)
+
+    with sqlite_timer('save'), get_connection() as conn:
+        conn.executemany(UPSERT_GUIDE_SQL, rows)
+        if search_available:
+            ids = _guide_ids(conn, keys)
+            conn.executemany('DELETE FROM guide_search WHERE rowid = ?', [(ids[key],) for key in keys])
+            conn.executemany(
+                'INSERT INTO guide_search (rowid, task_name, task_description, guide_text) VALUES (?, ?, ?, ?)',
+                [(ids[key], key[1], key[2], latest[key]) for key in keys]
+            )
+        # The guides are complete, so any partial generations of them are obsolete
+        conn.executemany(DELETE_CHECKPOINT_SQL, keys)
+    return len(keys)
+
+def save_guide(task_name, task_description, is_advanced, model_name, guide_content, guide_kind=DEFAULT_GUIDE_KIND):
     """
     Save or update a guide in the database.
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        INSERT INTO task_guides (task_name, task_description, is_advanced, model_name, guide_content, updated_at)
-        VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        ON CONFLICT(task_name, task_description, is_advanced, model_name) 
-        DO UPDATE SET 
-            guide_content = excluded.guide_content,
-            updated_at = CURRENT_TIMESTAMP
-    ''', (task_name, task_description, int(is_advanced), model_name, guide_content))
-    
-    conn.commit()
-    conn.close()
-
-def delete_guide(task_name, task_description, is_advanced, model_name):
+    save_guides([(task_name, task_description, is_advanced, model_name, guide_content, guide_kind)])
+
+
+class GroupCommit:
+    """
+    Shares transactions between threads saving guides at the same time.
+    A save made while another is being written waits for it, then goes into
+    the next transaction together with everything else queued meanwhile, so
+    a burst of N writers costs a couple of commits instead of N. A save with
+    nothing in flight is written straight away.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._queue = []
+        self._writing = False
+        self.saves = 0
+        self.transactions = 0
+
+    def save(self, guides):
+        """save_guides through the shared transaction; blocks until written."""
+        entry = {'guides': list(guides), 'done': False, 'error': None}
+        with self._cond:
+            self._queue.append(entry)
+            while self._writing and not entry['done']:
+                self._cond.wait()
+            if entry['done']:
+                if entry['error']:
+                    raise entry['error']
+                return len(entry['guides'])
+            batch, self._queue = self._queue, []
+            self._writing = True
+
+        try:
+            self._write(batch)
+        finally:
+            with self._cond:
+                self._writing = False
+                self.saves += len(batch)
+                self._cond.notify_all()
+        if entry['error']:
+            raise entry['error']
+        return len(entry['guides'])
+
+    def _write(self, batch):
+        try:
+            save_guides([guide for entry in batch for guide in entry['guides']])
+            self.transactions += 1
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0]['error'] = e
+            else:
+                # Keep one bad guide from failing everyone else's save
+                for entry in batch:
+                    self._write([entry])
+        for entry in batch:
+            entry['done'] = True
+
+    def stats(self):
+        with self._cond:
+            return {'saves': self.saves, 'transactions': self.transactions, 'queued': len(self._queue)}
+
+
+_group_commit = GroupCommit()
+
+def group_save(guides):
+    """
+    Save guides (as for save_guides) sharing a transaction with concurrent callers.
+    Blocks until they are committed. Returns the number of guides given.
+    """
+    return _group_commit.save(guides)
+
+def group_commit_stats():
+    return _group_commit.stats()
+
+def get_rendered_guide(task_name, task_description, is_advanced, model_name, guide_kind=DEFAULT_GUIDE_KIND):
+    """
+    Retrieve a guide's sanitized HTML rendering, as stored. Guides never
+    rendered, or rendered by an older RENDERER_VERSION, are rendered now
+    and the result is stored for the next reader.
+    Returns: (rendered_html, html_encoding, created_at, updated_at) or None
+    """
+    with sqlite_timer('get_html'), get_connection() as conn:
+        row = conn.execute(
+            SELECT_RENDERED_SQL,
+            (normalize_kind(guide_kind), task_name, task_description, int(is_advanced), model_name)
+        ).fetchone()
+    if not row:
+        return None
+    row_id, html_stored, html_encoding, version, content, encoding, created_at, updated_at = row
+    if version == RENDERER_VERSION and html_stored is not None:
+        return html_stored, html_encoding, created_at, updated_at
+
+    html_stored, html_encoding = encode_content(render_guide(decode_content(content, encoding)))
+    with sqlite_timer('render'), get_connection() as conn:
+        # Skip if a save replaced the guide meanwhile; it stored its own rendering
+        conn.execute('''
+            UPDATE task_guides SET rendered_html = ?, html_encoding = ?, renderer_version = ?
+            WHERE id = ? AND renderer_version = ?
+        ''', (html_stored, html_encoding, RENDERER_VERSION, row_id, version))
+    return html_stored, html_encoding, created_at, updated_at
+
+def render_stale(batch_size=200):
+    """Render every guide whose stored HTML is missing or outdated. Returns the count."""
+    rendered = 0
+    last_id = 0
+    while True:
+        with get_connection() as conn:
+            rows = conn.execute('''
+                SELECT id, guide_content, content_encoding FROM task_guides
+                WHERE renderer_version != ? AND id > ?
+                ORDER BY id LIMIT ?
+            ''', (RENDERER_VERSION, last_id, batch_size)).fetchall()
+            if not rows:
+                break
+            for row_id, content, encoding in rows:
+                last_id = row_id
+                html_stored, html_encoding = encode_content(render_guide(decode_content(content, encoding)))
+                conn.execute(
+                    'UPDATE task_guides SET rendered_html = ?, html_encoding = ?, renderer_version = ? WHERE id = ?',
+                    (html_stored, html_encoding, RENDERER_VERSION, row_id)
+                )
+                rendered += 1
+    return rendered
+
+def save_checkpoint(task_name, task_description, is_advanced, model_name, prompt_hash, partial_text,
+                    guide_kind=DEFAULT_GUIDE_KIND):
+    """Store (or replace) the partial text of an unfinished generation."""
+    with sqlite_timer('checkpoint'), get_connection() as conn:
+        conn.execute(
+            UPSERT_CHECKPOINT_SQL,
+            (normalize_kind(guide_kind), task_name, task_description, int(is_advanced), model_name,
+             prompt_hash, partial_text)
+        )
+
+def get_checkpoint(task_name, task_description, is_advanced, model_name, prompt_hash,
+                   guide_kind=DEFAULT_GUIDE_KIND):
+    """
+    Retrieve the partial text saved for this guide by the same prompt.
+    Returns: (partial_text, updated_at) or None if there is none, it came
+    from a different prompt, or it is older than CHECKPOINT_MAX_AGE_HOURS.
+    """
+    with sqlite_timer('get_checkpoint'), get_connection() as conn:
+        result = conn.execute('''
+            SELECT partial_text, updated_at FROM generation_checkpoints
+            WHERE guide_kind = ?
+            AND task_name = ?
+            AND task_description = ?
+            AND is_advanced = ?
+            AND model_name = ?
+            AND prompt_hash = ?
+            AND updated_at >= datetime('now', ?)
+        ''', (normalize_kind(guide_kind), task_name, task_description, int(is_advanced), model_name,
+              prompt_hash, f'-{CHECKPOINT_MAX_AGE_HOURS} hours')).fetchone()
+
+    return result if result else None
+
+def prune_checkpoints(max_age_hours=CHECKPOINT_MAX_AGE_HOURS):
+    """Delete checkpoints of generations abandoned long ago. Returns the count."""
+    with get_connection() as conn:
+        return conn.execute(
+            "DELETE FROM generation_checkpoints WHERE updated_at < datetime('now', ?)",
+            (f'-{max_age_hours} hours',)
+        ).rowcount
+
+def delete_guide(task_name, task_description, is_advanced, model_name, guide_kind=DEFAULT_GUIDE_KIND):
     """
     Delete a specific guide from the cache.
     Used when regenerating a guide.
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        DELETE FROM task_guides 
-        WHERE task_name = ? 
-        AND task_description = ? 
-        AND is_advanced = ?
-        AND model_name = ?
-    ''', (task_name, task_description, int(is_advanced), model_name))
-    
-    conn.commit()
-    conn.close()
+    with sqlite_timer('delete'), get_connection() as conn:
+        conn.execute(
+            DELETE_GUIDE_SQL,
+            (normalize_kind(guide_kind), task_name, task_description, int(is_advanced), model_name)
+        )
 
 def get_cache_stats():
-    """Get statistics about the cache."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT COUNT(*) FROM task_guides')
-    total = cursor.fetchone()[0]
-    
-    cursor.execute('SELECT COUNT(*) FROM task_guides WHERE is_advanced = 1')
-    advanced = cursor.fetchone()[0]
-    
-    conn.close()
-    
+    """
+    Get statistics about the cache from the guide_stats summary table.
+    Cost depends on the number of models, not the number of guides.
+    """
+    with sqlite_timer('stats'), get_connection() as conn:
+        rows = conn.execute('''
+            SELECT guide_kind, model_name, is_advanced, guide_count, stored_bytes
+            FROM guide_stats
+            WHERE guide_count > 0
+            ORDER BY model_name, guide_kind, is_advanced
+        ''').fetchall()
+
+    # Same split as by_model: project guides count only as projects, so
+    # normal + advanced + project adds up to the total
+    modes = {'normal': 0, 'advanced': 0, 'project': 0}
+    total = total_bytes = 0
+    by_model = {}
+    for guide_kind, model_name, is_advanced, count, stored_bytes in rows:
+        total += count
+        total_bytes += stored_bytes
+        if guide_kind == 'project':
+            mode = 'project'
+        else:
+            mode = 'advanced' if is_advanced else 'normal'
+        modes[mode] += count
+        model = by_model.setdefault(model_name, {'normal': 0, 'advanced': 0, 'project': 0, 'bytes': 0})
+        model[mode] += count
+        model['bytes'] += stored_bytes
+
     return {
         'total_guides': total,
-        'normal_guides': total - advanced,
-        'advanced_guides': advanced
+        'normal_guides': modes['normal'],
+        'advanced_guides': modes['advanced'],
+        'project_guides': modes['project'],
+        'total_bytes': total_bytes,
+        'by_model': by_model
+    }
+
+def build_match_query(text):
+    """
+    Turn free text into an FTS5 query: every word must match, the last one
+    as a prefix (search-as-you-type). Quoting each word keeps FTS5 operators
+    and punctuation in user input from causing syntax errors.
+    Returns None when text has no searchable words.
+    """
+    words = re.findall(r'\w+', text or '')
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+def _highlighted_html(marked):
+    """HTML-escape FTS5 output, then turn the highlight markers into <mark>."""
+    escaped = html.escape(marked, quote=False)
+    return escaped.replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>')
+
+def search_guides(text, model_name=None, guide_kind=None, is_advanced=None,
+                  limit=SEARCH_PAGE_SIZE, offset=0):
+    """
+    Ranked full-text search over cached guides.
+    Optional filters narrow by model, kind and mode.
+    Returns: {'total': matches, 'results': [...]} where each result carries
+    the guide key, bm25 score, and HTML-safe highlighted title and snippet.
+    """
+    match = build_match_query(text)
+    if not search_available or match is None:
+        return {'total': 0, 'results': []}
+    limit = max(1, min(int(limit), SEARCH_MAX_PAGE_SIZE))
+    offset = max(0, int(offset))
+
+    filters = ['guide_search MATCH ?']
+    params = [match]
+    if model_name:
+        filters.append('g.model_name = ?')
+        params.append(model_name)
+    if guide_kind:
+        filters.append('g.guide_kind = ?')
+        params.append(normalize_kind(guide_kind))
+    if is_advanced is not None:
+        filters.append('g.is_advanced = ?')
+        params.append(int(is_advanced))
+    where = ' AND '.join(filters)
+
+    with sqlite_timer('search'), get_connection() as conn:
+        total = conn.execute(f'''
+            SELECT COUNT(*) FROM guide_search JOIN task_guides g ON g.id = guide_search.rowid
+            WHERE {where}
+        ''', params).fetchone()[0]
+        rows = conn.execute(f'''
+            SELECT g.task_name, g.task_description, g.is_advanced, g.model_name, g.guide_kind,
+                   g.created_at, g.updated_at,
+                   bm25(guide_search, ?, ?, ?) AS score,
+                   highlight(guide_search, 0, ?, ?),
+                   snippet(guide_search, -1, ?, ?, '…', ?)
+            FROM guide_search JOIN task_guides g ON g.id = guide_search.rowid
+            WHERE {where}
+            ORDER BY score
+            LIMIT ? OFFSET ?
+        ''', [*SEARCH_WEIGHTS, _MARK_START, _MARK_END, _MARK_START, _MARK_END, SNIPPET_TOKENS,
+              *params, limit, offset]).fetchall()
+
+    results = []
+    for name, desc, adv, model, kind, created_at, updated_at, score, title, snippet in rows:
+        results.append({
+            'task_name': name,
+            'task_description': desc,
+            'is_advanced': bool(adv),
+            'model_name': model,
+            'guide_kind': kind,
+            'created_at': created_at,
+            'updated_at': updated_at,
+            # bm25 is lower-is-better; flip it so clients can sort descending
+            'score': round(-score, 4),
+            'title_html': _highlighted_html(title),
+            'snippet_html': _highlighted_html(snippet)
+        })
+    return {'total': total, 'results': results}
+
+def compress_existing(batch_size=200, vacuum=False):
+    """
+    Compress every plain-text guide in place (migration for rows written
+    before compression existed). Returns: (rows compressed, bytes saved)
+    """
+    compressed = 0
+    saved = 0
+    last_id = 0
+    while True:
+        with get_connection() as conn:
+            rows = conn.execute('''
+                SELECT id, guide_content FROM task_guides
+                WHERE content_encoding = ? AND id > ?
+                ORDER BY id LIMIT ?
+            ''', (ENCODING_IDENTITY, last_id, batch_size)).fetchall()
+            if not rows:
+                break
+            for row_id, content in rows:
+                last_id = row_id
+                text = decode_content(content, ENCODING_IDENTITY)
+                stored, encoding = encode_content(text)
+                if encoding == ENCODING_IDENTITY:
+                    continue
+                conn.execute(
+                    'UPDATE task_guides SET guide_content = ?, content_encoding = ? WHERE id = ?',
+                    (stored, encoding, row_id)
+                )
+                compressed += 1
+                saved += len(text.encode('utf-8')) - len(stored)
+
+    if vacuum:
+        with get_connection() as conn:
+            conn.commit()
+            conn.execute('VACUUM')
+    return compressed, saved
+
+# Portable dump of the cache for moving guides between machines: gzip'd
+# NDJSON, one guide per line as plain text with its key and timestamps.
+# Renderings and the search index are rebuilt on the receiving side.
+EXPORT_BATCH_SIZE = 500
+IMPORT_BATCH_SIZE = 2000
+EXPORT_GZIP_LEVEL = 6
+EXPORT_MODES = ('normal', 'advanced', 'project')
+
+# Keeps the newer copy when both sides have a guide (import --replace overwrites)
+IMPORT_GUIDE_SQL = '''
+    INSERT INTO task_guides (guide_kind, task_name, task_description, is_advanced, model_name,
+                             guide_content, content_encoding, created_at, updated_at, last_accessed_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(guide_kind, task_name, task_description, is_advanced, model_name)
+    DO UPDATE SET
+        guide_content = excluded.guide_content,
+        content_encoding = excluded.content_encoding,
+        rendered_html = NULL,
+        html_encoding = 'identity',
+        renderer_version = 0,
+        updated_at = excluded.updated_at
+    WHERE ? OR excluded.updated_at > task_guides.updated_at
+    RETURNING id
+'''
+
+def _export_filters(model_name=None, mode=None, since=None, until=None):
+    filters = []
+    params = []
+    if model_name:
+        filters.append('model_name = ?')
+        params.append(model_name)
+    if mode == 'project':
+        filters.append("guide_kind = 'project'")
+    elif mode in ('normal', 'advanced'):
+        filters.append("guide_kind = 'task' AND is_advanced = ?")
+        params.append(int(mode == 'advanced'))
+    if since:
+        filters.append('updated_at >= ?')
+        params.append(since)
+    if until:
+        # A bare date covers that whole day
+        filters.append('updated_at < ?' if len(until) > 10 else "updated_at < date(?, '+1 day')")
+        params.append(until)
+    return filters, params
+
+def iter_export_rows(model_name=None, mode=None, since=None, until=None, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Yield guides as export records (dicts), a batch at a time so the table
+    is never loaded whole. mode is 'normal', 'advanced' or 'project';
+    since/until bound updated_at ('YYYY-MM-DD' or a full timestamp).
+    """
+    filters, params = _export_filters(model_name, mode, since, until)
+    last_id = 0
+    while True:
+        where = ' AND '.join(['id > ?'] + filters)
+        with sqlite_timer('export'), get_connection() as conn:
+            rows = conn.execute(f'''
+                SELECT id, guide_kind, task_name, task_description, is_advanced, model_name,
+                       guide_content, content_encoding, created_at, updated_at
+                FROM task_guides
+                WHERE {where}
+                ORDER BY id LIMIT ?
+            ''', [last_id, *params, batch_size]).fetchall()
+        if not rows:
+            return
+        for row_id, kind, name, desc, adv, model, content, encoding, created_at, updated_at in rows:
+            last_id = row_id
+            yield {
+                'task_name': name,
+                'task_description': desc,
+                'is_advanced': bool(adv),
+                'model_name': model,
+                'guide_kind': kind,
+                'guide_content': decode_content(content, encoding),
+                'created_at': created_at,
+                'updated_at': updated_at
+            }
+
+def iter_export_chunks(**filters):
+    """Gzip'd NDJSON export as a stream of byte chunks (see iter_export_rows for filters)."""
+    packer = zlib.compressobj(EXPORT_GZIP_LEVEL, zlib.DEFLATED, 31)
+    pending = []
+    pending_bytes = 0
+    for record in iter_export_rows(**filters):
+        line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        pending.append(packer.compress(line))
+        pending_bytes += len(pending[-1])
+        if pending_bytes >= 64 * 1024:
+            yield b''.join(pending)
+            pending = []
+            pending_bytes = 0
+    pending.append(packer.flush())
+    yield b''.join(pending)
+
+def export_guides(fileobj, **filters):
+    """Write a gzip'd NDJSON export to a binary file object. Returns bytes written."""
+    written = 0
+    for chunk in iter_export_chunks(**filters):
+        fileobj.write(chunk)
+        written += len(chunk)
+    return written
+
+def _import_record(line):
+    """Parse and validate one export line. Returns the row values, or None."""
+    record = json.loads(line)
+    if not isinstance(record, dict):
+        return None
+    name = record.get('task_name')
+    model = record.get('model_name')
+    content = record.get('guide_content')
+    if not isinstance(name, str) or not name or not isinstance(model, str) or not model:
+        return None
+    if not isinstance(content, str):
+        return None
+    now = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+    return (normalize_kind(record.get('guide_kind')), name, str(record.get('task_description') or ''),
+            int(bool(record.get('is_advanced'))), model, content,
+            record.get('created_at') or now, record.get('updated_at') or now)
+
+def _import_batch(conn, rows, replace):
+    """Upsert parsed rows in the caller's transaction. Returns the number written."""
+    written = 0
+    for kind, name, desc, adv, model, content, created_at, updated_at in rows:
+        stored, encoding = encode_content(content)
+        result = conn.execute(
+            IMPORT_GUIDE_SQL,
+            (kind, name, desc, adv, model, stored, encoding, created_at, updated_at, int(replace))
+        ).fetchone()
+        if result is None:
+            continue
+        written += 1
+        if search_available:
+            _index_guide(conn, result[0], name, desc, content)
+    conn.executemany(DELETE_CHECKPOINT_SQL, [row[:5] for row in rows])
+    return written
+
+def open_import_stream(fileobj):
+    """Wrap a binary stream so gzip'd and plain NDJSON both read as lines."""
+    stream = io.BufferedReader(fileobj) if not hasattr(fileobj, 'peek') else fileobj
+    if stream.peek(2)[:2] == b'\x1f\x8b':
+        return gzip.GzipFile(fileobj=stream, mode='rb')
+    return stream
+
+def import_guides(fileobj, replace=False, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Stream an export (gzip'd or plain NDJSON) into the cache, one
+    transaction per batch_size lines. An existing guide is only replaced
+    by a newer one unless replace is set. HTML is rendered lazily on the
+    next read (or by `python3 task_cache.py render`).
+    Returns: {'imported': rows written, 'skipped': older duplicates, 'invalid': bad lines}
+    """
+    counts = {'imported': 0, 'skipped': 0, 'invalid': 0}
+    batch = []
+
+    def flush():
+        with sqlite_timer('import'), get_connection() as conn:
+            written = _import_batch(conn, batch, replace)
+        counts['imported'] += written
+        counts['skipped'] += len(batch) - written
+        batch.clear()
+
+    for line in open_import_stream(fileobj):
+        if not line.strip():
+            continue
+        try:
+            row = _import_record(line)
+        except ValueError:
+            row = None
+        if row is None:
+            counts['invalid'] += 1
+            continue
+        batch.append(row)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return counts
+
+# Retention. retention.txt sets a TTL per model (guides nobody has read for
+# that many days are deleted) and a size budget for the database file; when
+# it is over budget the least recently used guides go first, with every
+# recorded hit counting as a little extra recency so popular guides survive
+# a quiet week. Freed pages are handed back to the filesystem a few at a time.
+RETENTION_FILE = os.path.join(os.path.dirname(__file__), 'retention.txt')
+DEFAULT_TTL_DAYS = 0
+DEFAULT_SIZE_BUDGET_MB = 512
+HIT_BONUS_DAYS = 0.5
+MAX_HIT_BONUS_DAYS = 14
+EVICTION_BATCH = 50
+VACUUM_PAGES_PER_RUN = 2048
+
+# Background maintenance (start_maintenance): access counts are written in
+# batches instead of one UPDATE per read
+ACCESS_FLUSH_SECONDS = 60
+RETENTION_INTERVAL_SECONDS = 15 * 60
+# Held by the one process that runs retention (see _hold_retention_lock)
+RETENTION_LOCK_FILE = DB_PATH + '.retention-lock'
+
+_access_lock = threading.Lock()
+_pending_access = {}
+_maintenance_thread = None
+_retention_lock_fd = None
+
+def load_retention(path=RETENTION_FILE):
+    """
+    Read retention.txt (MODEL|TTL_DAYS, *|TTL_DAYS and budget|MB lines).
+    Returns: {'ttl_days': {model: days}, 'default_ttl_days': days, 'size_budget_bytes': bytes}
+    0 disables a limit; without the file the defaults above apply.
+    """
+    policy = {
+        'ttl_days': {},
+        'default_ttl_days': DEFAULT_TTL_DAYS,
+        'size_budget_bytes': DEFAULT_SIZE_BUDGET_MB * 1024 * 1024
     }
+    try:
+        with open(path, 'r') as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        return policy
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        name, _, value = line.rpartition('|')
+        name = name.strip()
+        try:
+            number = float(value)
+        except ValueError:
+            print(f"Warning: ignoring retention line {line!r}")
+            continue
+        if name == 'budget':
+            policy['size_budget_bytes'] = int(number * 1024 * 1024)
+        elif name == '*':
+            policy['default_ttl_days'] = number
+        elif name:
+            policy['ttl_days'][name] = number
+    return policy
+
+def note_access(keys):
+    """
+    Record reads of guides (from memory or SQLite) for LRU eviction.
+    keys: iterable of (task_name, task_description, is_advanced, model_name, guide_kind)
+    Buffered in memory until flush_access.
+    """
+    now = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+    with _access_lock:
+        for name, desc, adv, model, kind in keys:
+            key = (normalize_kind(kind), name, desc, int(adv), model)
+            hits = _pending_access.get(key, (0, None))[0]
+            _pending_access[key] = (hits + 1, now)
+
+def flush_access():
+    """Write buffered access times and hit counts. Returns the number of guides updated."""
+    global _pending_access
+    with _access_lock:
+        pending, _pending_access = _pending_access, {}
+    if not pending:
+        return 0
+    with sqlite_timer('flush_access'), get_connection() as conn:
+        conn.executemany('''
+            UPDATE task_guides SET
+                last_accessed_at = MAX(COALESCE(last_accessed_at, ''), ?),
+                hit_count = hit_count + ?
+            WHERE guide_kind = ?
+            AND task_name = ?
+            AND task_description = ?
+            AND is_advanced = ?
+            AND model_name = ?
+        ''', [(when, hits, *key) for key, (hits, when) in pending.items()])
+    return len(pending)
+
+def database_bytes(conn):
+    """Bytes of the database file in use (free pages excluded)."""
+    page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+    page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+    free_pages = conn.execute('PRAGMA freelist_count').fetchone()[0]
+    return (page_count - free_pages) * page_size
+
+def _delete_rows(conn, rows):
+    """
+    Delete (id, guide_kind, task_name, task_description, is_advanced, model_name)
+    rows; triggers keep guide_stats and guide_search in step. Returns their keys.
+    """
+    conn.executemany('DELETE FROM task_guides WHERE id = ?', [(row[0],) for row in rows])
+    return [(name, desc, bool(adv), model, kind) for _, kind, name, desc, adv, model in rows]
+
+def expire_guides(policy):
+    """
+    Delete guides nobody has read for longer than their model's TTL.
+    Returns the deleted keys as (task_name, task_description, is_advanced, model_name, guide_kind).
+    """
+    expired = []
+    with sqlite_timer('expire'), get_connection() as conn:
+        models = [row[0] for row in conn.execute(
+            'SELECT DISTINCT model_name FROM guide_stats WHERE guide_count > 0')]
+        for model in models:
+            days = policy['ttl_days'].get(model, policy['default_ttl_days'])
+            if days <= 0:
+                continue
+            rows = conn.execute('''
+                SELECT id, guide_kind, task_name, task_description, is_advanced, model_name
+                FROM task_guides
+                WHERE model_name = ?
+                AND COALESCE(last_accessed_at, updated_at) < datetime('now', ?)
+            ''', (model, f'-{days * 24:g} hours')).fetchall()
+            expired.extend(_delete_rows(conn, rows))
+    return expired
+
+def evict_to_budget(budget_bytes):
+    """
+    Delete the least recently used guides until the database fits budget_bytes.
+    The HTML renderings and search index grow with the guides, so the excess
+    is taken as the same share of the stored guide bytes (guide_stats).
+    Returns the deleted keys.
+    """
+    evicted = []
+    if budget_bytes <= 0:
+        return evicted
+    with sqlite_timer('evict'), get_connection() as conn:
+        used = database_bytes(conn)
+        if used <= budget_bytes:
+            return evicted
+        stored = conn.execute('SELECT COALESCE(SUM(stored_bytes), 0) FROM guide_stats').fetchone()[0]
+        excess = stored * (used - budget_bytes) / used
+        while excess > 0:
+            rows = conn.execute('''
+                SELECT id, guide_kind, task_name, task_description, is_advanced, model_name,
+                       length(CAST(guide_content AS BLOB))
+                FROM task_guides
+                ORDER BY julianday(COALESCE(last_accessed_at, updated_at)) + MIN(hit_count * ?, ?)
+                LIMIT ?
+            ''', (HIT_BONUS_DAYS, MAX_HIT_BONUS_DAYS, EVICTION_BATCH)).fetchall()
+            if not rows:
+                break
+            for row in rows:
+                if excess <= 0:
+                    break
+                evicted.extend(_delete_rows(conn, [row[:6]]))
+                excess -= row[6]
+    return evicted
+
+def incremental_vacuum(max_pages=VACUUM_PAGES_PER_RUN):
+    """
+    Return up to max_pages free pages (all if negative) to the filesystem.
+    Needs auto_vacuum = INCREMENTAL: new databases have it, older ones get it
+    once from `python3 task_cache.py compact --full`. Returns pages freed.
+    """
+    with sqlite_timer('vacuum'), get_connection() as conn:
+        if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+            return 0
+        before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        if not before:
+            return 0
+        # executescript steps the pragma to completion (execute frees a single page)
+        conn.executescript(f'PRAGMA incremental_vacuum({int(max_pages)})')
+        return before - conn.execute('PRAGMA freelist_count').fetchone()[0]
+
+def full_vacuum():
+    """Rebuild the file, switching it to incremental auto-vacuum (locks the database)."""
+    with get_connection() as conn:
+        conn.commit()
+        conn.execute('VACUUM')
+
+def enforce_retention(policy=None):
+    """
+    Apply the retention policy: expire by TTL, evict down to the size budget, compact.
+    Returns: {'expired': keys, 'evicted': keys, 'vacuumed_pages': count}
+    """
+    policy = policy or load_retention()
+    flush_access()
+    expired = expire_guides(policy)
+    evicted = evict_to_budget(policy['size_budget_bytes'])
+    if (expired or evicted) and search_available:
+        # FTS5 only records deletions; merging the index releases their pages
+        with sqlite_timer('optimize_search'), get_connection() as conn:
+            conn.execute("INSERT INTO guide_search (guide_search) VALUES ('optimize')")
+    return {'expired': expired, 'evicted': evicted, 'vacuumed_pages': incremental_vacuum()}
+
+def _hold_retention_lock():
+    """
+    True if this process runs retention. The first process to lock
+    RETENTION_LOCK_FILE keeps it until it exits, so processes sharing the
+    database (serve.py workers) never sweep or vacuum it concurrently;
+    another one takes over once the holder is gone.
+    """
+    global _retention_lock_fd
+    if _retention_lock_fd is not None:
+        return True
+    fd = os.open(RETENTION_LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return False
+    _retention_lock_fd = fd
+    return True
+
+def _maintenance_loop(on_evict):
+    last_retention = None
+    while True:
+        time.sleep(ACCESS_FLUSH_SECONDS)
+        try:
+            flush_access()
+            if last_retention is not None and time.monotonic() - last_retention < RETENTION_INTERVAL_SECONDS:
+                continue
+            last_retention = time.monotonic()
+            if not _hold_retention_lock():
+                continue
+            result = enforce_retention()
+            removed = result['expired'] + result['evicted']
+            if removed or result['vacuumed_pages']:
+                print(f"Retention: expired {len(result['expired'])}, evicted {len(result['evicted'])} guides, "
+                      f"freed {result['vacuumed_pages']} pages")
+            if removed and on_evict:
+                on_evict(result)
+        except Exception as e:
+            print(f"Warning: cache maintenance failed: {e}")
+
+def start_maintenance(on_evict=None):
+    """
+    Flush access tracking and apply retention in a daemon thread (idempotent).
+    Every process flushes its own access counts; only one at a time applies
+    retention to the database.
+    on_evict(result) is called with enforce_retention's result whenever guides were removed.
+    """
+    global _maintenance_thread
+    with _access_lock:
+        if _maintenance_thread is not None:
+            return
+        _maintenance_thread = threading.Thread(target=_maintenance_loop, args=(on_evict,), daemon=True)
+    _maintenance_thread.start()
 
 # Initialize database on import
 init_db()
+
+if __name__ == '__main__':
+    # Maintenance commands: python3 task_cache.py compress [--vacuum] | rebuild-stats | rebuild-search | render
+    #                       | prune-checkpoints | retain | compact [--full] | export FILE [filters] | import FILE
+    if len(sys.argv) > 1 and sys.argv[1] == 'compress':
+        count, saved = compress_existing(vacuum='--vacuum' in sys.argv[2:])
+        print(f"Compressed {count} guides, saved {saved / 1024:.1f} KiB")
+    elif len(sys.argv) > 1 and sys.argv[1] == 'rebuild-stats':
+        with get_connection() as conn:
+            rebuild_stats(conn)
+        print(json.dumps(get_cache_stats(), indent=2))
+    elif len(sys.argv) > 1 and sys.argv[1] == 'rebuild-search':
+        if not search_available:
+            print("Full-text search is not available in this SQLite build")
+            sys.exit(1)
+        with get_connection() as conn:
+            rebuild_search_index(conn)
+            count = conn.execute('SELECT COUNT(*) FROM guide_search').fetchone()[0]
+        print(f"Indexed {count} guides")
+    elif len(sys.argv) > 1 and sys.argv[1] == 'render':
+        print(f"Rendered {render_stale()} guides (renderer version {RENDERER_VERSION})")
+    elif len(sys.argv) > 1 and sys.argv[1] == 'prune-checkpoints':
+        print(f"Removed {prune_checkpoints()} checkpoints older than {CHECKPOINT_MAX_AGE_HOURS} hours")
+    elif len(sys.argv) > 1 and sys.argv[1] == 'export':
+        # python3 task_cache.py export FILE|- [--model M] [--mode normal|advanced|project] [--since D] [--until D]
+        import argparse
+        parser = argparse.ArgumentParser(prog='task_cache.py export')
+        parser.add_argument('file', help="output file (.ndjson.gz), or - for stdout")
+        parser.add_argument('--model')
+        parser.add_argument('--mode', choices=EXPORT_MODES)
+        parser.add_argument('--since', help='updated on or after (YYYY-MM-DD)')
+        parser.add_argument('--until', help='updated on or before (YYYY-MM-DD)')
+        args = parser.parse_args(sys.argv[2:])
+        filters = {'model_name': args.model, 'mode': args.mode, 'since': args.since, 'until': args.until}
+        if args.file == '-':
+            export_guides(sys.stdout.buffer, **filters)
+        else:
+            with open(args.file, 'wb') as f:
+                written = export_guides(f, **filters)
+            print(f"Wrote {written / 1024:.1f} KiB to {args.file}")
+    elif len(sys.argv) > 1 and sys.argv[1] == 'import':
+        # python3 task_cache.py import FILE|- [--replace]
+        source = sys.argv[2] if len(sys.argv) > 2 else '-'
+        replace = '--replace' in sys.argv[3:]
+        if source == '-':
+            counts = import_guides(sys.stdin.buffer, replace=replace)
+        else:
+            with open(source, 'rb') as f:
+                counts = import_guides(f, replace=replace)
+        print(f"Imported {counts['imported']} guides, skipped {counts['skipped']} older, "
+              f"{counts['invalid']} invalid lines")
+    elif len(sys.argv) > 1 and sys.argv[1] == 'retain':
+        result = enforce_retention()
+        print(f"Expired {len(result['expired'])}, evicted {len(result['evicted'])} guides, "
+              f"freed {result['vacuumed_pages']} pages")
+    elif len(sys.argv) > 1 and sys.argv[1] == 'compact':
+        if '--full' in sys.argv[2:]:
+            full_vacuum()
+        else:
+            print(f"Freed {incremental_vacuum(max_pages=-1)} pages")
+        with get_connection() as conn:
+            print(f"Database uses {database_bytes(conn) / 1024 / 1024:.1f} MiB")
+    else:
+        print("Usage: python3 task_cache.py compress [--vacuum] | rebuild-stats | rebuild-search | render"
+              " | prune-checkpoints | retain | compact [--full] | export FILE [--model M] [--mode MODE]"
+              " [--since DATE] [--until DATE] | import FILE [--replace]")
+        sys.exit(1)
@@ -0,0 +1,35 @@
+"""Tests for generation_flights.py (single-flight registry)."""
+import pytest
+
+from generation_flights import FlightRegistry, generation_key
+
+
+def test_followers_see_the_leaders_ticket():
+    registry = FlightRegistry()
+    key = generation_key(b'{"model": "m", "prompt": "hi"}')
+    leader, is_leader = registry.join(key, lambda: 'ticket')
+    follower, follower_is_leader = registry.join(key, lambda: pytest.fail('followers must not submit'))
+    assert is_leader and not follower_is_leader
+    assert follower is leader and follower.ticket == 'ticket'
+
+
+def test_failed_submit_creates_no_flight():
+    registry = FlightRegistry()
+    key = generation_key(b'{"model": "m", "prompt": "full"}')
+
+    def submit():
+        raise RuntimeError('queue full')
+
+    with pytest.raises(RuntimeError):
+        registry.join(key, submit)
+    assert registry.stats()['in_flight'] == 0
+    flight, is_leader = registry.join(key, lambda: 'ticket')
+    assert is_leader and flight.ticket == 'ticket'
+
+
+def test_cache_keys_are_refused_after_the_final_save_took_them():
+    flight, _ = FlightRegistry().join(generation_key(b'{"model": "m", "prompt": "keys"}'))
+    assert flight.add_cache_key('a')
+    assert flight.take_cache_keys() == {'a'}
+    assert not flight.add_cache_key('b')
+    assert flight.pending_cache_keys() == set()
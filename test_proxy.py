@@ -0,0 +1,115 @@
+"""
+Route tests for proxy.py against a scratch cache database and a fake
+upstream (no Ollama needed). Run with: python -m pytest -q
+"""
+import json
+import os
+import tempfile
+
+os.environ['TASK_CACHE_DB'] = os.path.join(tempfile.mkdtemp(prefix='groupapp-test-'), 'task_cache.db')
+
+import pytest
+
+import proxy
+
+
+class FakeUpstreamResponse:
+    status_code = 200
+    headers = {'Content-Type': 'application/x-ndjson'}
+
+    def __init__(self, records):
+        self.body = b''.join((json.dumps(r) + '\n').encode('utf-8') for r in records)
+
+    def iter_content(self, chunk_size=4096):
+        yield self.body
+
+    def close(self):
+        pass
+
+
+class FakeUpstreamSession:
+    """Records the bodies posted to Ollama and answers with one done record."""
+
+    def __init__(self):
+        self.posted = []
+
+    def post(self, url, headers=None, data=None, stream=False, timeout=None):
+        self.posted.append(json.loads(data))
+        return FakeUpstreamResponse([{'model': 'mock', 'response': 'hello', 'done': True}])
+
+
+@pytest.fixture
+def client():
+    return proxy.app.test_client()
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    session = FakeUpstreamSession()
+    monkeypatch.setattr(proxy, 'get_upstream_session', lambda url: session)
+    return session
+
+
+def test_generate_forwards_native_template(client, upstream):
+    # "template" is Ollama's own Go template override, not a prompt template id
+    body = {'model': 'mock', 'prompt': 'hi', 'template': '{{ .Prompt }}', 'stream': True}
+    resp = client.post('/api/generate', json=body)
+    assert resp.status_code == 200
+    assert b'"done": true' in resp.get_data()
+    assert upstream.posted == [body]
+    assert 'X-Prompt-Template' not in resp.headers
+
+
+def test_generate_renders_prompt_template(client, upstream):
+    fields = {'task_name': 'Configure VLANs', 'task_description': 'Trunk two switches'}
+    resp = client.post('/api/generate', json={'model': 'mock', 'prompt_template': 'task-normal', 'fields': fields})
+    assert resp.status_code == 200
+    resp.get_data()
+    posted = upstream.posted[0]
+    assert posted['prompt'] == proxy.guide_prompts.render_prompt('task-normal', fields['task_name'], fields['task_description'])
+    assert 'prompt_template' not in posted and 'fields' not in posted
+    assert resp.headers['X-Prompt-Template'] == proxy.guide_prompts.template_ref('task-normal')
+
+
+def test_cache_stats_modes_add_up(client):
+    client.post('/api/cache/save_many', json={'guides': [
+        {'task_name': 'Stats normal', 'model_name': 'stats', 'guide_content': 'n'},
+        {'task_name': 'Stats advanced', 'model_name': 'stats', 'is_advanced': True, 'guide_content': 'a'},
+        {'task_name': 'Stats project', 'model_name': 'stats', 'is_project': True, 'guide_content': 'p'}
+    ]})
+    stats = client.get('/api/cache/stats').get_json()
+    assert stats['by_model']['stats'] == {'normal': 1, 'advanced': 1, 'project': 1, 'bytes': stats['by_model']['stats']['bytes']}
+    assert stats['normal_guides'] + stats['advanced_guides'] + stats['project_guides'] == stats['total_guides']
+    assert stats['normal_guides'] == sum(model['normal'] for model in stats['by_model'].values())
+
+
+def test_late_follower_saves_its_own_cache_key(client):
+    # A follower that joins after the leader's final save took the keys
+    body = {'model': 'mock', 'prompt': 'late follower'}
+    key = proxy.generation_key(json.dumps(body).encode('utf-8'))
+    flight, _ = proxy.generation_flights.join(key, lambda: proxy.generation_scheduler.submit('mock'))
+    flight.start(200, 'application/x-ndjson')
+    flight.publish(b'{"response": "late guide", "done": true}\n')
+    flight.take_cache_keys()
+    flight.finish()
+    try:
+        cache_key = {'task_name': 'Late follower', 'model_name': 'mock'}
+        resp = client.post('/api/generate', json=dict(body, cache_key=cache_key))
+        assert resp.status_code == 200
+        resp.get_data()
+    finally:
+        proxy.generation_scheduler.release(flight.ticket)
+        proxy.generation_flights.finish(flight)
+    found = client.post('/api/cache/get', json=cache_key).get_json()
+    assert found['found'] and found['guide_content'] == 'late guide'
+
+
+def test_get_many_skips_invalid_keys(client):
+    client.post('/api/cache/save', json={'task_name': 'Get many', 'model_name': 'mock', 'guide_content': 'g'})
+    resp = client.post('/api/cache/get_many', json={'keys': ['x', {'task_name': 'Get many', 'model_name': 'mock'}, None]})
+    assert resp.status_code == 200
+    results = resp.get_json()['results']
+    assert [r['found'] for r in results] == [False, True, False]
+    assert results[1]['guide_content'] == 'g'
+    assert client.post('/api/cache/get_many', json={'keys': 'x'}).status_code == 400
+    assert client.post('/api/cache/get_many', json=['x']).status_code == 400
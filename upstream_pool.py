@@ -0,0 +1,220 @@
+"""
+Pool of Ollama backends for /api/generate.
+
+Backends come from models.txt (external https endpoints) plus the default
+local Ollama. Each one tracks its in-flight generations, a moving average
+of time to first byte, and health. Generations go to the least-loaded
+healthy backend that serves the requested model; a backend that refuses
+the connection is marked down and the next candidate is tried, as long as
+nothing has been streamed yet. A background thread polls /api/tags to
+bring backends back and to learn which models each one serves.
+"""
+import os
+import threading
+import time
+
+import requests
+
+MODELS_FILE = os.path.join(os.path.dirname(__file__), 'models.txt')
+HEALTH_CHECK_INTERVAL = 15
+HEALTH_CHECK_TIMEOUT = 5
+MAX_ATTEMPTS = 3
+MAX_AD_HOC_BACKENDS = 16
+LATENCY_SMOOTHING = 0.3
+
+
+def base_url(url):
+    """Strip a trailing /api/generate (and slashes) from an Ollama URL."""
+    url = url.strip().rstrip('/')
+    if url.endswith('/api/generate'):
+        url = url[:-len('/api/generate')]
+    return url
+
+
+def normalize_model(name):
+    name = (name or '').strip()
+    return name[:-len(':latest')] if name.endswith(':latest') else name
+
+
+class Backend:
+    """One Ollama server and what we have learned about it."""
+
+    def __init__(self, url, models=(), ad_hoc=False):
+        self.url = base_url(url)
+        self.generate_url = f'{self.url}/api/generate'
+        self.static_models = {normalize_model(m) for m in models if m}
+        self.discovered_models = set()
+        self.ad_hoc = ad_hoc
+        self.in_flight = 0
+        self.latency = None
+        self.healthy = True
+        self.failures = 0
+        self.requests = 0
+        self.last_error = None
+        self.last_checked = None
+
+    @property
+    def models(self):
+        return self.static_models | self.discovered_models
+
+    def serves(self, model):
+        models = self.models
+        # Nothing known yet: assume it can serve anything
+        return not models or normalize_model(model) in models
+
+    def snapshot(self):
+        return {
+            'url': self.url,
+            'models': sorted(self.models),
+            'healthy': self.healthy,
+            'in_flight': self.in_flight,
+            'latency_ms': round(self.latency * 1000, 1) if self.latency is not None else None,
+            'requests': self.requests,
+            'failures': self.failures,
+            'last_error': self.last_error,
+            'ad_hoc': self.ad_hoc
+        }
+
+
+class UpstreamPool:
+    """Least-loaded routing with failover across Ollama backends."""
+
+    def __init__(self, default_url):
+        self._lock = threading.Lock()
+        self._backends = {}
+        self._health_thread = None
+        self.default = self._add_locked(default_url)
+
+    def _add_locked(self, url, models=(), ad_hoc=False):
+        key = base_url(url)
+        backend = self._backends.get(key)
+        if backend is None:
+            backend = Backend(key, models, ad_hoc)
+            self._backends[key] = backend
+        else:
+            backend.static_models.update(normalize_model(m) for m in models if m)
+            backend.ad_hoc = backend.ad_hoc and ad_hoc
+        return backend
+
+    def add(self, url, models=()):
+        with self._lock:
+            return self._add_locked(url, models)
+
+    def load_models_file(self, path=MODELS_FILE):
+        """
+        Register the active URL|MODEL lines of models.txt. Like app.js, only
+        external (https) URLs are separate backends; other lines point at
+        this proxy and therefore at the default Ollama.
+        """
+        try:
+            with open(path, 'r') as f:
+                lines = f.readlines()
+        except OSError as e:
+            print(f"Warning: could not read {path}: {e}")
+            return
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            parts = line.split('|')
+            model = parts[1].strip() if len(parts) > 1 else ''
+            with self._lock:
+                if parts[0].strip().startswith('https://'):
+                    self._add_locked(parts[0], [model])
+                elif model:
+                    self.default.static_models.add(normalize_model(model))
+
+    def resolve_target(self, custom_target):
+        """
+        Map an X-Ollama-Target header to a backend. Unknown targets become
+        ad-hoc backends that are only used when asked for by name.
+        """
+        if not custom_target:
+            return None
+        with self._lock:
+            backend = self._backends.get(base_url(custom_target))
+            if backend is not None:
+                return backend
+            if sum(1 for b in self._backends.values() if b.ad_hoc) >= MAX_AD_HOC_BACKENDS:
+                return Backend(custom_target, ad_hoc=True)
+            return self._add_locked(custom_target, ad_hoc=True)
+
+    def plan(self, model, preferred=None, attempts=MAX_ATTEMPTS):
+        """
+        Order the backends to try for model: healthy ones serving it by
+        (in flight, preferred first, latency), then unhealthy ones as a
+        last resort.
+        """
+        with self._lock:
+            backends = [b for b in self._backends.values() if not b.ad_hoc or b is preferred]
+            if preferred is not None and preferred not in backends:
+                backends.append(preferred)
+            serving = [b for b in backends if b.serves(model)] or backends
+
+            def rank(b):
+                return (b.in_flight, b is not preferred, b.latency if b.latency is not None else 0.0)
+
+            healthy = sorted((b for b in serving if b.healthy), key=rank)
+            unhealthy = sorted((b for b in serving if not b.healthy), key=lambda b: (b is not preferred, b.failures))
+            return (healthy + unhealthy)[:attempts]
+
+    def acquire(self, backend):
+        with self._lock:
+            backend.in_flight += 1
+            backend.requests += 1
+
+    def first_byte(self, backend, seconds):
+        """Record a successful connection and its time to first byte."""
+        with self._lock:
+            if backend.latency is None:
+                backend.latency = seconds
+            else:
+                backend.latency += LATENCY_SMOOTHING * (seconds - backend.latency)
+            backend.healthy = True
+            backend.last_error = None
+
+    def release(self, backend, error=None, down=False):
+        """Finish a request; down=True takes the backend out until a health check passes."""
+        with self._lock:
+            backend.in_flight = max(0, backend.in_flight - 1)
+            if error:
+                backend.failures += 1
+                backend.last_error = error
+            if down:
+                backend.healthy = False
+
+    def check_health(self):
+        """Poll /api/tags on every configured backend once."""
+        with self._lock:
+            backends = [b for b in self._backends.values() if not b.ad_hoc]
+        for backend in backends:
+            try:
+                resp = requests.get(f'{backend.url}/api/tags', timeout=HEALTH_CHECK_TIMEOUT)
+                resp.raise_for_status()
+                names = {normalize_model(m.get('name') or m.get('model')) for m in resp.json().get('models', [])}
+                with self._lock:
+                    backend.discovered_models = {n for n in names if n}
+                    backend.healthy = True
+                    backend.last_checked = time.time()
+            except (requests.RequestException, ValueError, AttributeError) as e:
+                with self._lock:
+                    backend.healthy = False
+                    backend.last_error = f'health check: {e}'
+                    backend.last_checked = time.time()
+
+    def start_health_checks(self, interval=HEALTH_CHECK_INTERVAL):
+        """Run check_health every interval seconds in a daemon thread (idempotent)."""
+        with self._lock:
+            if self._health_thread is not None:
+                return
+            self._health_thread = threading.Thread(target=self._health_loop, args=(interval,), daemon=True)
+        self._health_thread.start()
+
+    def _health_loop(self, interval):
+        while True:
+            self.check_health()
+            time.sleep(interval)
+
+    def stats(self):
+        with self._lock:
+            return [b.snapshot() for b in self._backends.values()]